@@ -119,6 +119,9 @@ def _show_error(title, msg):
 
 
 if __name__ == "__main__":
+    # Process con của thumbnail pool (exe frozen trên Windows) không chạy lại main()
+    import multiprocessing
+    multiprocessing.freeze_support()
     try:
         main()
     except Exception:
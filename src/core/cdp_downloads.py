@@ -0,0 +1,174 @@
+"""CDP Downloads - biết download xong qua event Browser.downloadWillBegin / downloadProgress
+
+Trước đây sau khi mở link tải phải ngủ 2-5s rồi glob output dir + ~/Downloads,
+chờ .crdownload biến mất và size "đứng yên 1s" → chậm vài giây mỗi video và
+có thể nhặt nhầm file của tab khác. Ở đây download được đặt behavior
+"allowAndName" (Chrome lưu file tên = guid trong thư mục staging) + bật event:
+downloadWillBegin gắn guid → watch (khớp theo key trong URL, vd post_id),
+downloadProgress báo byte và trạng thái completed/canceled → biết ngay path
+cuối cùng. Quét file chỉ còn là fallback khi browser không hỗ trợ event.
+"""
+import asyncio
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    from zendriver import cdp
+    ZENDRIVER_AVAILABLE = True
+except ImportError:
+    ZENDRIVER_AVAILABLE = False
+
+PENDING, IN_PROGRESS, COMPLETED, CANCELED = "pending", "inProgress", "completed", "canceled"
+STALE_AGE = 3600  # file staging cũ hơn (giây) = sót lại từ lần chạy trước, download chờ tối đa vài phút
+
+
+@dataclass(eq=False)
+class DownloadWatch:
+    """1 download đang chờ (khớp event theo key nằm trong URL)"""
+    key: str
+    on_progress: Optional[Callable[["DownloadWatch"], None]] = None
+    guid: Optional[str] = None
+    url: str = ""
+    suggested_filename: str = ""
+    state: str = PENDING
+    received_bytes: int = 0
+    total_bytes: int = 0
+    path: Optional[Path] = None
+    began: asyncio.Event = field(default_factory=asyncio.Event)
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def percent(self) -> int:
+        return int(self.received_bytes * 100 / self.total_bytes) if self.total_bytes else 0
+
+
+class DownloadTracker:
+    """Theo dõi download của 1 browser: guid → watch.
+
+    Nhiều tab dùng chung 1 tracker (1 thư mục staging) → file không bao giờ
+    bị ghi nhầm thư mục khi các tab đổi download path cùng lúc.
+    """
+
+    def __init__(self, download_dir: Path):
+        self.download_dir = Path(download_dir)
+        self._watches: list[DownloadWatch] = []  # chưa gắn guid
+        self._by_guid: dict[str, DownloadWatch] = {}
+        self._swept = False
+
+    async def attach(self, tab) -> None:
+        """Bật download event trên tab (raise nếu browser/zendriver không hỗ trợ)"""
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        if not self._swept:
+            self._swept = True
+            self.sweep()
+        await tab.send(cdp.browser.set_download_behavior(
+            behavior="allowAndName",
+            download_path=str(self.download_dir.absolute()),
+            events_enabled=True,
+        ))
+        tab.add_handler(cdp.browser.DownloadWillBegin, self.on_will_begin)
+        tab.add_handler(cdp.browser.DownloadProgress, self.on_progress)
+
+    def expect(self, key: str, on_progress: Optional[Callable[[DownloadWatch], None]] = None) -> DownloadWatch:
+        """Đăng ký chờ download có URL chứa key (gọi trước khi mở link tải)"""
+        watch = DownloadWatch(key=key, on_progress=on_progress)
+        self._watches.append(watch)
+        return watch
+
+    def discard(self, watch: DownloadWatch) -> None:
+        if watch in self._watches:
+            self._watches.remove(watch)
+        if watch.guid and self._by_guid.get(watch.guid) is watch:
+            del self._by_guid[watch.guid]
+
+    def remove_file(self, watch: DownloadWatch) -> None:
+        """Xóa file staging của watch (download hủy / quá giờ / file hỏng)"""
+        if not watch.guid:
+            return
+        for path in self.download_dir.glob(f"{watch.guid}*"):  # kể cả .crdownload
+            try:
+                path.unlink()
+            except OSError:  # Chrome còn giữ file (Windows) → để sweep() dọn lần sau
+                pass
+
+    def sweep(self, max_age: float = STALE_AGE) -> int:
+        """Xóa file staging sót lại (crash / tắt app giữa chừng). Trả về số file đã xóa"""
+        removed = 0
+        cutoff = time.time() - max_age
+        try:
+            entries = list(os.scandir(self.download_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    # ---- Event handlers (chạy trên event loop của browser) ----
+
+    def on_will_begin(self, event, *_) -> None:
+        if event.guid in self._by_guid:
+            return  # cùng event nhận qua nhiều tab
+        watch = next((w for w in self._watches if w.key in (event.url or "")), None)
+        if watch is None:
+            return
+        self._watches.remove(watch)
+        watch.guid = event.guid
+        watch.url = event.url
+        watch.suggested_filename = event.suggested_filename or ""
+        watch.state = IN_PROGRESS
+        self._by_guid[event.guid] = watch
+        watch.began.set()
+
+    def on_progress(self, event, *_) -> None:
+        watch = self._by_guid.get(event.guid)
+        if watch is None or watch.done.is_set():
+            return
+        watch.received_bytes = int(event.received_bytes or 0)
+        watch.total_bytes = int(event.total_bytes or 0)
+        state = getattr(event.state, "value", event.state)
+        if state == COMPLETED:
+            watch.state = COMPLETED
+            watch.path = self.download_dir / watch.guid
+        elif state == CANCELED:
+            watch.state = CANCELED
+        if watch.on_progress:
+            watch.on_progress(watch)
+        if watch.state in (COMPLETED, CANCELED):
+            watch.done.set()
+
+    async def wait(self, watch: DownloadWatch, timeout: float,
+                   begin_timeout: Optional[float] = None) -> Optional[DownloadWatch]:
+        """Chờ download xong → watch (path = file đã tải) hoặc None (hủy / quá giờ / không bắt đầu)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            await asyncio.wait_for(watch.began.wait(), min(begin_timeout or timeout, timeout))
+            await asyncio.wait_for(watch.done.wait(), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.discard(watch)
+        if watch.state == COMPLETED and watch.path and watch.path.exists():
+            return watch
+        self.remove_file(watch)
+        return None
+
+
+def move_download(watch: DownloadWatch, dest: Path) -> str:
+    """Đưa file staging (tên = guid) về đúng tên/thư mục đích"""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(watch.path, dest)
+    except OSError:  # khác ổ đĩa
+        shutil.move(str(watch.path), str(dest))
+    return str(dest)
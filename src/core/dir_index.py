@@ -0,0 +1,154 @@
+"""Dir Index - liệt kê thư mục 1 lần (os.scandir) thành map tên → entry, có cache
+
+Import cặp ảnh + TXT cần biết subfolder nào có TXT cùng tên, có ảnh gì. Thay vì
+iterdir() cả folder cha cho mỗi subfolder + exists() từng path ứng viên, mỗi
+thư mục chỉ scandir 1 lần; subfolder quét song song trên thread pool. Index
+được cache theo mtime của thư mục (mtime đổi khi thêm/xóa/đổi tên entry) →
+import lại cùng cây chỉ quét lại thư mục có thay đổi.
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp'}
+PROMPT_FILENAMES = ("prompt.txt", "prompts.txt")
+# Thư mục vừa đổi trong khoảng này: mtime có thể chưa "nhảy" dù đã thêm file
+# (độ phân giải mtime của FS) → không cache để lần sau quét lại
+RACY_SECONDS = 2
+
+
+def natural_sort_key(s):
+    """Natural sort key: '2.jpg' < '10.jpg' (not lexicographic)"""
+    return [int(c) if c.isdigit() else c.lower() for c in re.split(r'(\d+)', str(s))]
+
+
+@dataclass(frozen=True)
+class Entry:
+    name: str
+    path: str
+    is_dir: bool
+    is_file: bool
+
+
+@dataclass
+class DirIndex:
+    path: str
+    mtime_ns: int
+    entries: dict[str, Entry] = field(default_factory=dict)  # tên lower-case → entry
+
+    def get(self, name: str) -> Optional[Entry]:
+        """Tra tên không phân biệt hoa thường (như Windows)"""
+        return self.entries.get(name.lower())
+
+    def get_file(self, name: str) -> Optional[Entry]:
+        entry = self.get(name)
+        return entry if entry and entry.is_file else None
+
+    def subdirs(self, include_hidden: bool = False) -> list[Entry]:
+        dirs = [e for e in self.entries.values()
+                if e.is_dir and (include_hidden or not e.name.startswith('.'))]
+        return sorted(dirs, key=lambda e: natural_sort_key(e.name))
+
+    def files(self, extensions: Iterable[str]) -> list[Entry]:
+        exts = {ext.lower() for ext in extensions}
+        found = [e for e in self.entries.values()
+                 if e.is_file and os.path.splitext(e.name)[1].lower() in exts]
+        return sorted(found, key=lambda e: natural_sort_key(e.name))
+
+
+class DirIndexer:
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._cache: dict[str, DirIndex] = {}
+        self._lock = threading.Lock()
+        self.scanned = 0  # số thư mục đã scandir thật (không tính cache hit)
+
+    def scan(self, path) -> DirIndex:
+        """Index của 1 thư mục (từ cache nếu mtime không đổi)"""
+        key = os.path.normcase(os.path.abspath(path))
+        mtime_ns = os.stat(key).st_mtime_ns
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            return cached
+
+        index = DirIndex(path=str(path), mtime_ns=mtime_ns)
+        with os.scandir(key) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                    is_file = not is_dir and entry.is_file()
+                except OSError:
+                    continue
+                index.entries[entry.name.lower()] = Entry(entry.name, os.path.join(str(path), entry.name),
+                                                         is_dir, is_file)
+        with self._lock:
+            if time.time_ns() - mtime_ns > RACY_SECONDS * 1_000_000_000:
+                self._cache[key] = index
+            self.scanned += 1
+        return index
+
+    def scan_many(self, paths: list) -> dict[str, Optional[DirIndex]]:
+        """Quét song song nhiều thư mục. Thư mục lỗi (bị xóa, không có quyền) → None"""
+        def safe_scan(path):
+            try:
+                return self.scan(path)
+            except OSError:
+                return None
+
+        if len(paths) <= 1:
+            return {str(p): safe_scan(p) for p in paths}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(paths))) as pool:
+            return {str(p): index for p, index in zip(paths, pool.map(safe_scan, paths))}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+@dataclass
+class ImagePair:
+    folder: Path
+    txt_path: Path
+    images: list[Path]
+
+
+def find_image_pairs(parent, indexer: DirIndexer) -> list[ImagePair]:
+    """Các subfolder ảnh có TXT prompt đi kèm, theo natural sort.
+
+    TXT ưu tiên: parent/<tên>.txt, <tên>/<tên>.txt, <tên>/prompt.txt, <tên>/prompts.txt
+    """
+    root = indexer.scan(parent)
+    subdirs = root.subdirs()
+    indexes = indexer.scan_many([d.path for d in subdirs])
+
+    pairs = []
+    for d in subdirs:
+        sub = indexes.get(d.path)
+        if sub is None:
+            continue
+        txt = root.get_file(f"{d.name}.txt") or sub.get_file(f"{d.name}.txt")
+        for name in PROMPT_FILENAMES:
+            txt = txt or sub.get_file(name)
+        if txt is None:
+            continue
+        images = sub.files(IMAGE_EXTENSIONS)
+        if images:
+            pairs.append(ImagePair(Path(d.path), Path(txt.path), [Path(e.path) for e in images]))
+    return pairs
+
+
+_shared: Optional[DirIndexer] = None
+
+
+def shared_indexer() -> DirIndexer:
+    """Indexer dùng chung (cache sống suốt phiên)"""
+    global _shared
+    if _shared is None:
+        _shared = DirIndexer()
+    return _shared
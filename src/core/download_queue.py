@@ -0,0 +1,183 @@
+"""Download Queue - tải lại video từ share URL bằng HTTP, không mở browser
+
+History tab trước đây mở 1 Chrome headless cho mỗi video (inject cookie, ngủ
+5s, quét thư mục tới 5 phút). Share URL (VIDEO_DOWNLOAD_URL) là link public
+nên chỉ cần HTTP: hàng đợi với số luồng cố định, mỗi luồng giữ 1 session
+(keep-alive, dùng lại kết nối), stream qua download_to_file (.part + resume).
+Mỗi job có progress riêng và hủy được (đang chờ → bỏ qua, đang tải → dừng ở
+chunk kế tiếp, .part giữ lại để lần sau resume).
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from .download_sink import DownloadError, DownloadResult, download_to_file
+from .mp4_check import mp4_problem
+from .result_cache import video_output_name
+
+try:
+    from curl_cffi import requests as curl_requests
+    CURL_CFFI_AVAILABLE = True
+except ImportError:
+    CURL_CFFI_AVAILABLE = False
+
+DEFAULT_CONCURRENCY = 3
+IMPERSONATE = "chrome133a"
+
+QUEUED, DOWNLOADING, DONE, FAILED, CANCELED = "queued", "downloading", "done", "failed", "canceled"
+
+
+class DownloadCancelled(DownloadError):
+    pass
+
+
+@dataclass(eq=False)
+class DownloadJob:
+    """1 video cần tải (task_id của history → dest)"""
+    task_id: str
+    url: str
+    dest: Path
+    headers: Optional[dict] = None
+    state: str = QUEUED
+    received_bytes: int = 0
+    total_bytes: Optional[int] = None
+    result: Optional[DownloadResult] = None
+    error: str = ""
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def percent(self) -> int:
+        return int(self.received_bytes * 100 / self.total_bytes) if self.total_bytes else 0
+
+
+def needs_download(task) -> bool:
+    """Video đã tạo xong nhưng file output không còn (hoặc chưa từng tải)"""
+    if task.status != "completed" or not (task.post_id or task.media_url):
+        return False
+    return not task.output_path or task.file_exists is False
+
+
+def redownload_target(task, output_dir: Path, share_url: str) -> tuple[str, Path]:
+    """(url, dest): tải về đúng output_path cũ nếu có, không thì stt_prompt_postid.mp4"""
+    url = share_url.format(post_id=task.post_id) if task.post_id else task.media_url
+    if task.output_path:
+        return url, Path(task.output_path)
+    name = video_output_name(0, task.prompt, task.post_id or task.id)
+    return url, Path(output_dir) / name
+
+
+def _default_session():
+    if CURL_CFFI_AVAILABLE:
+        return curl_requests.Session(impersonate=IMPERSONATE)
+    import requests
+    return requests.Session()
+
+
+class DownloadQueue:
+    """Hàng đợi tải với concurrency cố định.
+
+    on_update(job) được gọi từ thread tải mỗi khi state/progress đổi
+    (progress chỉ báo khi % thay đổi) — GUI nên chuyển qua Signal.
+    """
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY,
+                 on_update: Optional[Callable[[DownloadJob], None]] = None,
+                 session_factory: Callable = _default_session,
+                 timeout: float = 120,
+                 validate: Optional[Callable[[Path], Optional[str]]] = mp4_problem):
+        self.on_update = on_update
+        self.session_factory = session_factory
+        self.timeout = timeout
+        self.validate = validate
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="download")
+        self._local = threading.local()  # session riêng mỗi thread (session không thread-safe)
+        self._sessions = []
+        self._lock = threading.Lock()
+        self._jobs: dict[str, DownloadJob] = {}
+
+    def submit(self, job: DownloadJob) -> Optional[Future]:
+        """Thêm job (bỏ qua nếu task_id đang trong hàng đợi)"""
+        with self._lock:
+            if job.task_id in self._jobs:
+                return None
+            self._jobs[job.task_id] = job
+        self._notify(job)
+        return self._pool.submit(self._run, job)
+
+    def active(self) -> list[DownloadJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def is_active(self, task_id: str) -> bool:
+        with self._lock:
+            return task_id in self._jobs
+
+    def cancel(self, task_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(task_id)
+        if job:
+            job.cancel_event.set()
+
+    def cancel_all(self) -> None:
+        for job in self.active():
+            job.cancel_event.set()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.cancel_all()
+        self._pool.shutdown(wait=wait)
+        if not wait:
+            return  # thread tải còn dừng dở ở chunk kế tiếp → không đóng session dưới chân nó
+        for session in self._sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+        self._sessions.clear()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self.session_factory()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _notify(self, job: DownloadJob) -> None:
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"[DownloadQueue] on_update error: {e}")
+
+    def _run(self, job: DownloadJob) -> DownloadJob:
+        try:
+            if job.cancel_event.is_set():
+                raise DownloadCancelled("cancelled")
+            job.state = DOWNLOADING
+            self._notify(job)
+
+            def progress(done, total):
+                if job.cancel_event.is_set():
+                    raise DownloadCancelled("cancelled")
+                last, last_mb = job.percent, job.received_bytes >> 20
+                job.received_bytes, job.total_bytes = done, total
+                # Không biết tổng → báo mỗi MB
+                if job.percent != last or (total is None and done >> 20 != last_mb):
+                    self._notify(job)
+
+            job.result = download_to_file(
+                self._session().get, job.url, job.dest, job.headers,
+                validate=self.validate, on_progress=progress, timeout=self.timeout,
+            )
+            job.state = DONE
+        except DownloadCancelled:
+            job.state = CANCELED
+        except Exception as e:
+            job.state, job.error = FAILED, str(e)
+        finally:
+            with self._lock:
+                self._jobs.pop(job.task_id, None)
+        self._notify(job)
+        return job
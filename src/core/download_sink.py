@@ -0,0 +1,206 @@
+"""Download Sink - tải file theo từng chunk vào .part, resume bằng Range, rename nguyên tử
+
+Trước đây video/ảnh tải về bằng resp.content (cả file nằm trong RAM, nhân với
+số luồng tải song song) rồi ghi thẳng vào tên cuối → tải hỏng giữa chừng để
+lại file dở dang trông như đã xong. Ở đây:
+- stream từng chunk vào <tên>.part, hash sha256 trong lúc ghi
+- đứt kết nối → lần thử sau gửi Range: bytes=<đã có>- và ghi tiếp
+- đủ byte → flush + fsync → os.replace sang tên cuối (file tên cuối luôn đầy đủ)
+Dùng được với requests.get / curl_cffi requests.get (cùng API stream/iter_content).
+"""
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+CHUNK_SIZE = 256 * 1024
+PART_SUFFIX = ".part"
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class DownloadError(Exception):
+    pass
+
+
+@dataclass
+class DownloadResult:
+    path: str
+    size: int
+    sha256: str
+    resumed_from: int = 0  # byte bắt đầu của lần tải cuối (0 = không resume)
+
+
+class DownloadSink:
+    """Ghi 1 file qua <dest>.part; finish() mới đưa về tên cuối"""
+
+    def __init__(self, dest):
+        self.dest = Path(dest)
+        self.part = self.dest.with_name(self.dest.name + PART_SUFFIX)
+        self._file = None
+        self._hash = None
+        self.size = 0
+
+    @property
+    def offset(self) -> int:
+        """Số byte đã có trong .part (điểm resume)"""
+        try:
+            return self.part.stat().st_size
+        except OSError:
+            return 0
+
+    def open(self, resume: bool) -> int:
+        """Mở .part để ghi tiếp (resume) hoặc ghi lại từ đầu. Trả về offset bắt đầu"""
+        self.close()
+        self.dest.parent.mkdir(parents=True, exist_ok=True)
+        self._hash = hashlib.sha256()
+        self.size = 0
+        if resume and self.offset:
+            # Hash phần đã có để sha256 cuối cùng là của cả file
+            with open(self.part, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    self._hash.update(chunk)
+                    self.size += len(chunk)
+            self._file = open(self.part, "ab")
+        else:
+            self._file = open(self.part, "wb")
+        return self.size
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self) -> DownloadResult:
+        """flush + fsync .part rồi rename nguyên tử sang dest"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.close()
+        os.replace(self.part, self.dest)
+        _fsync_dir(self.dest.parent)
+        return DownloadResult(str(self.dest), self.size, self._hash.hexdigest())
+
+    def discard(self) -> None:
+        self.close()
+        try:
+            self.part.unlink()
+        except OSError:
+            pass
+
+
+def _fsync_dir(path: Path) -> None:
+    """fsync thư mục để rename bền qua mất điện (Windows không hỗ trợ → bỏ qua)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _expected_total(resp, offset: int) -> Optional[int]:
+    """Tổng kích thước file theo header (None nếu server không báo)"""
+    match = _CONTENT_RANGE.match(resp.headers.get("content-range", "") or "")
+    if match and match.group(3) != "*":
+        return int(match.group(3))
+    length = resp.headers.get("content-length")
+    return offset + int(length) if length and length.isdigit() else None
+
+
+def download_to_file(get: Callable, url: str, dest, headers: Optional[dict] = None, *,
+                     min_size: int = 0, max_attempts: int = 3, chunk_size: int = CHUNK_SIZE,
+                     on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                     validate: Optional[Callable[[Path], Optional[str]]] = None,
+                     **kwargs) -> DownloadResult:
+    """Tải url → dest (stream, resume, rename nguyên tử).
+
+    get: requests.get / curl_cffi requests.get; kwargs (cookies, timeout,
+    impersonate...) truyền thẳng. on_progress(bytes đã có, tổng hoặc None).
+    validate(.part) → None nếu file hợp lệ, ngược lại là lý do (vd mp4_problem).
+    Raise DownloadError nếu hết lượt thử; .part được giữ lại để lần sau resume.
+    """
+    sink = DownloadSink(dest)
+    last_error = None
+    for _ in range(max_attempts):
+        offset = sink.offset
+        req_headers = dict(headers or {})
+        if offset:
+            req_headers["Range"] = f"bytes={offset}-"
+        try:
+            resp = get(url, headers=req_headers, stream=True, **kwargs)
+        except Exception as e:
+            last_error = e
+            continue
+        try:
+            if resp.status_code == 416 and offset:
+                # .part lệch với file trên server → tải lại từ đầu
+                sink.discard()
+                last_error = DownloadError("HTTP 416")
+                continue
+            if resp.status_code not in (200, 206):
+                raise DownloadError(f"HTTP {resp.status_code}")
+            match = _CONTENT_RANGE.match(resp.headers.get("content-range", "") or "")
+            resume = resp.status_code == 206 and match is not None and int(match.group(1)) == offset
+            start = sink.open(resume)  # server bỏ qua Range (200) → ghi lại từ 0
+            total = _expected_total(resp, start)
+            for chunk in resp.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    sink.write(chunk)
+                    if on_progress:
+                        on_progress(sink.size, total)
+            if total is not None and sink.size < total:
+                last_error = DownloadError(f"Thiếu dữ liệu: {sink.size}/{total} bytes")
+                sink.close()
+                continue
+            if sink.size < min_size:
+                sink.discard()
+                raise DownloadError(f"File quá nhỏ ({sink.size} bytes)")
+            if validate:
+                sink.flush()
+                problem = validate(sink.part)
+                # Response đã kết thúc bình thường (đứt giữa chừng đi nhánh except,
+                # thiếu byte so với header ở trên) → resume không lấy thêm được gì
+                if problem:
+                    sink.discard()
+                    raise DownloadError(f"File hỏng: {problem}")
+            result = sink.finish()
+            result.resumed_from = start
+            return result
+        except DownloadError:
+            sink.close()
+            raise
+        except Exception as e:  # đứt kết nối giữa chừng → lần sau resume từ .part
+            last_error = e
+            sink.close()
+        finally:
+            close = getattr(resp, "close", None)
+            if close:
+                close()
+    raise DownloadError(f"Tải thất bại sau {max_attempts} lần: {last_error}")
+
+
+def write_file(dest, data: bytes) -> DownloadResult:
+    """Ghi dữ liệu đã có trong RAM (vd ảnh base64) cũng qua .part + rename nguyên tử"""
+    sink = DownloadSink(dest)
+    sink.open(resume=False)
+    try:
+        sink.write(data)
+        return sink.finish()
+    except BaseException:
+        sink.discard()
+        raise
@@ -0,0 +1,53 @@
+"""File Status - cache trạng thái file output (tồn tại / size / mtime) trong history.db
+
+History tab đọc cột cache thay vì os.path.exists mỗi row mỗi lần refresh.
+reconcile_file_status() quét nền để cập nhật các thay đổi (file bị xóa/di chuyển,
+download xong...) — gọi định kỳ hoặc khi watcher báo thư mục thay đổi.
+Video mới/thay đổi được kiểm tra box MP4: file bị cắt ghi file_exists = 0 để
+History coi như thiếu và cho tải lại.
+"""
+import os
+from typing import Callable, Optional
+
+from .mp4_check import is_complete_mp4
+
+
+def stat_output(path: Optional[str]) -> tuple[bool, Optional[int], Optional[float]]:
+    """(exists, size, mtime) của 1 file output"""
+    if not path:
+        return False, None, None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False, None, None
+    return True, st.st_size, st.st_mtime
+
+
+def reconcile_file_status(history_manager, prefix: Optional[str] = None,
+                          is_cancelled: Optional[Callable[[], bool]] = None,
+                          chunk_size: int = 500) -> tuple[int, set[str]]:
+    """So cache với filesystem, ghi lại các row thay đổi.
+
+    prefix: chỉ quét output nằm trong thư mục này (None = tất cả).
+    Trả về (số row thay đổi, tập thư mục chứa output) — thư mục dùng cho watcher.
+    """
+    changed = 0
+    dirs: set[str] = set()
+    for rows in history_manager.iter_file_status(prefix=prefix, chunk_size=chunk_size):
+        updates = []
+        for task_id, path, cached_exists, cached_size, cached_mtime in rows:
+            dirs.add(os.path.dirname(path))
+            exists, size, mtime = stat_output(path)
+            if exists and cached_exists is not None and cached_size == size and cached_mtime == mtime:
+                exists = bool(cached_exists)  # không đổi từ lần kiểm tra trước
+            elif exists and path.lower().endswith(".mp4"):
+                exists = is_complete_mp4(path)
+            if (cached_exists is None or bool(cached_exists) != exists
+                    or cached_size != size or cached_mtime != mtime):
+                updates.append((task_id, exists, size, mtime))
+        if updates:
+            history_manager.set_file_status(updates)
+            changed += len(updates)
+        if is_cancelled and is_cancelled():
+            break
+    return changed, dirs
@@ -0,0 +1,134 @@
+"""History Archive - chuyển history cũ sang file archive theo tháng
+
+Row có created_at cũ hơn cutoff được chuyển (copy + delete trong 1 transaction)
+sang data/history_archive/history_YYYY_MM.db. File archive có FTS5 riêng nên có
+thể mở khi cần để search mà không làm nặng history.db chính.
+Các hàm ở đây chạy trên writer connection (HistoryWriter.submit_call).
+"""
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+FTS_TOKENIZE = "unicode61 remove_diacritics 2"
+
+ARCHIVE_TABLES = ("video_history", "image_history")
+
+
+def archive_file(archive_dir: Path, month: str) -> Path:
+    """month dạng "YYYY-MM" → .../history_YYYY_MM.db"""
+    return archive_dir / f"history_{month.replace('-', '_')}.db"
+
+
+def list_archives(archive_dir: Path) -> list[tuple[str, Path]]:
+    """[(month, path)] mới nhất trước"""
+    result = []
+    for path in archive_dir.glob("history_*_*.db"):
+        parts = path.stem.split("_")
+        if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+            result.append((f"{parts[1]}-{parts[2]}", path))
+    return sorted(result, reverse=True)
+
+
+def _next_month(month: str) -> str:
+    year, mon = map(int, month.split("-"))
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> list[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _ensure_archive_schema(conn: sqlite3.Connection) -> None:
+    """Tạo bảng + FTS trong archive (attach là 'archive'), bổ sung cột mới nếu main có thêm"""
+    for table in ARCHIVE_TABLES:
+        sql = conn.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()[0]
+        conn.execute(sql.replace(f"CREATE TABLE {table}",
+                                 f"CREATE TABLE IF NOT EXISTS archive.{table}", 1))
+        archive_cols = set(_columns(conn, "archive", table))
+        for row in conn.execute(f"PRAGMA main.table_info({table})").fetchall():
+            if row[1] not in archive_cols:
+                conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {row[1]} {row[2]}")
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS archive.{table}_fts USING fts5(
+                prompt, account_email,
+                content='{table}', content_rowid='rowid',
+                tokenize='{FTS_TOKENIZE}'
+            )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive.account_cookies (
+            account_email TEXT NOT NULL,
+            cookies_hash TEXT NOT NULL,
+            cookies TEXT NOT NULL,
+            PRIMARY KEY (account_email, cookies_hash)
+        )
+    """)
+
+
+def _archive_month(conn: sqlite3.Connection, path: Path, month: str, cutoff: str) -> int:
+    """Chuyển các row của 1 tháng (< cutoff) sang file archive. Trả về số row đã chuyển."""
+    upper = min(_next_month(month), cutoff)
+    moved = 0
+    conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+    try:
+        _ensure_archive_schema(conn)
+        conn.execute("BEGIN IMMEDIATE")
+        for table in ARCHIVE_TABLES:
+            cols = ", ".join(_columns(conn, "main", table))
+            before = conn.execute(
+                f"SELECT coalesce(max(rowid), 0) FROM archive.{table}"
+            ).fetchone()[0]
+            conn.execute(f"""
+                INSERT OR IGNORE INTO archive.{table} ({cols})
+                SELECT {cols} FROM main.{table} WHERE created_at >= ? AND created_at < ?
+            """, (month, upper))
+            conn.execute(f"""
+                INSERT INTO archive.{table}_fts (rowid, prompt, account_email)
+                SELECT rowid, prompt, account_email FROM archive.{table} WHERE rowid > ?
+            """, (before,))
+            if table == "video_history":
+                conn.execute("""
+                    INSERT OR IGNORE INTO archive.account_cookies
+                    SELECT c.* FROM main.account_cookies c
+                    JOIN archive.video_history v
+                      ON c.account_email = coalesce(v.account_email, '') AND c.cookies_hash = v.cookies_hash
+                    WHERE v.rowid > ?
+                """, (before,))
+            # DELETE qua trigger → FTS + stats của main được cập nhật
+            moved += conn.execute(
+                f"DELETE FROM main.{table} WHERE created_at >= ? AND created_at < ?", (month, upper)
+            ).rowcount
+        conn.execute("COMMIT")
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        conn.execute("DETACH DATABASE archive")
+    return moved
+
+
+def archive_older_than(conn: sqlite3.Connection, archive_dir: Path, cutoff: datetime) -> dict[str, int]:
+    """Chuyển mọi row created_at < cutoff sang archive theo tháng. Trả về {month: số row}."""
+    cutoff_iso = cutoff.isoformat()
+    months = [row[0] for row in conn.execute("""
+        SELECT substr(created_at, 1, 7) FROM video_history WHERE created_at != '' AND created_at < ?
+        UNION
+        SELECT substr(created_at, 1, 7) FROM image_history WHERE created_at != '' AND created_at < ?
+    """, (cutoff_iso, cutoff_iso)).fetchall()]
+    if not months:
+        return {}
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    result = {}
+    for month in sorted(months):
+        result[month] = _archive_month(conn, archive_file(archive_dir, month), month, cutoff_iso)
+    return result
+
+
+def incremental_vacuum(conn: sqlite3.Connection, max_pages: int = 1000) -> int:
+    """Trả lại tối đa max_pages trang trống cho OS. Trả về số trang đã giải phóng."""
+    free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    if free_before:
+        # PRAGMA incremental_vacuum giải phóng từng trang mỗi step → phải fetch hết
+        conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+    return free_before - conn.execute("PRAGMA freelist_count").fetchone()[0]
@@ -0,0 +1,89 @@
+"""History DB - connection manager cho history.db
+
+1 writer duy nhất (HistoryWriter thread) + mỗi thread đọc có connection
+read-only riêng (query_only) → GUI, stats, search, export chạy song song với
+writer mà không dính lỗi "SQLite objects created in a thread".
+"""
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .history_writer import HistoryWriter
+
+
+class ConnectionManager:
+    def __init__(self, db_path: Path, flush_interval: float = 0.2):
+        self.db_path = db_path
+        self.writer = HistoryWriter(db_path, flush_interval=flush_interval)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._readers: list[tuple[threading.Thread, sqlite3.Connection]] = []
+        self._closed = False
+
+    def connect_schema(self) -> sqlite3.Connection:
+        """Connection ghi tạm thời cho migration lúc khởi động (trước khi writer chạy)"""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        # DB mới: phải đặt trước khi tạo bảng / bật WAL mới có hiệu lực (DB cũ cần VACUUM)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA recursive_triggers = ON")
+        return conn
+
+    def start(self) -> None:
+        self.writer.start()
+
+    def reader(self) -> sqlite3.Connection:
+        """Connection read-only của thread hiện tại (tạo lần đầu khi cần)"""
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        if self._closed:
+            raise sqlite3.ProgrammingError("History database is closed")
+
+        # check_same_thread=False chỉ để close() từ thread khác được;
+        # mỗi connection vẫn chỉ được dùng bởi thread sở hữu (thread-local)
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        self._local.conn = conn
+        with self._lock:
+            # Dọn connection của các QThread/worker đã kết thúc
+            alive = []
+            for thread, c in self._readers:
+                if thread.is_alive():
+                    alive.append((thread, c))
+                else:
+                    c.close()
+            alive.append((threading.current_thread(), conn))
+            self._readers = alive
+        return conn
+
+    def release_reader(self) -> None:
+        """Đóng connection đọc của thread hiện tại.
+
+        Gọi ở cuối run() của QThread/worker: QThread hiện trong Python là
+        _DummyThread (is_alive() luôn True) nên không tự dọn được ở reader().
+        """
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._readers = [(t, c) for t, c in self._readers if c is not conn]
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush + dừng writer, đóng mọi reader"""
+        self._closed = True
+        self.writer.stop(timeout)
+        with self._lock:
+            for _, conn in self._readers:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._readers = []
+        self._local = threading.local()
@@ -0,0 +1,97 @@
+"""History Export - stream history.db → CSV / JSONL / Parquet
+
+Đọc từng chunk từ cursor (không load cả bảng vào RAM), ghi ra file .part rồi
+rename khi xong → export 500k row vẫn dùng bộ nhớ cố định.
+"""
+import csv
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+ProgressCallback = Callable[[int, int], None]  # (rows_done, rows_total)
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def format_from_path(path: str) -> str:
+    """Đoán format theo đuôi file (mặc định csv)"""
+    ext = Path(path).suffix.lower().lstrip(".")
+    return ext if ext in EXPORT_FORMATS else "csv"
+
+
+def _write_csv(f_path: Path, columns: list[str], chunks: Iterable[list[tuple]], on_chunk):
+    with open(f_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            on_chunk(len(rows))
+
+
+def _write_jsonl(f_path: Path, columns: list[str], chunks: Iterable[list[tuple]], on_chunk):
+    with open(f_path, "w", encoding="utf-8") as f:
+        for rows in chunks:
+            f.writelines(
+                json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows
+            )
+            on_chunk(len(rows))
+
+
+def _write_parquet(f_path: Path, columns: list[str], chunks: Iterable[list[tuple]], on_chunk):
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("Export Parquet cần thư viện pyarrow (pip install pyarrow)")
+    # Mọi cột để string (nullable) → schema cố định giữa các chunk
+    schema = pa.schema([(c, pa.string()) for c in columns])
+    with pq.ParquetWriter(str(f_path), schema) as writer:
+        for rows in chunks:
+            data = {
+                c: [None if row[i] is None else str(row[i]) for row in rows]
+                for i, c in enumerate(columns)
+            }
+            writer.write_table(pa.Table.from_pydict(data, schema=schema))
+            on_chunk(len(rows))
+
+
+_WRITERS = {"csv": _write_csv, "jsonl": _write_jsonl, "parquet": _write_parquet}
+
+
+def write_export(path: str, fmt: str, columns: list[str], chunks: Iterable[list[tuple]],
+                 total: int, progress: Optional[ProgressCallback] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """Ghi các chunk row ra file. Trả về số row đã ghi.
+
+    Raise ExportCancelled nếu is_cancelled() trả True (file dở dang bị xóa).
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    target = Path(path)
+    part = target.with_name(target.name + ".part")
+    done = 0
+
+    def on_chunk(n):
+        nonlocal done
+        done += n
+        if progress:
+            progress(done, total)
+        if is_cancelled and is_cancelled():
+            raise ExportCancelled()
+
+    try:
+        _WRITERS[fmt](part, columns, chunks, on_chunk)
+        os.replace(part, target)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    return done
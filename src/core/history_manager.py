@@ -1,23 +1,142 @@
 """History Manager - SQLite storage for video & image history"""
 import sqlite3
+import hashlib
 import json
+import os
+import re
+from dataclasses import dataclass, field
 from pathlib import Path
-from datetime import datetime
-from typing import Optional
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, Optional
 from .models import VideoTask, VideoSettings, ImageTask, ImageSettings
 from .paths import data_path
+from .history_db import ConnectionManager
+from . import history_archive
+from .file_status import stat_output
+from .history_export import write_export, ProgressCallback
+from .result_cache import content_key
+
+
+_VIDEO_BASE_COLUMNS = """
+    id, account_email, prompt, aspect_ratio, video_length, resolution,
+    status, post_id, media_url, output_path, created_at, completed_at,
+    error_message, user_data_dir, cookies_hash
+"""
+
+_VIDEO_COLUMNS = _VIDEO_BASE_COLUMNS + ", file_exists, file_size, file_mtime"
+# Video đã tạo xong nhưng file output không còn (khớp partial index idx_video_history_missing)
+_MISSING_OUTPUT = ("status = 'completed' AND (output_path IS NULL OR output_path = '' OR file_exists = 0)")
+
+# File archive không theo dõi trạng thái file output
+_ARCHIVE_VIDEO_COLUMNS = _VIDEO_BASE_COLUMNS + ", NULL, NULL, NULL"
+
+_IMAGE_COLUMNS = """
+    id, account_email, prompt, num_images_requested, num_images_downloaded,
+    status, output_paths, output_dir, created_at, completed_at, error_message
+"""
+
+DEFAULT_PAGE_SIZE = 200
+
+# Cột chứa output của từng bảng (dùng cho filter has_output)
+_OUTPUT_COLUMN = {"video_history": "output_path", "image_history": "output_paths"}
+
+# Cột xuất ra khi export (không gồm cookies)
+_EXPORT_COLUMNS = {
+    "video": ["id", "account_email", "prompt", "aspect_ratio", "video_length", "resolution",
+              "status", "post_id", "media_url", "output_path", "created_at", "completed_at",
+              "error_message", "user_data_dir"],
+    "image": ["id", "account_email", "prompt", "num_images_requested", "num_images_downloaded",
+              "status", "output_paths", "output_dir", "created_at", "completed_at", "error_message"],
+}
+
+
+@dataclass
+class StatsBucket:
+    """Số liệu tổng hợp cho 1 nhóm (toàn bộ / 1 account / 1 ngày)"""
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    duration_sum: float = 0.0
+    duration_count: int = 0
+    
+    @property
+    def avg_duration(self) -> Optional[float]:
+        """Thời gian trung bình (giây) completed_at - created_at"""
+        return self.duration_sum / self.duration_count if self.duration_count else None
+
+
+@dataclass
+class HistoryStats:
+    overall: StatsBucket = field(default_factory=StatsBucket)
+    today: StatsBucket = field(default_factory=StatsBucket)
+    by_account: dict[str, StatsBucket] = field(default_factory=dict)
+    by_day: dict[str, StatsBucket] = field(default_factory=dict)  # "YYYY-MM-DD" → bucket
+
+
+def _cookies_key(cookies: dict) -> tuple[str, str]:
+    """(JSON chuẩn hóa, content hash) của cookie dict — cùng nội dung → cùng hash"""
+    cookies_json = json.dumps(cookies, sort_keys=True, separators=(",", ":"))
+    return cookies_json, hashlib.sha1(cookies_json.encode("utf-8")).hexdigest()
+
+
+def _fts_query(text: str) -> Optional[str]:
+    """Chuyển text người dùng gõ → FTS5 MATCH query.
+    
+    Mỗi cụm cách nhau bởi khoảng trắng → 1 phrase prefix (vd: "c@x.com" → "c x com"*),
+    các cụm AND với nhau.
+    """
+    phrases = []
+    for chunk in text.split():
+        tokens = re.findall(r"\w+", chunk, re.UNICODE)
+        if tokens:
+            phrases.append('"' + " ".join(tokens) + '"*')
+    return " ".join(phrases) or None
+
+
+def _json_list(raw: str) -> list:
+    """Cột output_paths (JSON list) → list, lỗi định dạng → []"""
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return []
+    return value if isinstance(value, list) else []
 
 
 class HistoryManager:
-    def __init__(self):
-        db = data_path("history.db")
+    def __init__(self, db_path: Optional[Path] = None, flush_interval: float = 0.2,
+                 archive_dir: Optional[Path] = None):
+        db = Path(db_path) if db_path else data_path("history.db")
         db.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(str(db))
-        self._create_table()
-        self._migrate_table()
+        self.db_path = db
+        self.archive_dir = Path(archive_dir) if archive_dir else db.parent / "history_archive"
+        self.db = ConnectionManager(db, flush_interval=flush_interval)
+        
+        conn = self.db.connect_schema()
+        try:
+            self._create_table(conn)
+            self._migrate_table(conn)
+            self._create_indexes(conn)
+            self._migrate_auto_vacuum(conn)
+        finally:
+            conn.close()
+        
+        # Mọi ghi đi qua writer thread (batch 1 transaction / flush_interval)
+        self.writer = self.db.writer
+        self._known_cookies: set[tuple[str, str]] = set()
+        self.db.start()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection read-only của thread đang gọi (an toàn khi gọi từ QThread)"""
+        return self.db.reader()
     
-    def _create_table(self):
-        self.conn.execute("""
+    def release_reader(self) -> None:
+        """Đóng connection đọc của thread đang gọi (cuối run() của QThread/worker)"""
+        self.db.release_reader()
+    
+    def _create_table(self, conn: sqlite3.Connection):
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS video_history (
                 id TEXT PRIMARY KEY,
                 account_email TEXT,
@@ -34,23 +153,40 @@ class HistoryManager:
                 error_message TEXT
             )
         """)
-        self.conn.commit()
+        conn.commit()
     
-    def _migrate_table(self):
+    def _migrate_table(self, conn: sqlite3.Connection):
         """Add new columns if they don't exist"""
-        cursor = self.conn.execute("PRAGMA table_info(video_history)")
+        cursor = conn.execute("PRAGMA table_info(video_history)")
         columns = [row[1] for row in cursor.fetchall()]
         
         if 'user_data_dir' not in columns:
-            self.conn.execute("ALTER TABLE video_history ADD COLUMN user_data_dir TEXT")
-            self.conn.commit()
+            conn.execute("ALTER TABLE video_history ADD COLUMN user_data_dir TEXT")
+            conn.commit()
         
         if 'account_cookies' not in columns:
-            self.conn.execute("ALTER TABLE video_history ADD COLUMN account_cookies TEXT")
-            self.conn.commit()
+            conn.execute("ALTER TABLE video_history ADD COLUMN account_cookies TEXT")
+            conn.commit()
+        
+        if 'cookies_hash' not in columns:
+            conn.execute("ALTER TABLE video_history ADD COLUMN cookies_hash TEXT")
+            conn.commit()
+        
+        # Cache trạng thái file output (cập nhật bởi watcher / reconcile scan)
+        for col, col_type in (("file_exists", "INTEGER"), ("file_size", "INTEGER"), ("file_mtime", "REAL")):
+            if col not in columns:
+                conn.execute(f"ALTER TABLE video_history ADD COLUMN {col} {col_type}")
+                conn.commit()
+        if 'content_key' not in columns:
+            conn.execute("ALTER TABLE video_history ADD COLUMN content_key TEXT")
+            conn.commit()
+        if 'file_sha256' not in columns:
+            conn.execute("ALTER TABLE video_history ADD COLUMN file_sha256 TEXT")
+            conn.commit()
+        self._migrate_cookies(conn)
         
         # Image history table
-        self.conn.execute("""
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS image_history (
                 id TEXT PRIMARY KEY,
                 account_email TEXT,
@@ -65,18 +201,234 @@ class HistoryManager:
                 error_message TEXT
             )
         """)
-        self.conn.commit()
+        image_columns = [row[1] for row in conn.execute("PRAGMA table_info(image_history)")]
+        for col, col_type in (("content_key", "TEXT"), ("file_size", "INTEGER"), ("file_sha256", "TEXT")):
+            if col not in image_columns:
+                conn.execute(f"ALTER TABLE image_history ADD COLUMN {col} {col_type}")
+        conn.commit()
+        
+        # created_at NULL phá keyset pagination (NULL không so sánh được) → chuẩn hóa về ''
+        conn.execute("UPDATE video_history SET created_at = '' WHERE created_at IS NULL")
+        conn.execute("UPDATE image_history SET created_at = '' WHERE created_at IS NULL")
+        conn.commit()
+        
+        # FTS5 index cho ô search (prompt + email), đồng bộ bằng trigger
+        for table in ("video_history", "image_history"):
+            self._migrate_fts(conn, table)
+        
+        self._migrate_stats(conn)
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS history_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        conn.commit()
+    
+    def _migrate_auto_vacuum(self, conn: sqlite3.Connection):
+        """Bật auto_vacuum=INCREMENTAL (DB cũ cần VACUUM 1 lần để đổi mode).
+        
+        VACUUM có thể đánh lại rowid → rebuild FTS (external content theo rowid).
+        """
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        for table in history_archive.ARCHIVE_TABLES:
+            conn.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        conn.commit()
+    
+    def _migrate_cookies(self, conn: sqlite3.Connection):
+        """Cookies tách sang bảng riêng (account, content hash); video_history chỉ giữ hash.
+        
+        Cột account_cookies cũ được chuyển sang bảng mới rồi set NULL.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS account_cookies (
+                account_email TEXT NOT NULL,
+                cookies_hash TEXT NOT NULL,
+                cookies TEXT NOT NULL,
+                PRIMARY KEY (account_email, cookies_hash)
+            )
+        """)
+        unique, refs = {}, []
+        cursor = conn.execute("""
+            SELECT rowid, coalesce(account_email, ''), account_cookies FROM video_history
+            WHERE account_cookies IS NOT NULL AND account_cookies != ''
+        """)
+        for rowid, email, raw in cursor:
+            try:
+                cookies_json, cookies_hash = _cookies_key(json.loads(raw))
+            except (ValueError, TypeError):
+                refs.append((None, rowid))
+                continue
+            unique[(email, cookies_hash)] = cookies_json
+            refs.append((cookies_hash, rowid))
+        if refs:
+            conn.executemany(
+                "INSERT OR IGNORE INTO account_cookies (account_email, cookies_hash, cookies) VALUES (?, ?, ?)",
+                [(email, h, c) for (email, h), c in unique.items()]
+            )
+            conn.executemany(
+                "UPDATE video_history SET cookies_hash = ?, account_cookies = NULL WHERE rowid = ?", refs
+            )
+            print(f"[History] Migrated cookies of {len(refs)} rows → {len(unique)} unique entries")
+        conn.commit()
+    
+    def _migrate_fts(self, conn: sqlite3.Connection, table: str):
+        fts = f"{table}_fts"
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+        ).fetchone()
+        conn.executescript(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                prompt, account_email,
+                content='{table}', content_rowid='rowid',
+                tokenize='{history_archive.FTS_TOKENIZE}'
+            );
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, prompt, account_email)
+                VALUES (new.rowid, new.prompt, new.account_email);
+            END;
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, prompt, account_email)
+                VALUES ('delete', old.rowid, old.prompt, old.account_email);
+            END;
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_au
+            AFTER UPDATE OF prompt, account_email ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, prompt, account_email)
+                VALUES ('delete', old.rowid, old.prompt, old.account_email);
+                INSERT INTO {fts}(rowid, prompt, account_email)
+                VALUES (new.rowid, new.prompt, new.account_email);
+            END;
+        """)
+        if not exists:
+            # Lần đầu tạo FTS → index toàn bộ row cũ
+            conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        conn.commit()
+    
+    def _migrate_stats(self, conn: sqlite3.Connection):
+        """Bảng counter (kind, ngày, account, status) cập nhật bằng trigger trong cùng
+        transaction với insert/update/delete → stats không phải quét history.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'history_stats'"
+        ).fetchone()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS history_stats (
+                kind TEXT NOT NULL,
+                day TEXT NOT NULL,
+                account_email TEXT NOT NULL,
+                status TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                duration_sum REAL NOT NULL DEFAULT 0,
+                duration_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (kind, day, account_email, status)
+            )
+        """)
+        for kind, table in (("video", "video_history"), ("image", "image_history")):
+            key = {
+                r: (f"substr(coalesce({r}.created_at, ''), 1, 10), "
+                    f"coalesce({r}.account_email, ''), coalesce({r}.status, '')")
+                for r in ("new", "old")
+            }
+            duration = {
+                r: (f"CASE WHEN {r}.completed_at != '' AND {r}.created_at != '' "
+                    f"THEN (julianday({r}.completed_at) - julianday({r}.created_at)) * 86400 END")
+                for r in ("new", "old")
+            }
+            increment = f"""
+                INSERT INTO history_stats
+                    (kind, day, account_email, status, count, duration_sum, duration_count)
+                VALUES ('{kind}', {key['new']}, 1,
+                        coalesce({duration['new']}, 0), ({duration['new']}) IS NOT NULL)
+                ON CONFLICT (kind, day, account_email, status) DO UPDATE SET
+                    count = count + 1,
+                    duration_sum = duration_sum + excluded.duration_sum,
+                    duration_count = duration_count + excluded.duration_count;
+            """
+            decrement = f"""
+                UPDATE history_stats SET
+                    count = count - 1,
+                    duration_sum = duration_sum - coalesce({duration['old']}, 0),
+                    duration_count = duration_count - (({duration['old']}) IS NOT NULL)
+                WHERE (kind, day, account_email, status) = ('{kind}', {key['old']});
+                DELETE FROM history_stats
+                WHERE (kind, day, account_email, status) = ('{kind}', {key['old']}) AND count <= 0;
+            """
+            conn.executescript(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_stats_ai AFTER INSERT ON {table} BEGIN
+                    {increment}
+                END;
+                CREATE TRIGGER IF NOT EXISTS {table}_stats_ad AFTER DELETE ON {table} BEGIN
+                    {decrement}
+                END;
+                CREATE TRIGGER IF NOT EXISTS {table}_stats_au
+                AFTER UPDATE OF account_email, status, created_at, completed_at ON {table} BEGIN
+                    {decrement}
+                    {increment}
+                END;
+            """)
+            if not exists:
+                # Lần đầu → dựng counter từ dữ liệu cũ
+                duration_row = duration['new'].replace("new.", "")
+                conn.execute(f"""
+                    INSERT INTO history_stats
+                        (kind, day, account_email, status, count, duration_sum, duration_count)
+                    SELECT '{kind}', substr(coalesce(created_at, ''), 1, 10),
+                           coalesce(account_email, ''), coalesce(status, ''), COUNT(*),
+                           coalesce(SUM({duration_row}), 0), COUNT({duration_row})
+                    FROM {table} GROUP BY 2, 3, 4
+                """)
+        conn.commit()
+    
+    def _create_indexes(self, conn: sqlite3.Connection):
+        """Index cho các cột filter/sort của History tab"""
+        conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_video_history_created
+                ON video_history(created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_video_history_status
+                ON video_history(status, created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_video_history_account
+                ON video_history(account_email, created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_video_history_output
+                ON video_history(output_path);
+            CREATE INDEX IF NOT EXISTS idx_image_history_created
+                ON image_history(created_at, id);
+            CREATE INDEX IF NOT EXISTS idx_video_history_content
+                ON video_history(content_key);
+            CREATE INDEX IF NOT EXISTS idx_image_history_content
+                ON image_history(content_key);
+        """)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_video_history_missing "
+                     f"ON video_history(created_at, id) WHERE {_MISSING_OUTPUT}")
+        conn.commit()
     
     def add_history(self, task: VideoTask) -> None:
-        # Serialize cookies to JSON
-        cookies_json = json.dumps(task.account_cookies) if task.account_cookies else None
+        # Cookies lưu 1 lần / (account, nội dung) — row history chỉ giữ hash
+        cookies_hash = None
+        if task.account_cookies:
+            cookies_json, cookies_hash = _cookies_key(task.account_cookies)
+            key = (task.account_email or "", cookies_hash)
+            if key not in self._known_cookies:
+                self.writer.submit(
+                    "INSERT OR IGNORE INTO account_cookies (account_email, cookies_hash, cookies) VALUES (?, ?, ?)",
+                    (*key, cookies_json)
+                )
+                self._known_cookies.add(key)
+        
+        file_status = stat_output(task.output_path) if task.output_path else (None, None, None)
+        if task.status == "completed" and task.content_key is None and task.settings:
+            task.content_key = content_key(task.prompt, task.settings, task.image_path)
         
-        self.conn.execute("""
+        self.writer.submit("""
             INSERT OR REPLACE INTO video_history 
             (id, account_email, prompt, aspect_ratio, video_length, resolution, 
              status, post_id, media_url, output_path, created_at, completed_at, 
-             error_message, user_data_dir, account_cookies)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             error_message, user_data_dir, cookies_hash,
+             file_exists, file_size, file_mtime, content_key, file_sha256)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             task.id,
             task.account_email,
@@ -88,77 +440,387 @@ class HistoryManager:
             task.post_id,
             task.media_url,
             task.output_path,
-            task.created_at.isoformat() if task.created_at else None,
+            task.created_at.isoformat() if task.created_at else "",
             task.completed_at.isoformat() if task.completed_at else None,
             task.error_message,
             task.user_data_dir,
-            cookies_json
+            cookies_hash,
+            *file_status,
+            task.content_key,
+            task.file_sha256,
         ))
-        self.conn.commit()
+    
+    @staticmethod
+    def _row_to_task(row) -> VideoTask:
+        # Cookies không load ở đây — dùng get_task_cookies() khi thật sự cần (download)
+        return VideoTask(
+            id=row[0],
+            account_email=row[1],
+            prompt=row[2],
+            settings=VideoSettings(
+                aspect_ratio=row[3],
+                video_length=row[4],
+                resolution=row[5]
+            ),
+            status=row[6],
+            post_id=row[7],
+            media_url=row[8],
+            output_path=row[9],
+            created_at=datetime.fromisoformat(row[10]) if row[10] else None,
+            completed_at=datetime.fromisoformat(row[11]) if row[11] else None,
+            error_message=row[12],
+            user_data_dir=row[13] if len(row) > 13 else None,
+            file_exists=bool(row[15]) if len(row) > 15 and row[15] is not None else None,
+            file_size=row[16] if len(row) > 16 else None,
+            file_mtime=row[17] if len(row) > 17 else None,
+        )
     
     def get_all_history(self) -> list[VideoTask]:
-        cursor = self.conn.execute("""
-            SELECT id, account_email, prompt, aspect_ratio, video_length, resolution,
-                   status, post_id, media_url, output_path, created_at, completed_at,
-                   error_message, user_data_dir, account_cookies
-            FROM video_history ORDER BY created_at DESC
+        cursor = self.conn.execute(f"""
+            SELECT {_VIDEO_COLUMNS}
+            FROM video_history ORDER BY created_at DESC, id DESC
         """)
-        tasks = []
-        for row in cursor.fetchall():
-            # Parse cookies from JSON
-            cookies = None
-            if len(row) > 14 and row[14]:
-                try:
-                    cookies = json.loads(row[14])
-                except:
-                    pass
-            
-            task = VideoTask(
-                id=row[0],
-                account_email=row[1],
-                prompt=row[2],
-                settings=VideoSettings(
-                    aspect_ratio=row[3],
-                    video_length=row[4],
-                    resolution=row[5]
-                ),
-                status=row[6],
-                post_id=row[7],
-                media_url=row[8],
-                output_path=row[9],
-                created_at=datetime.fromisoformat(row[10]) if row[10] else None,
-                completed_at=datetime.fromisoformat(row[11]) if row[11] else None,
-                error_message=row[12],
-                user_data_dir=row[13] if len(row) > 13 else None,
-                account_cookies=cookies
+        return [self._row_to_task(row) for row in cursor.fetchall()]
+    
+    def get_history(self, task_id: str) -> Optional[VideoTask]:
+        """Lấy 1 video task theo id"""
+        row = self.conn.execute(
+            f"SELECT {_VIDEO_COLUMNS} FROM video_history WHERE id = ?", (task_id,)
+        ).fetchone()
+        return self._row_to_task(row) if row else None
+    
+    def get_task_cookies(self, task_id: str) -> Optional[dict]:
+        """Load cookies của 1 video task (lazy, chỉ khi cần download lại)"""
+        row = self.conn.execute("""
+            SELECT c.cookies FROM video_history v
+            JOIN account_cookies c
+              ON c.account_email = coalesce(v.account_email, '') AND c.cookies_hash = v.cookies_hash
+            WHERE v.id = ?
+        """, (task_id,)).fetchone()
+        if not row:
+            return None
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _build_filters(status: Optional[str] = None,
+                       account_email: Optional[str] = None,
+                       date_from: Optional[datetime] = None,
+                       date_to: Optional[datetime] = None,
+                       has_output: Optional[bool] = None,
+                       text: Optional[str] = None,
+                       table: str = "video_history") -> tuple[list[str], list]:
+        """Build WHERE clauses (đều dùng được index) cho query_history / count_history / search"""
+        where, params = [], []
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if account_email:
+            where.append("account_email = ?")
+            params.append(account_email)
+        if date_from:
+            where.append("created_at >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            where.append("created_at < ?")
+            params.append(date_to.isoformat())
+        output_col = _OUTPUT_COLUMN[table]
+        if has_output is True:
+            where.append(f"{output_col} IS NOT NULL AND {output_col} NOT IN ('', '[]')")
+        elif has_output is False:
+            where.append(f"({output_col} IS NULL OR {output_col} IN ('', '[]'))")
+        if text:
+            match = _fts_query(text)
+            if match is None:
+                where.append("0")
+            else:
+                where.append(f"rowid IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)")
+                params.append(match)
+        return where, params
+    
+    def query_history(self, limit: int = DEFAULT_PAGE_SIZE,
+                      after: Optional[tuple[str, str]] = None,
+                      descending: bool = True,
+                      **filters) -> tuple[list[VideoTask], Optional[tuple[str, str]]]:
+        """Keyset pagination trên (created_at, id).
+        
+        filters: status, account_email, date_from, date_to, has_output, text.
+        after: cursor trả về từ lần gọi trước (None = trang đầu).
+        Trả về (tasks, next_cursor) — next_cursor None khi hết dữ liệu.
+        """
+        where, params = self._build_filters(**filters)
+        if after:
+            op = "<" if descending else ">"
+            where.append(f"(created_at {op} ? OR (created_at = ? AND id {op} ?))")
+            params.extend([after[0], after[0], after[1]])
+        direction = "DESC" if descending else "ASC"
+        sql = f"SELECT {_VIDEO_COLUMNS} FROM video_history"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY created_at {direction}, id {direction} LIMIT ?"
+        params.append(limit + 1)
+        
+        rows = self.conn.execute(sql, params).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        tasks = [self._row_to_task(row) for row in rows]
+        next_cursor = (rows[-1][10], rows[-1][0]) if has_more and rows else None
+        return tasks, next_cursor
+    
+    def iter_history(self, batch_size: int = 1000, descending: bool = True,
+                     **filters) -> Iterator[VideoTask]:
+        """Duyệt toàn bộ history theo từng trang, không load hết vào RAM"""
+        cursor = None
+        while True:
+            tasks, cursor = self.query_history(
+                limit=batch_size, after=cursor, descending=descending, **filters
             )
-            tasks.append(task)
-        return tasks
-    
-    def delete_history(self, task_id: str) -> bool:
-        cursor = self.conn.execute("DELETE FROM video_history WHERE id = ?", (task_id,))
-        self.conn.commit()
-        return cursor.rowcount > 0
-    
-    def update_output_path(self, task_id: str, output_path: str) -> bool:
-        """Cập nhật output_path sau khi download xong"""
-        cursor = self.conn.execute(
-            "UPDATE video_history SET output_path = ? WHERE id = ?", 
-            (output_path, task_id)
+            yield from tasks
+            if cursor is None:
+                return
+    
+    def iter_missing_downloads(self, batch_size: int = 500) -> Iterator[list[VideoTask]]:
+        """Các video cần tải lại (file mất / chưa tải, có post_id hoặc media_url), theo từng trang.
+        
+        Lọc trong SQL qua partial index → không quét cả bảng; gọi từ worker thread.
+        """
+        sql = (f"SELECT {_VIDEO_COLUMNS} FROM video_history INDEXED BY idx_video_history_missing "
+               f"WHERE {_MISSING_OUTPUT} "
+               "AND (COALESCE(post_id, '') != '' OR COALESCE(media_url, '') != '') "
+               "AND (created_at < ? OR (created_at = ? AND id < ?)) "
+               "ORDER BY created_at DESC, id DESC LIMIT ?")
+        cursor = ("\uffff", "\uffff", "\uffff")
+        while True:
+            rows = self.conn.execute(sql, (*cursor, batch_size)).fetchall()
+            if not rows:
+                return
+            yield [self._row_to_task(row) for row in rows]
+            if len(rows) < batch_size:
+                return
+            cursor = (rows[-1][10], rows[-1][10], rows[-1][0])
+    
+    def count_history(self, kind: str = "video", **filters) -> int:
+        """Đếm số record khớp filter (cùng tham số với query_history)"""
+        table = "video_history" if kind == "video" else "image_history"
+        where, params = self._build_filters(table=table, **filters)
+        sql = f"SELECT COUNT(*) FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self.conn.execute(sql, params).fetchone()[0]
+    
+    def iter_rows(self, kind: str = "video", chunk_size: int = 1000,
+                  **filters) -> Iterator[list[tuple]]:
+        """Stream raw row (cột theo _EXPORT_COLUMNS) từng chunk từ 1 cursor.
+        
+        Chạy trên reader của thread gọi → dùng được từ export thread.
+        """
+        table = "video_history" if kind == "video" else "image_history"
+        where, params = self._build_filters(table=table, **filters)
+        sql = f"SELECT {', '.join(_EXPORT_COLUMNS[kind])} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC"
+        cursor = self.conn.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+    
+    def export(self, path: str, fmt: str, kind: str = "video",
+               progress: Optional[ProgressCallback] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None,
+               chunk_size: int = 1000, **filters) -> int:
+        """Export history ra CSV / JSONL / Parquet, stream theo chunk. Trả về số row."""
+        total = self.count_history(kind=kind, **filters)
+        return write_export(
+            path, fmt, _EXPORT_COLUMNS[kind],
+            self.iter_rows(kind=kind, chunk_size=chunk_size, **filters),
+            total, progress=progress, is_cancelled=is_cancelled,
+        )
+    
+    def search(self, text: str, kind: str = "video", limit: int = DEFAULT_PAGE_SIZE,
+               offset: int = 0, **filters) -> tuple[list, Optional[int]]:
+        """Full-text search prompt/email qua FTS5, xếp theo độ liên quan (bm25).
+        
+        kind: "video" → list[VideoTask], "image" → list[ImageTask].
+        filters: như query_history (trừ text).
+        Trả về (tasks, next_offset) — next_offset None khi hết kết quả.
+        """
+        table = "video_history" if kind == "video" else "image_history"
+        columns, to_task = ((_VIDEO_COLUMNS, self._row_to_task) if kind == "video"
+                            else (_IMAGE_COLUMNS, self._row_to_image_task))
+        match = _fts_query(text)
+        if match is None:
+            return [], None
+        sql, params = self._search_sql(table, columns, match, filters)
+        rows = self.conn.execute(sql, [*params, limit + 1, offset]).fetchall()
+        next_offset = offset + limit if len(rows) > limit else None
+        return [to_task(row) for row in rows[:limit]], next_offset
+    
+    def _search_sql(self, table: str, columns: str, match: str, filters: dict) -> tuple[str, list]:
+        """SQL search FTS (cột cuối = rank), chờ thêm tham số LIMIT, OFFSET"""
+        where, params = self._build_filters(table=table, **filters)
+        sql = f"""
+            SELECT {columns}, f.rank FROM (
+                SELECT rowid AS fts_rowid, rank FROM {table}_fts WHERE {table}_fts MATCH ?
+            ) AS f JOIN {table} ON {table}.rowid = f.fts_rowid
+        """
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY f.rank, created_at DESC LIMIT ? OFFSET ?"
+        return sql, [match, *params]
+    
+    # ==================== Archive & maintenance ====================
+    
+    def list_archives(self) -> list[tuple[str, Path]]:
+        """[(month "YYYY-MM", path)] các file archive, mới nhất trước"""
+        return history_archive.list_archives(self.archive_dir)
+    
+    def search_archives(self, text: str, kind: str = "video", limit: int = DEFAULT_PAGE_SIZE,
+                        offset: int = 0, **filters) -> tuple[list, Optional[int]]:
+        """Search FTS trên các file archive (mở read-only khi cần), gộp theo rank."""
+        table = "video_history" if kind == "video" else "image_history"
+        columns, to_task = ((_ARCHIVE_VIDEO_COLUMNS, self._row_to_task) if kind == "video"
+                            else (_IMAGE_COLUMNS, self._row_to_image_task))
+        match = _fts_query(text)
+        if match is None:
+            return [], None
+        sql, params = self._search_sql(table, columns, match, filters)
+        rows = []
+        for _, path in self.list_archives():
+            conn = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True)
+            try:
+                rows.extend(conn.execute(sql, [*params, offset + limit + 1, 0]).fetchall())
+            except sqlite3.Error as e:
+                print(f"[History] Archive search failed ({path.name}): {e}")
+            finally:
+                conn.close()
+        rows.sort(key=lambda row: row[-1])
+        page = rows[offset:offset + limit]
+        next_offset = offset + limit if len(rows) > offset + limit else None
+        return [to_task(row) for row in page], next_offset
+    
+    def get_setting(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM history_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+    
+    def set_setting(self, key: str, value: str) -> None:
+        self.writer.submit(
+            "INSERT OR REPLACE INTO history_meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+    
+    def run_maintenance(self, archive_after_days: Optional[int] = None,
+                        vacuum_pages: int = 1000) -> Future:
+        """Archive row cũ hơn N ngày (mặc định theo setting archive_after_days, 0 = tắt)
+        rồi chạy 1 bước incremental vacuum — chạy trên writer thread, trả về Future
+        với {"archived": {month: rows}, "vacuumed_pages": n}.
+        """
+        if archive_after_days is None:
+            archive_after_days = int(self.get_setting("archive_after_days", "0") or 0)
+        cutoff = datetime.now() - timedelta(days=archive_after_days) if archive_after_days > 0 else None
+        archive_dir = self.archive_dir
+        
+        def maintenance(conn):
+            archived = {}
+            if cutoff:
+                archived = history_archive.archive_older_than(conn, archive_dir, cutoff)
+            return {
+                "archived": archived,
+                "vacuumed_pages": history_archive.incremental_vacuum(conn, vacuum_pages),
+            }
+        
+        return self.writer.submit_call(maintenance)
+    
+    def delete_history(self, task_id: str) -> None:
+        self.writer.submit("DELETE FROM video_history WHERE id = ?", (task_id,))
+    
+    def update_output_path(self, task_id: str, output_path: str, sha256: Optional[str] = None) -> None:
+        """Cập nhật output_path (+ hash nếu có) sau khi download xong"""
+        self.writer.submit(
+            "UPDATE video_history SET output_path = ?, file_exists = ?, file_size = ?, file_mtime = ?, "
+            "file_sha256 = ? WHERE id = ?", 
+            (output_path, *stat_output(output_path), sha256, task_id)
         )
-        self.conn.commit()
-        return cursor.rowcount > 0
+    
+    def iter_file_status(self, prefix: Optional[str] = None,
+                         chunk_size: int = 500) -> Iterator[list[tuple]]:
+        """Stream (id, output_path, file_exists, file_size, file_mtime) của các row có output.
+        
+        prefix: chỉ lấy output nằm trong thư mục này (range scan trên index output_path).
+        """
+        sql = ("SELECT id, output_path, file_exists, file_size, file_mtime FROM video_history "
+               "WHERE output_path IS NOT NULL AND output_path != ''")
+        params = []
+        if prefix:
+            # Range [prefix/, prefix0) ~ LIKE 'prefix/%' nhưng dùng được index
+            low = prefix.rstrip("/\\") + os.sep
+            sql += " AND output_path >= ? AND output_path < ?"
+            params = [low, low[:-1] + chr(ord(os.sep) + 1)]
+        cursor = self.conn.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+    
+    def set_file_status(self, updates: list[tuple[str, bool, Optional[int], Optional[float]]]) -> None:
+        """Ghi cache trạng thái file: [(task_id, exists, size, mtime)]"""
+        for task_id, exists, size, mtime in updates:
+            self.writer.submit(
+                "UPDATE video_history SET file_exists = ?, file_size = ?, file_mtime = ? WHERE id = ?",
+                (int(exists), size, mtime, task_id)
+            )
+    
+    def get_stats(self, kind: str = "video") -> HistoryStats:
+        """Stats tổng / hôm nay / theo account / theo ngày, đọc từ bảng counter
+        (kích thước ~ số ngày × số account, không phụ thuộc số record history).
+        """
+        stats = HistoryStats()
+        today = datetime.now().date().isoformat()
+        rows = self.conn.execute("""
+            SELECT day, account_email, status, count, duration_sum, duration_count
+            FROM history_stats WHERE kind = ?
+        """, (kind,)).fetchall()
+        for day, email, status, count, duration_sum, duration_count in rows:
+            buckets = [
+                stats.overall,
+                stats.by_account.setdefault(email, StatsBucket()),
+                stats.by_day.setdefault(day, StatsBucket()),
+            ]
+            if day == today:
+                buckets.append(stats.today)
+            for bucket in buckets:
+                bucket.total += count
+                if status == "completed":
+                    bucket.completed += count
+                elif status == "failed":
+                    bucket.failed += count
+                bucket.duration_sum += duration_sum
+                bucket.duration_count += duration_count
+        return stats
     
     # ==================== Image History ====================
     
     def add_image_history(self, task: ImageTask) -> None:
         """Lưu image task vào history."""
         paths_json = json.dumps(task.output_paths) if task.output_paths else None
-        self.conn.execute("""
+        if task.status == "completed" and task.content_key is None and task.settings:
+            task.content_key = content_key(task.prompt, task.settings)
+        self.writer.submit("""
             INSERT OR REPLACE INTO image_history
             (id, account_email, prompt, num_images_requested, num_images_downloaded,
-             status, output_paths, output_dir, created_at, completed_at, error_message)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+             status, output_paths, output_dir, created_at, completed_at, error_message,
+             content_key, file_size, file_sha256)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             task.id,
             task.account_email,
@@ -168,47 +830,83 @@ class HistoryManager:
             task.status,
             paths_json,
             task.output_dir,
-            task.created_at.isoformat() if task.created_at else None,
+            task.created_at.isoformat() if task.created_at else "",
             task.completed_at.isoformat() if task.completed_at else None,
             task.error_message,
+            task.content_key,
+            task.file_size,
+            task.file_sha256,
         ))
-        self.conn.commit()
+    
+    @staticmethod
+    def _row_to_image_task(row) -> ImageTask:
+        paths = []
+        if row[6]:
+            try:
+                paths = json.loads(row[6])
+            except:
+                pass
+        return ImageTask(
+            id=row[0],
+            account_email=row[1],
+            prompt=row[2],
+            num_images_requested=row[3] or 4,
+            num_images_downloaded=row[4] or 0,
+            status=row[5],
+            output_paths=paths,
+            output_dir=row[7],
+            created_at=datetime.fromisoformat(row[8]) if row[8] else None,
+            completed_at=datetime.fromisoformat(row[9]) if row[9] else None,
+            error_message=row[10],
+        )
     
     def get_all_image_history(self) -> list[ImageTask]:
         """Lấy tất cả image history."""
-        cursor = self.conn.execute("""
-            SELECT id, account_email, prompt, num_images_requested, num_images_downloaded,
-                   status, output_paths, output_dir, created_at, completed_at, error_message
-            FROM image_history ORDER BY created_at DESC
+        cursor = self.conn.execute(f"""
+            SELECT {_IMAGE_COLUMNS}
+            FROM image_history ORDER BY created_at DESC, id DESC
         """)
-        tasks = []
-        for row in cursor.fetchall():
-            paths = []
-            if row[6]:
-                try:
-                    paths = json.loads(row[6])
-                except:
-                    pass
-            task = ImageTask(
-                id=row[0],
-                account_email=row[1],
-                prompt=row[2],
-                num_images_requested=row[3] or 4,
-                num_images_downloaded=row[4] or 0,
-                status=row[5],
-                output_paths=paths,
-                output_dir=row[7],
-                created_at=datetime.fromisoformat(row[8]) if row[8] else None,
-                completed_at=datetime.fromisoformat(row[9]) if row[9] else None,
-                error_message=row[10],
-            )
-            tasks.append(task)
-        return tasks
+        return [self._row_to_image_task(row) for row in cursor.fetchall()]
+    
+    def delete_image_history(self, task_id: str) -> None:
+        self.writer.submit("DELETE FROM image_history WHERE id = ?", (task_id,))
+    
+    # ==================== Result reuse ====================
+    
+    def find_reusable(self, keys: list[str], kind: str = "video",
+                      chunk_size: int = 500) -> dict[str, tuple[str, Optional[str]]]:
+        """content_key → (output còn tồn tại, post_id) của kết quả completed mới nhất"""
+        if kind == "video":
+            sql = ("SELECT content_key, output_path, post_id FROM video_history"
+                   " WHERE status = 'completed' AND content_key IN ({})"
+                   " ORDER BY completed_at DESC")
+        else:
+            sql = ("SELECT content_key, output_paths, NULL FROM image_history"
+                   " WHERE status = 'completed' AND content_key IN ({})"
+                   " ORDER BY completed_at DESC")
+        wanted = list(dict.fromkeys(k for k in keys if k))
+        found: dict[str, tuple[str, Optional[str]]] = {}
+        for i in range(0, len(wanted), chunk_size):
+            chunk = wanted[i:i + chunk_size]
+            rows = self.conn.execute(sql.format(", ".join("?" * len(chunk))), chunk).fetchall()
+            for key, output, post_id in rows:
+                if key in found or not output:
+                    continue
+                paths = [output] if kind == "video" else _json_list(output)
+                path = next((p for p in paths if os.path.isfile(p)), None)
+                if path:
+                    found[key] = (path, post_id)
+        return found
+    
+    # ==================== Write-behind ====================
+    
+    def add_flush_listener(self, callback: Callable[[], None]) -> None:
+        """callback() chạy trên writer thread sau mỗi lần commit batch"""
+        self.writer.add_listener(callback)
     
-    def delete_image_history(self, task_id: str) -> bool:
-        cursor = self.conn.execute("DELETE FROM image_history WHERE id = ?", (task_id,))
-        self.conn.commit()
-        return cursor.rowcount > 0
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Chờ mọi ghi đang queue được commit (gọi trước khi đọc lại / khi tắt app)"""
+        return self.writer.flush(timeout)
     
     def close(self):
-        self.conn.close()
+        self.db.close(timeout=10)
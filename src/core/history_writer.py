@@ -0,0 +1,160 @@
+"""History Writer - write-behind thread cho history.db
+
+Mọi mutation (add/update/delete) được đẩy vào queue, thread này gom lại và
+commit 1 transaction mỗi flush interval → burst completion từ nhiều worker
+không block GUI và không tranh nhau connection.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Optional
+
+_STOP = object()
+
+
+class _ExclusiveCall:
+    """fn(conn) chạy trên writer thread, ngoài transaction batch (ATTACH, VACUUM...)"""
+    def __init__(self, fn: Callable[[sqlite3.Connection], object]):
+        self.fn = fn
+        self.future: Future = Future()
+
+
+class HistoryWriter(threading.Thread):
+    def __init__(self, db_path: Path, flush_interval: float = 0.2):
+        super().__init__(name="HistoryWriter", daemon=True)
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._listeners: list[Callable[[], None]] = []
+        self._ready = threading.Event()
+        self._error: Optional[Exception] = None
+
+    def start(self):
+        super().start()
+        # Chờ connection mở xong để lỗi mở DB lộ ra ngay
+        self._ready.wait()
+        if self._error:
+            raise self._error
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        # INSERT OR REPLACE chỉ gọi DELETE trigger (đồng bộ FTS) khi bật recursive_triggers
+        conn.execute("PRAGMA recursive_triggers = ON")
+        return conn
+
+    def submit(self, sql: str, params=()) -> None:
+        """Đưa 1 câu lệnh ghi vào queue (không chờ commit)"""
+        self._queue.put((sql, params))
+
+    def submit_call(self, fn: Callable[[sqlite3.Connection], object]) -> Future:
+        """Chạy fn(conn) trên writer connection sau khi commit các ghi đang chờ.
+        
+        conn ở autocommit mode — fn tự BEGIN/COMMIT nếu cần. Trả về Future với kết quả.
+        """
+        call = _ExclusiveCall(fn)
+        self._queue.put(call)
+        return call.future
+    
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """callback() được gọi (trên writer thread) sau mỗi lần commit"""
+        self._listeners.append(callback)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block tới khi mọi mutation đã queue trước đó được commit"""
+        if not self.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush phần còn lại rồi dừng thread"""
+        if self.is_alive():
+            self._queue.put(_STOP)
+            self.join(timeout)
+
+    def run(self):
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            stopping = False
+            while not stopping:
+                batch, waiters, call = [], [], None
+                item = self._queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    if isinstance(item, threading.Event):
+                        # flush() → commit ngay, không chờ hết interval
+                        waiters.append(item)
+                        break
+                    if isinstance(item, _ExclusiveCall):
+                        call = item
+                        break
+                    batch.append(item)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self._write_batch(conn, batch)
+                    self._notify()
+                for event in waiters:
+                    event.set()
+                if call is not None:
+                    self._run_call(conn, call)
+        finally:
+            conn.close()
+
+    def _run_call(self, conn: sqlite3.Connection, call: _ExclusiveCall) -> None:
+        if not call.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = call.fn(conn)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            call.future.set_exception(e)
+            return
+        call.future.set_result(result)
+        self._notify()
+
+    def _notify(self) -> None:
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[HistoryWriter] Listener error: {e}")
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list) -> None:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql, params in batch:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"[HistoryWriter] Batch of {len(batch)} failed ({e}), retrying one by one")
+            # 1 câu lỗi không được làm mất cả batch
+            for sql, params in batch:
+                try:
+                    conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    print(f"[HistoryWriter] Write failed: {e}")
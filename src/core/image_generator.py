@@ -12,12 +12,14 @@ import asyncio
 import time
 import re
 import os
-import base64
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Callable, Dict, Any, List, Tuple
 
 from .models import Account, ImageSettings, ImageTask
+from .progress import ProgressCallback, ProgressReporter, Stage
+from .download_sink import DownloadResult
+from .image_io import PlaceholderImage, shared_image_saver
 from .cf_solver import (
     CloudflareSolver, CF_SOLVER_AVAILABLE,
     get_chrome_user_agent
@@ -46,12 +48,15 @@ class MultiTabImageGenerator:
         account: Account,
         num_tabs: int = 3,
         headless: bool = True,
-        on_status: Optional[Callable] = None
+        on_status: Optional[Callable] = None,
+        on_progress: Optional[ProgressCallback] = None
     ):
         self.account = account
         self.num_tabs = num_tabs
         self.headless = headless
         self.on_status = on_status
+        self.on_progress = on_progress
+        self._tab_reporters: Dict[int, ProgressReporter] = {}  # tab_id -> task đang chạy
 
         self.browser: Optional[zendriver.Browser] = None
         self.tabs: List[Any] = []
@@ -68,6 +73,12 @@ class MultiTabImageGenerator:
         if self.on_status:
             self.on_status(self.account.email, full_msg)
 
+    def _progress(self, tab_id: int, stage: Stage, percent: Optional[int] = None, message: str = "", result=None):
+        """Phát ProgressEvent cho task đang chạy trên tab (nếu được gắn task_id)"""
+        reporter = self._tab_reporters.get(tab_id)
+        if reporter:
+            reporter(stage, percent, message, result)
+
     # ==================== Browser Lifecycle ====================
 
     async def start(self) -> bool:
@@ -456,7 +467,8 @@ class MultiTabImageGenerator:
         settings: ImageSettings,
         output_dir: str,
         retry_count: int = 0,
-        custom_filename: str = None
+        custom_filename: str = None,
+        task_id: Optional[str] = None
     ) -> ImageTask:
         """
         Generate 1 image on a specific tab.
@@ -469,8 +481,17 @@ class MultiTabImageGenerator:
         
         Args:
             custom_filename: Custom filename prefix (without extension), e.g. "1_prompt_text"
+            task_id: Id do caller cấp → ProgressEvent (caller tự phát COMPLETED/FAILED)
         """
         MAX_RETRIES = 3
+        if task_id is not None:
+            self._tab_reporters[tab_id] = ProgressReporter(self.on_progress, task_id, self.account.email)
+            self._progress(tab_id, Stage.STARTED)
+        elif retry_count:
+            self._progress(tab_id, Stage.RETRYING, message=f"{retry_count}/{MAX_RETRIES}")
+        else:
+            # Task mới không gắn id → không phát event dưới id của task trước trên tab này
+            self._tab_reporters.pop(tab_id, None)
 
         task = ImageTask(
             account_email=self.account.email,
@@ -502,6 +523,7 @@ class MultiTabImageGenerator:
 
             # Enter prompt (Image mode is default)
             self._log(f"✏️ Nhập prompt: {prompt[:40]}...", tab_id)
+            self._progress(tab_id, Stage.CREATING_POST)
             if not await self._enter_prompt_on_tab(tab, prompt, tab_id):
                 if retry_count < MAX_RETRIES:
                     self._log("⚠️ Lỗi nhập prompt, thử lại...", tab_id)
@@ -522,6 +544,7 @@ class MultiTabImageGenerator:
 
             # Wait for first image ready
             self._log("⏳ Đang tạo ảnh...", tab_id)
+            self._progress(tab_id, Stage.RENDERING)
             image_data = await self._wait_for_first_image(tab, tab_id, timeout=90)
 
             if not image_data:
@@ -537,11 +560,15 @@ class MultiTabImageGenerator:
 
             # Download 1 image
             self._log("📥 Đang tải ảnh...", tab_id)
+            self._progress(tab_id, Stage.DOWNLOADING)
             downloaded = await self._download_images([image_data], prompt, output_dir, tab_id, custom_filename=custom_filename)
 
             # Finalize task
-            task.output_paths = downloaded
+            task.output_paths = [d.path for d in downloaded]
             task.num_images_downloaded = len(downloaded)
+            if downloaded:
+                task.file_size = downloaded[0].size
+                task.file_sha256 = downloaded[0].sha256
 
             if downloaded:
                 task.status = "completed"
@@ -757,18 +784,23 @@ class MultiTabImageGenerator:
         tab_id: int,
         start_idx: int = 0,
         custom_filename: str = None
-    ) -> List[str]:
+    ) -> List[DownloadResult]:
         """
         Download images từ base64 src hoặc URL.
         
+        Decode base64 / tải URL / ghi file chạy trên thread pool của image_io
+        (không chặn event loop của browser); placeholder bị loại theo kích
+        thước đọc từ header ảnh.
+        
         Args:
             custom_filename: Custom filename prefix (without extension), e.g. "1_prompt_text"
         
-        Returns: List of saved file paths
+        Returns: List of DownloadResult (path, size, sha256)
         """
         import requests
 
         Path(output_dir).mkdir(parents=True, exist_ok=True)
+        saver = shared_image_saver()
         downloaded = []
 
         # Build filename
@@ -800,62 +832,33 @@ class MultiTabImageGenerator:
                 if src.startswith('data:image/'):
                     # Base64 encoded image
                     # Format: data:image/jpeg;base64,/9j/4AAQ...
-                    header, b64data = src.split(',', 1)
-                    
-                    # Verify: decode và check kích thước thực
                     # Placeholder có naturalWidth nhỏ (64-100px), ảnh thật >= 256px
                     nat_w = img.get('naturalW', img.get('width', 0))
                     if nat_w < 256:
                         print(f"[Tab{tab_id+1}] Skipping placeholder image {idx} (naturalWidth={nat_w})")
                         continue
                     
-                    img_bytes = base64.b64decode(b64data)
-
-                    # Determine extension from header
-                    if 'png' in header:
-                        filename = filename.replace('.jpg', '.png')
-                        filepath = Path(output_dir) / filename
-                    elif 'webp' in header:
-                        filename = filename.replace('.jpg', '.webp')
-                        filepath = Path(output_dir) / filename
-
-                    with open(filepath, 'wb') as f:
-                        f.write(img_bytes)
-
-                    if filepath.exists() and os.path.getsize(filepath) > 1000:
-                        downloaded.append(str(filepath))
-                        print(f"[Tab{tab_id+1}] Saved: {filename} ({len(img_bytes)//1024}KB)")
-                    else:
-                        print(f"[Tab{tab_id+1}] File too small: {filename}")
+                    # Decode + check kích thước từ header + ghi file (đuôi theo định dạng thật)
+                    result = await saver.save_data_url(src, filepath)
+                    downloaded.append(result)
+                    print(f"[Tab{tab_id+1}] Saved: {filepath.name} ({result.size//1024}KB)")
 
                 elif src.startswith('http'):
-                    # URL — download via requests
+                    # URL — stream qua requests trên thread pool
                     headers = {
                         'User-Agent': get_chrome_user_agent(),
                         'Referer': 'https://grok.com/',
                     }
-                    resp = requests.get(src, headers=headers, timeout=30)
-                    if resp.status_code == 200 and len(resp.content) > 1000:
-                        # Detect content type
-                        ct = resp.headers.get('content-type', '')
-                        if 'png' in ct:
-                            filename = filename.replace('.jpg', '.png')
-                            filepath = Path(output_dir) / filename
-                        elif 'webp' in ct:
-                            filename = filename.replace('.jpg', '.webp')
-                            filepath = Path(output_dir) / filename
-
-                        with open(filepath, 'wb') as f:
-                            f.write(resp.content)
-                        downloaded.append(str(filepath))
-                        print(f"[Tab{tab_id+1}] Saved URL: {filename} ({len(resp.content)//1024}KB)")
-                    else:
-                        print(f"[Tab{tab_id+1}] Download failed: HTTP {resp.status_code}")
+                    result = await saver.fetch(requests.get, src, filepath, headers, timeout=30)
+                    downloaded.append(result)
+                    print(f"[Tab{tab_id+1}] Saved URL: {os.path.basename(result.path)} ({result.size//1024}KB)")
 
                 elif src.startswith('blob:'):
                     # Blob URL — cần convert qua canvas trong browser
                     print(f"[Tab{tab_id+1}] Blob URL not supported, skipping")
 
+            except PlaceholderImage as e:
+                print(f"[Tab{tab_id+1}] Skipping {e} (image {idx})")
             except Exception as e:
                 print(f"[Tab{tab_id+1}] Download error for image {idx}: {e}")
 
@@ -869,16 +872,19 @@ class MultiTabImageGenerator:
         settings: ImageSettings,
         output_dir: str,
         on_task_complete: Optional[Callable] = None,
-        max_retries: int = 3
+        max_retries: int = 3,
+        task_ids: Optional[List[str]] = None
     ) -> List[ImageTask]:
         """
         Generate images for multiple prompts concurrently using all tabs.
         Tương tự video generate_batch.
+        task_ids: id song song với prompts → ProgressEvent (None = không phát)
         """
         results: List[ImageTask] = []
-        prompt_queue = list(prompts)
-        retry_queue: List[Tuple[str, int]] = []  # (prompt, retry_count)
-        active_tasks: Dict[int, Tuple[asyncio.Task, str, int]] = {}
+        keys = list(task_ids) if task_ids else [None] * len(prompts)
+        prompt_queue = list(zip(prompts, keys))
+        retry_queue: List[Tuple[Tuple[str, Optional[str]], int]] = []  # ((prompt, task_id), retry_count)
+        active_tasks: Dict[int, Tuple[asyncio.Task, str, int, Optional[str]]] = {}
 
         self._log(f"📋 Bắt đầu tạo ảnh: {len(prompts)} prompt, {len(self.tabs)} tab")
 
@@ -891,21 +897,21 @@ class MultiTabImageGenerator:
             # Start new tasks on ready tabs
             for tab_id in range(len(self.tabs)):
                 if tab_id not in active_tasks and self.tab_ready[tab_id]:
-                    item = None
+                    item, key = None, None
                     retry_count = 0
 
                     if retry_queue:
-                        item, retry_count = retry_queue.pop(0)
+                        (item, key), retry_count = retry_queue.pop(0)
                         self._log(f"🔄 Thử lại ({retry_count}/{max_retries}): {item[:30]}...", tab_id)
                     elif prompt_queue:
-                        item = prompt_queue.pop(0)
+                        item, key = prompt_queue.pop(0)
                         self._log(f"▶️ Bắt đầu: {item[:30]}...", tab_id)
 
                     if item:
                         task = asyncio.create_task(
-                            self.generate_images_on_tab(tab_id, item, settings, output_dir)
+                            self.generate_images_on_tab(tab_id, item, settings, output_dir, task_id=key)
                         )
-                        active_tasks[tab_id] = (task, item, retry_count)
+                        active_tasks[tab_id] = (task, item, retry_count, key)
 
             # Wait for any task to complete
             if active_tasks:
@@ -917,15 +923,18 @@ class MultiTabImageGenerator:
                 for completed_task in done:
                     completed_tab_id = None
                     item_used = None
+                    key_used = None
                     retry_count = 0
 
-                    for tid, (t, item, r) in list(active_tasks.items()):
+                    for tid, (t, item, r, k) in list(active_tasks.items()):
                         if t == completed_task:
                             completed_tab_id = tid
                             item_used = item
+                            key_used = k
                             retry_count = r
                             del active_tasks[tid]
                             break
+                    report = self._tab_reporters.get(completed_tab_id) if key_used else None
 
                     try:
                         image_task = completed_task.result()
@@ -938,9 +947,14 @@ class MultiTabImageGenerator:
                         if actually_failed and retry_count < max_retries and item_used:
                             reason = image_task.error_message or "không có ảnh"
                             self._log(f"⚠️ Lỗi ({reason}), thử lại ({retry_count+1}/{max_retries})", completed_tab_id or -1)
-                            retry_queue.append((item_used, retry_count + 1))
+                            retry_queue.append(((item_used, key_used), retry_count + 1))
+                            if report:
+                                report(Stage.RETRYING, message=reason)
                         else:
                             results.append(image_task)
+                            if report:
+                                stage = Stage.COMPLETED if image_task.status == "completed" else Stage.FAILED
+                                report(stage, message=image_task.error_message or "", result=image_task)
                             if on_task_complete:
                                 on_task_complete(image_task)
                             if image_task.status == "completed":
@@ -950,7 +964,11 @@ class MultiTabImageGenerator:
                     except Exception as e:
                         self._log(f"❌ Lỗi tác vụ: {e}")
                         if retry_count < max_retries and item_used:
-                            retry_queue.append((item_used, retry_count + 1))
+                            retry_queue.append(((item_used, key_used), retry_count + 1))
+                            if report:
+                                report(Stage.RETRYING, message=str(e))
+                        elif report:
+                            report(Stage.FAILED, message=str(e))
             else:
                 await asyncio.sleep(0.5)
 
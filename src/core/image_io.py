@@ -0,0 +1,179 @@
+"""Image IO - decode/ghi/tải ảnh trên thread pool, đọc kích thước từ header
+
+Trước đây _download_images b64decode + ghi file vài MB và requests.get chạy
+thẳng trong coroutine điều khiển tab browser → mọi tab khác trên cùng event
+loop đứng chờ. Ở đây mọi việc nặng chạy trên 1 ThreadPoolExecutor giới hạn
+số luồng, coroutine chỉ await. Kích thước ảnh đọc từ header (PNG IHDR, JPEG
+SOF, WebP VP8/VP8L/VP8X, GIF) — với base64 chỉ decode vài chục KB đầu — nên
+placeholder bị loại trước khi decode/ghi cả file.
+"""
+import asyncio
+import base64
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from .download_sink import DownloadError, DownloadResult, download_to_file, write_file
+
+MAX_WORKERS = 4
+MIN_IMAGE_SIDE = 256  # placeholder thường 64-100px, ảnh thật >= 256px
+MIN_IMAGE_BYTES = 1000
+HEADER_BYTES = 64 * 1024  # đủ để gặp JPEG SOF sau EXIF thông thường
+_HEADER_B64_CHARS = HEADER_BYTES * 4 // 3
+
+EXTENSIONS = {"jpeg": ".jpg", "png": ".png", "webp": ".webp", "gif": ".gif"}
+# SOF0-SOF15 trừ DHT (C4), JPG (C8), DAC (CC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+class PlaceholderImage(DownloadError):
+    pass
+
+
+@dataclass
+class ImageInfo:
+    format: str  # jpeg / png / webp / gif
+    width: int
+    height: int
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self.format]
+
+
+def image_info(head: bytes) -> Optional[ImageInfo]:
+    """Định dạng + kích thước từ các byte đầu file (None nếu không nhận ra / chưa đủ byte)"""
+    try:
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            width, height = struct.unpack_from(">II", head, 16)
+            return ImageInfo("png", width, height)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp_info(head)
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            width, height = struct.unpack_from("<HH", head, 6)
+            return ImageInfo("gif", width, height)
+        if head[:2] == b"\xff\xd8":
+            return _jpeg_info(head)
+    except struct.error:
+        pass
+    return None
+
+
+def _webp_info(head: bytes) -> Optional[ImageInfo]:
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack_from("<HH", head, 26)
+        return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L":
+        bits = struct.unpack_from("<I", head, 21)[0]
+        return ImageInfo("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8X":
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return ImageInfo("webp", width, height)
+    return None
+
+
+def _jpeg_info(head: bytes) -> Optional[ImageInfo]:
+    i = 2
+    while i + 9 <= len(head):
+        if head[i] != 0xFF:
+            return None
+        marker = head[i + 1]
+        if marker == 0xFF:  # byte đệm
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # marker không có length
+            i += 2
+            continue
+        if marker in _JPEG_SOF:
+            height, width = struct.unpack_from(">HH", head, i + 5)
+            return ImageInfo("jpeg", width, height)
+        i += 2 + struct.unpack_from(">H", head, i + 2)[0]
+    return None
+
+
+def file_image_info(path) -> Optional[ImageInfo]:
+    with open(path, "rb") as f:
+        return image_info(f.read(HEADER_BYTES))
+
+
+def _check_size(info: Optional[ImageInfo], min_side: int) -> None:
+    if info is not None and min(info.width, info.height) < min_side:
+        raise PlaceholderImage(f"placeholder {info.width}x{info.height}")
+
+
+def _fix_extension(result: DownloadResult, info: Optional[ImageInfo]) -> DownloadResult:
+    """Đổi đuôi file theo định dạng thật (CDN có thể trả PNG/WebP cho tên .jpg)"""
+    suffix = Path(result.path).suffix.lower()
+    if info is None or suffix == info.extension or (info.format == "jpeg" and suffix == ".jpeg"):
+        return result
+    new_path = str(Path(result.path).with_suffix(info.extension))
+    os.replace(result.path, new_path)
+    result.path = new_path
+    return result
+
+
+def save_data_url(data_url: str, dest, min_side: int = MIN_IMAGE_SIDE) -> DownloadResult:
+    """data:image/...;base64,... → file (chạy trên thread pool). Raise PlaceholderImage / DownloadError"""
+    _, b64data = data_url.split(",", 1)
+    # Chỉ decode phần đầu để đọc kích thước → placeholder bị loại không cần decode cả ảnh
+    head_chars = min(len(b64data), _HEADER_B64_CHARS) // 4 * 4
+    info = image_info(base64.b64decode(b64data[:head_chars]))
+    _check_size(info, min_side)
+    data = base64.b64decode(b64data)
+    if len(data) <= MIN_IMAGE_BYTES:
+        raise DownloadError(f"File quá nhỏ ({len(data)} bytes)")
+    if info is None:
+        info = image_info(data[:HEADER_BYTES])
+        _check_size(info, min_side)
+    if info is not None:
+        dest = Path(dest).with_suffix(info.extension)
+    return write_file(dest, data)
+
+
+def fetch_image(get: Callable, url: str, dest, headers: Optional[dict] = None,
+                min_side: int = MIN_IMAGE_SIDE, **kwargs) -> DownloadResult:
+    """Tải ảnh từ URL (stream qua download_to_file) + kiểm tra kích thước + sửa đuôi"""
+    result = download_to_file(get, url, dest, headers, min_size=MIN_IMAGE_BYTES, **kwargs)
+    info = file_image_info(result.path)
+    try:
+        _check_size(info, min_side)
+    except PlaceholderImage:
+        os.remove(result.path)
+        raise
+    return _fix_extension(result, info)
+
+
+class ImageSaver:
+    """Thread pool giới hạn cho decode/ghi/tải ảnh, API async cho coroutine của tab"""
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-io")
+
+    async def save_data_url(self, data_url: str, dest, min_side: int = MIN_IMAGE_SIDE) -> DownloadResult:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, save_data_url, data_url, dest, min_side)
+
+    async def fetch(self, get: Callable, url: str, dest, headers: Optional[dict] = None,
+                    min_side: int = MIN_IMAGE_SIDE, **kwargs) -> DownloadResult:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, lambda: fetch_image(get, url, dest, headers, min_side, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_shared: Optional[ImageSaver] = None
+
+
+def shared_image_saver() -> ImageSaver:
+    """Pool dùng chung cho mọi tab/account (giới hạn tổng số luồng IO ảnh)"""
+    global _shared
+    if _shared is None:
+        _shared = ImageSaver()
+    return _shared
@@ -0,0 +1,184 @@
+"""Job Journal - ghi trạng thái từng item của batch video/ảnh vào jobs.db
+
+Batch trước đây chỉ nằm trong bộ nhớ (queue table, account_prompts, retry
+queue...) → app crash / tắt giữa chừng là mất tiến độ, chạy lại cả file TXT
+sẽ tạo lại cả những video đã xong. Journal lưu mỗi item + chuyển trạng thái
+pending → running → done (output) / failed (lỗi); "Tiếp tục batch" dựng lại
+queue từ journal, bỏ qua item đã done.
+
+Ghi từ GUI thread: mỗi thay đổi là 1 transaction nhỏ (WAL, synchronous=NORMAL).
+"""
+import json
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .paths import data_path
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+KEEP_BATCHES = 50  # batch cũ hơn bị xóa khi tạo batch mới
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,            -- "video" / "image"
+    created_at TEXT NOT NULL,
+    output_dir TEXT,
+    settings TEXT                  -- JSON
+);
+CREATE TABLE IF NOT EXISTS items (
+    batch_id TEXT NOT NULL REFERENCES batches(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    prompt TEXT NOT NULL,
+    image_path TEXT,
+    subfolder TEXT,
+    stt INTEGER,
+    state TEXT NOT NULL DEFAULT 'pending',
+    output_path TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT,
+    PRIMARY KEY (batch_id, idx)
+);
+CREATE INDEX IF NOT EXISTS idx_items_state ON items(batch_id, state);
+"""
+
+
+@dataclass
+class JobItem:
+    idx: int
+    prompt: str
+    image_path: Optional[str]
+    subfolder: Optional[str]
+    stt: Optional[int]
+    state: str
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+@dataclass
+class BatchInfo:
+    id: str
+    kind: str
+    created_at: datetime
+    output_dir: Optional[str]
+    settings: dict
+    total: int
+    done: int
+    failed: int
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.done
+
+    def label(self) -> str:
+        name = self.settings.get("name") or ""
+        return (f"{self.created_at:%Y-%m-%d %H:%M} · {self.done}/{self.total} xong"
+                + (f" · {self.failed} lỗi" if self.failed else "") + (f" · {name}" if name else ""))
+
+
+class JobJournal:
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else data_path("jobs.db")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(SCHEMA)
+
+    def create_batch(self, kind: str, items: Iterable[tuple], output_dir: Optional[str] = None,
+                     settings: Optional[dict] = None) -> str:
+        """items: (prompt, image_path, subfolder, stt) theo thứ tự queue. Trả về batch_id"""
+        batch_id = uuid.uuid4().hex
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO batches (id, kind, created_at, output_dir, settings) VALUES (?, ?, ?, ?, ?)",
+                (batch_id, kind, now, output_dir, json.dumps(settings or {}, ensure_ascii=False)))
+            self._conn.executemany(
+                "INSERT INTO items (batch_id, idx, prompt, image_path, subfolder, stt, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((batch_id, idx, prompt, image_path, subfolder, stt, now)
+                 for idx, (prompt, image_path, subfolder, stt) in enumerate(items)))
+            self._conn.execute(
+                "DELETE FROM batches WHERE id NOT IN"
+                " (SELECT id FROM batches ORDER BY created_at DESC LIMIT ?)", (KEEP_BATCHES,))
+        return batch_id
+
+    # ---- Chuyển trạng thái ----
+
+    def mark_running(self, batch_id: str, idx: int) -> None:
+        self._update(batch_id, [idx], "state = ?, attempts = attempts + 1", (RUNNING,))
+
+    def mark_done(self, batch_id: str, idx: int, output_path: Optional[str] = None) -> None:
+        self._update(batch_id, [idx], "state = ?, output_path = ?, error = NULL", (DONE, output_path))
+
+    def mark_failed(self, batch_id: str, idx: int, error: Optional[str] = None) -> None:
+        self._update(batch_id, [idx], "state = ?, error = ?", (FAILED, error))
+
+    def mark_pending(self, batch_id: str, idxs: Iterable[int]) -> None:
+        """Đưa lại về chờ (failover sang account khác, tạo lại)"""
+        self._update(batch_id, list(idxs), "state = ?", (PENDING,))
+
+    def _update(self, batch_id: str, idxs: list[int], assignments: str, params: tuple) -> None:
+        if not idxs:
+            return
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"UPDATE items SET {assignments}, updated_at = ? WHERE batch_id = ? AND idx = ?",
+                ((*params, now, batch_id, idx) for idx in idxs))
+
+    # ---- Đọc ----
+
+    def items(self, batch_id: str, exclude_done: bool = False) -> list[JobItem]:
+        sql = ("SELECT idx, prompt, image_path, subfolder, stt, state, output_path, error, attempts"
+               " FROM items WHERE batch_id = ?")
+        if exclude_done:
+            sql += " AND state != 'done'"
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY idx", (batch_id,)).fetchall()
+        return [JobItem(*row) for row in rows]
+
+    def resumable_batches(self, kind: str, limit: int = 20) -> list[BatchInfo]:
+        """Batch còn item chưa xong (mới nhất trước)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT b.id, b.kind, b.created_at, b.output_dir, b.settings, COUNT(*),"
+                "       SUM(i.state = 'done'), SUM(i.state = 'failed')"
+                " FROM batches b JOIN items i ON i.batch_id = b.id"
+                " WHERE b.kind = ? GROUP BY b.id HAVING SUM(i.state != 'done') > 0"
+                " ORDER BY b.created_at DESC LIMIT ?", (kind, limit)).fetchall()
+        return [BatchInfo(id=r[0], kind=r[1], created_at=datetime.fromisoformat(r[2]), output_dir=r[3],
+                          settings=json.loads(r[4] or "{}"), total=r[5], done=r[6] or 0, failed=r[7] or 0)
+                for r in rows]
+
+    def delete_batch(self, batch_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
+
+
+_shared: Optional[JobJournal] = None
+
+
+def shared_journal() -> JobJournal:
+    """Journal dùng chung cho tab Video + Ảnh (data/jobs.db)"""
+    global _shared
+    if _shared is None:
+        _shared = JobJournal()
+    return _shared
@@ -42,6 +42,11 @@ class VideoTask:
     output_path: Optional[str] = None
     user_data_dir: Optional[str] = None  # Browser profile dir for download
     account_cookies: Optional[dict] = None  # Account cookies for download
+    file_exists: Optional[bool] = None  # Cache trạng thái output_path (None = chưa kiểm tra)
+    file_size: Optional[int] = None
+    file_mtime: Optional[float] = None
+    file_sha256: Optional[str] = None  # hash lúc tải xong (download_sink)
+    content_key: Optional[str] = None  # hash prompt + settings + ảnh nguồn (result_cache)
     created_at: datetime = field(default_factory=datetime.now)
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
@@ -71,6 +76,9 @@ class ImageTask:
     output_paths: List[str] = field(default_factory=list)  # Downloaded file paths
     output_dir: Optional[str] = None  # Directory chứa ảnh output
     account_cookies: Optional[dict] = None
+    file_size: Optional[int] = None  # ảnh đầu tiên (1 prompt = 1 ảnh)
+    file_sha256: Optional[str] = None
+    content_key: Optional[str] = None  # hash prompt + settings (result_cache)
     created_at: datetime = field(default_factory=datetime.now)
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
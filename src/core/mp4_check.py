@@ -0,0 +1,61 @@
+"""MP4 Check - kiểm tra file MP4 tải đủ bằng cấu trúc box, không đoán theo size
+
+Trước đây "tải xong" = file > 10KB và size đứng yên 1s → chậm (phải ngủ) và
+sai với file bị cắt giữa chừng. MP4 là chuỗi box top-level [size][type]...
+nối liền nhau tới hết file: chỉ cần đọc header từng box (qua mmap, không đọc
+dữ liệu video) và kiểm tra tổng size khai báo khớp đúng size file, có đủ
+ftyp + moov + mdat. File bị cắt → box cuối khai báo dài hơn phần còn lại.
+"""
+import mmap
+import os
+import struct
+from typing import Optional
+
+REQUIRED_BOXES = (b"moov", b"mdat")
+_HEADER = struct.Struct(">I4s")
+_LARGE_SIZE = struct.Struct(">Q")
+
+
+def mp4_problem(path) -> Optional[str]:
+    """None nếu MP4 đầy đủ, ngược lại là lý do (để log / báo lỗi)"""
+    try:
+        size = os.path.getsize(path)
+        if size < _HEADER.size:
+            return f"file quá nhỏ ({size} bytes)"
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return _walk_boxes(m, size)
+    except (OSError, ValueError) as e:
+        return f"không đọc được: {e}"
+
+
+def is_complete_mp4(path) -> bool:
+    return mp4_problem(path) is None
+
+
+def _walk_boxes(m, size: int) -> Optional[str]:
+    seen = []
+    offset = 0
+    while offset < size:
+        if size - offset < _HEADER.size:
+            return f"thừa {size - offset} bytes sau box cuối"
+        box_size, box_type = _HEADER.unpack_from(m, offset)
+        header = _HEADER.size
+        if box_size == 1:  # size 64-bit ngay sau type
+            if size - offset < 16:
+                return f"box {box_type!r} bị cắt ở header"
+            box_size = _LARGE_SIZE.unpack_from(m, offset + 8)[0]
+            header = 16
+        elif box_size == 0:  # box kéo dài tới hết file
+            box_size = size - offset
+        if box_size < header:
+            return f"box {box_type!r} size không hợp lệ ({box_size}) tại {offset}"
+        if not seen and box_type != b"ftyp":
+            return f"không bắt đầu bằng ftyp ({box_type!r})"
+        if offset + box_size > size:
+            return f"box {box_type!r} bị cắt: thiếu {offset + box_size - size} bytes"
+        seen.append(box_type)
+        offset += box_size
+    missing = [t.decode() for t in REQUIRED_BOXES if t not in seen]
+    if missing:
+        return f"thiếu box {', '.join(missing)}"
+    return None
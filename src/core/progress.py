@@ -0,0 +1,83 @@
+"""Progress Events - tiến độ có cấu trúc cho từng task (video/ảnh)
+
+Generator/worker phát ProgressEvent gắn task_id do tab cấp (ổn định qua retry,
+failover, tạo lại) → tab tra thẳng task_id → row, không phải đoán row từ text
+log hay prefix prompt.
+"""
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Optional
+
+
+class Stage(str, Enum):
+    QUEUED = "queued"
+    STARTED = "started"
+    UPLOADING = "uploading"
+    CREATING_POST = "creating_post"
+    RENDERING = "rendering"
+    SHARING = "sharing"
+    DOWNLOADING = "downloading"
+    RETRYING = "retrying"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    @property
+    def is_final(self) -> bool:
+        return self in (Stage.COMPLETED, Stage.FAILED)
+
+
+# % mặc định của từng stage (trùng các mốc cũ: 5/20/50/70/90/100)
+STAGE_PERCENT = {
+    Stage.QUEUED: 0,
+    Stage.STARTED: 5,
+    Stage.UPLOADING: 10,
+    Stage.CREATING_POST: 20,
+    Stage.RENDERING: 50,
+    Stage.SHARING: 70,
+    Stage.DOWNLOADING: 90,
+    Stage.RETRYING: 0,
+    Stage.COMPLETED: 100,
+    Stage.FAILED: 100,
+}
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    task_id: str
+    stage: Stage
+    percent: int = 0
+    account_email: str = ""
+    elapsed: float = 0.0  # giây kể từ lúc task bắt đầu (STARTED)
+    message: str = ""
+    result: Any = None  # VideoTask / ImageTask khi stage là COMPLETED / FAILED
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressReporter:
+    """Phát ProgressEvent cho 1 task: gắn task_id/email, tự đo elapsed"""
+
+    def __init__(self, callback: Optional[ProgressCallback], task_id: Optional[str],
+                 account_email: str = ""):
+        self._callback = callback
+        self.task_id = task_id
+        self.account_email = account_email
+        self.started_at = time.monotonic()
+
+    def __call__(self, stage: Stage, percent: Optional[int] = None, message: str = "",
+                 result: Any = None) -> None:
+        if self._callback is None or self.task_id is None:
+            return
+        if stage == Stage.STARTED:
+            self.started_at = time.monotonic()
+        self._callback(ProgressEvent(
+            task_id=self.task_id,
+            stage=stage,
+            percent=STAGE_PERCENT[stage] if percent is None else percent,
+            account_email=self.account_email,
+            elapsed=time.monotonic() - self.started_at,
+            message=message,
+            result=result,
+        ))
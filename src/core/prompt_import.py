@@ -0,0 +1,143 @@
+"""Prompt Import - đọc prompt từ file TXT (từng dòng) vào PromptStore gọn nhẹ
+
+File/folder hàng trăm nghìn prompt: đọc từng dòng (không read() cả file), báo
+tiến độ theo byte, có thể hủy giữa chừng. Prompt lưu liền trong 1 bytearray
+UTF-8 + mảng offset thay vì list[str] → không nhân đôi bộ nhớ khi vừa giữ
+text vừa giữ list; tab chỉ hiện preview + số lượng, _start đọc thẳng từ store.
+"""
+import os
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+PROGRESS_EVERY_LINES = 5000
+
+# (bytes đã đọc, tổng bytes, số prompt)
+ImportProgress = Callable[[int, int, int], None]
+
+
+class PromptStore:
+    """Danh sách prompt theo batch (mỗi file TXT = 1 batch = 1 subfolder)"""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array("Q", [0])  # prompt i = _data[_offsets[i]:_offsets[i+1]]
+        self.batches: list[tuple[Optional[str], int, int]] = []  # (tên batch, start, end)
+        self._batch_starts: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._data[self._offsets[i]:self._offsets[i + 1]].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def add(self, prompt: str) -> None:
+        self._data += prompt.encode("utf-8")
+        self._offsets.append(len(self._data))
+
+    def items(self) -> Iterator[tuple[str, Optional[str], int]]:
+        """(prompt, tên batch, stt trong batch bắt đầu từ 1)"""
+        for name, start, end in self.batches:
+            for stt, i in enumerate(range(start, end), start=1):
+                yield self[i], name, stt
+
+    def item(self, i: int) -> tuple[str, Optional[str], int]:
+        """(prompt, tên batch, stt) của prompt thứ i — như items() nhưng theo chỉ số"""
+        if len(self._batch_starts) != len(self.batches):
+            self._batch_starts = [start for _, start, _ in self.batches]
+        name, start, _ = self.batches[bisect_right(self._batch_starts, i) - 1]
+        return self[i], name, i - start + 1
+
+    def preview(self, limit: int) -> list[str]:
+        return [self[i] for i in range(min(limit, len(self)))]
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}({end - start})" for name, start, end in self.batches)
+
+
+class PromptItems(Sequence):
+    """Item queue đọc thẳng từ PromptStore theo chỉ số (không copy prompt ra list tuple).
+
+    with_image: item dạng (prompt, None, tên batch, stt) như hàng Image→Video,
+    mặc định (prompt, tên batch, stt). Cắt lát / take() trả về view mới.
+    """
+
+    def __init__(self, store: PromptStore, with_image: bool = False, rows: Optional[Sequence] = None):
+        self.store = store
+        self.with_image = with_image
+        self.rows = range(len(store)) if rows is None else rows  # chỉ số prompt trong store
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return PromptItems(self.store, self.with_image, self.rows[i])
+        prompt, name, stt = self.store.item(self.rows[i])
+        return (prompt, None, name, stt) if self.with_image else (prompt, name, stt)
+
+    def take(self, idxs: Iterable[int]) -> "PromptItems":
+        return PromptItems(self.store, self.with_image, [self.rows[i] for i in idxs])
+
+
+def take_items(items: Sequence, idxs: Iterable[int]) -> Sequence:
+    """Các item theo chỉ số: PromptItems → view, list → list"""
+    if isinstance(items, PromptItems):
+        return items.take(idxs)
+    return [items[i] for i in idxs]
+
+
+def iter_prompt_lines(path: Path, on_bytes: Optional[Callable[[int], None]] = None) -> Iterator[str]:
+    """Các dòng không rỗng (đã strip) của file TXT, đọc từng dòng"""
+    with open(path, "rb") as f:
+        for raw in f:
+            if on_bytes:
+                on_bytes(len(raw))
+            line = raw.decode("utf-8", errors="replace").lstrip("\ufeff").strip()  # BOM (Notepad)
+            if line:
+                yield line
+
+
+def import_prompt_files(paths: list[Path], on_progress: Optional[ImportProgress] = None,
+                        is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[PromptStore]:
+    """Đọc các file TXT thành PromptStore (mỗi file 1 batch tên = tên file).
+
+    Trả về None nếu bị hủy.
+    """
+    store = PromptStore()
+    total = sum(os.path.getsize(p) for p in paths)
+    done = 0
+    lines = 0
+
+    def on_bytes(n: int) -> None:
+        nonlocal done
+        done += n
+
+    for path in paths:
+        path = Path(path)
+        for prompt in iter_prompt_lines(path, on_bytes):
+            store.add(prompt)
+            lines += 1
+            if lines % PROGRESS_EVERY_LINES == 0:
+                if is_cancelled and is_cancelled():
+                    return None
+                if on_progress:
+                    on_progress(done, total, len(store))
+        start = store.batches[-1][2] if store.batches else 0
+        if len(store) > start:
+            store.batches.append((path.stem, start, len(store)))
+        if is_cancelled and is_cancelled():
+            return None
+    if on_progress:
+        on_progress(total, total, len(store))
+    return store
@@ -0,0 +1,122 @@
+"""Result Cache - nhận ra prompt đã từng tạo xong để dùng lại output
+
+Chạy lại cùng file TXT trước đây tạo lại toàn bộ video dù history.db đã có
+row completed y hệt. content_key = hash(prompt + settings + nội dung ảnh nguồn)
+được lưu kèm row history; lúc bắt đầu batch tab tra các key này, item trùng
+được hardlink (hoặc copy nếu khác ổ đĩa) output cũ sang tên file mới → không
+gọi API cho item đã biết.
+"""
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Optional
+
+CHUNK_SIZE = 1024 * 1024
+KEY_BATCH = 256  # compute_keys đọc items theo từng nhóm (items có thể là generator)
+MAX_DIGESTS = 4096
+
+# (path, size, mtime_ns) -> sha256 nội dung (LRU) → lần Start sau / Tạo lại
+# cùng ảnh nguồn không đọc file lần 2
+_digests: OrderedDict[tuple, str] = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def file_digest(path) -> str:
+    """sha256 nội dung file (đọc từng chunk, nhớ theo size + mtime)"""
+    st = os.stat(path)
+    key = (os.path.normcase(os.path.abspath(path)), st.st_size, st.st_mtime_ns)
+    with _digests_lock:
+        cached = _digests.get(key)
+        if cached is not None:
+            _digests.move_to_end(key)
+    if cached is not None:
+        return cached
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digests_lock:
+        _digests[key] = digest
+        while len(_digests) > MAX_DIGESTS:
+            _digests.popitem(last=False)
+    return digest
+
+
+def content_key(prompt: str, settings, image_path: Optional[str] = None) -> Optional[str]:
+    """Key của 1 kết quả: prompt + settings (VideoSettings/ImageSettings) + ảnh nguồn.
+
+    None nếu không đọc được ảnh nguồn (không dùng lại được).
+    """
+    payload = {
+        "kind": type(settings).__name__,
+        "prompt": prompt.strip(),
+        "settings": dataclasses.asdict(settings) if dataclasses.is_dataclass(settings) else None,
+    }
+    if image_path:
+        try:
+            payload["image"] = file_digest(image_path)
+        except OSError:
+            return None
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def compute_keys(items: Iterable[tuple], max_workers: int = 4) -> list[Optional[str]]:
+    """items: (prompt, settings, image_path) → key tương ứng (ảnh hash song song)"""
+    items = iter(items)
+    keys: list[Optional[str]] = []
+    pool = None
+    try:
+        while batch := list(islice(items, KEY_BATCH)):
+            if len(batch) > 1 and any(image for _, _, image in batch):
+                pool = pool or ThreadPoolExecutor(max_workers=max_workers)
+                keys.extend(pool.map(lambda item: content_key(*item), batch))
+            else:
+                keys.extend(content_key(*item) for item in batch)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return keys
+
+
+# ---- Tên file output (dùng chung với worker tải về) ----
+
+def video_output_name(stt: int, prompt: str, post_id: str) -> str:
+    """stt_prompt_postid.mp4"""
+    safe_prompt = re.sub(r'[^\w\s-]', '', prompt[:30]).strip().replace(' ', '_')
+    return f"{stt:03d}_{safe_prompt}_{post_id[:8]}.mp4"
+
+
+def image_output_stem(stt: int, prompt: str) -> str:
+    """stt_prompt (đuôi file theo định dạng ảnh tải về)"""
+    prompt_short = re.sub(r'[^\w\s]', '', prompt)[:30].replace(' ', '_')
+    return f"{stt}_{prompt_short}"
+
+
+def reuse_output(src: str, dest: Path) -> str:
+    """Đặt output cũ vào dest: hardlink, không được (khác ổ, FS không hỗ trợ) thì copy.
+
+    Ghi qua file tạm + os.replace → dest không bao giờ dở dang.
+    """
+    dest = Path(dest)
+    if dest.exists() and os.path.samefile(src, dest):
+        return str(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(dest.name + ".reuse")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+    return str(dest)
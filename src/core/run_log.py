@@ -0,0 +1,170 @@
+"""Run Log - nhật ký chạy (video/ảnh) ghi ra file xoay vòng + đọc/tìm lại
+
+GUI chỉ giữ N dòng gần nhất (ring buffer) để hiển thị; toàn bộ log đi qua
+QueueHandler → QueueListener (thread nền) → RotatingFileHandler ở data/logs/,
+GUI thread không bao giờ chờ ghi đĩa. Tìm kiếm/lọc log cũ đọc thẳng từ file.
+
+Mỗi dòng file: "ts<TAB>LEVEL<TAB>source<TAB>account<TAB>message" (message đã
+escape xuống dòng) → mỗi entry đúng 1 dòng, parse lại bằng split.
+"""
+import logging
+import logging.handlers
+import queue
+import re
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+LOGGER_NAME = "grok.run"
+LOG_FILENAME = "run.log"
+MAX_BYTES = 5 * 1024 * 1024  # 5 MB / file
+BACKUP_COUNT = 5
+RING_SIZE = 2000  # số dòng giữ trong bộ nhớ cho view
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.setLevel(logging.DEBUG)
+logger.propagate = False  # không lẫn vào root (browser_controller gọi basicConfig)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_log_dir: Optional[Path] = None
+
+
+@dataclass(frozen=True)
+class LogEntry:
+    time: datetime
+    level: int
+    source: str  # "video" / "image"
+    account: str
+    message: str
+
+    @property
+    def level_name(self) -> str:
+        return logging.getLevelName(self.level)
+
+    def format(self) -> str:
+        return f"[{self.time:%H:%M:%S}] {self.message}"
+
+    def matches(self, min_level: int = logging.NOTSET, account: str = "", text: str = "") -> bool:
+        return (self.level >= min_level
+                and (not account or self.account == account)
+                and (not text or text.lower() in self.message.lower()))
+
+
+def guess_level(message: str) -> int:
+    """Level theo emoji quen dùng trong log ❌/⚠️ (caller không truyền level)"""
+    if "❌" in message:
+        return logging.ERROR
+    if "⚠️" in message:
+        return logging.WARNING
+    return logging.INFO
+
+
+_UNESCAPE = re.compile(r"\\(.)")
+
+
+class _LineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage().replace("\\", "\\\\").replace("\n", "\\n")
+        return "\t".join((
+            datetime.fromtimestamp(record.created).strftime(TIME_FORMAT),
+            record.levelname,
+            getattr(record, "source", ""),
+            getattr(record, "account", ""),
+            message,
+        ))
+
+
+def parse_line(line: str) -> Optional[LogEntry]:
+    parts = line.rstrip("\r\n").split("\t", 4)
+    if len(parts) != 5:
+        return None
+    ts, level, source, account, message = parts
+    try:
+        time = datetime.strptime(ts, TIME_FORMAT)
+    except ValueError:
+        return None
+    level_no = logging.getLevelName(level)
+    if not isinstance(level_no, int):
+        level_no = logging.INFO
+    message = _UNESCAPE.sub(lambda m: "\n" if m.group(1) == "n" else m.group(1), message)
+    return LogEntry(time, level_no, source, account, message)
+
+
+def start(log_dir: Path, max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT) -> None:
+    """Bật ghi log ra file (gọi 1 lần lúc mở app)"""
+    global _listener, _log_dir
+    if _listener is not None:
+        return
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_dir / LOG_FILENAME, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(_LineFormatter())
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(q))
+    _listener = logging.handlers.QueueListener(q, file_handler)
+    _listener.start()
+    _log_dir = log_dir
+
+
+def stop() -> None:
+    """Ghi nốt log đang queue rồi đóng file"""
+    global _listener
+    if _listener is None:
+        return
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+def log_dir() -> Optional[Path]:
+    return _log_dir
+
+
+def write(source: str, message: str, level: Optional[int] = None, account: str = "") -> LogEntry:
+    """Ghi 1 dòng log (non-blocking) và trả về entry cho view"""
+    if level is None:
+        level = guess_level(message)
+    entry = LogEntry(datetime.now(), level, source, account, message)
+    logger.log(level, message, extra={"source": source, "account": account})
+    return entry
+
+
+def log_files(directory: Path) -> list[Path]:
+    """Các file log theo thứ tự cũ → mới (run.log.5 ... run.log.1, run.log)"""
+    base = Path(directory) / LOG_FILENAME
+    rotated = sorted(base.parent.glob(LOG_FILENAME + ".*"),
+                     key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0, reverse=True)
+    return [p for p in rotated if p.suffix[1:].isdigit()] + ([base] if base.exists() else [])
+
+
+def search(directory: Path, text: str = "", min_level: int = logging.NOTSET, account: str = "",
+           source: str = "", limit: Optional[int] = None) -> list[LogEntry]:
+    """Tìm trong toàn bộ file log (đọc từng dòng, không load cả file).
+
+    limit: chỉ giữ N kết quả mới nhất.
+    """
+    results: deque[LogEntry] = deque(maxlen=limit)
+    for entry in _iter_entries(log_files(directory)):
+        if (not source or entry.source == source) and entry.matches(min_level, account, text):
+            results.append(entry)
+    return list(results)
+
+
+def _iter_entries(paths: Iterable[Path]) -> Iterator[LogEntry]:
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    entry = parse_line(line)
+                    if entry:
+                        yield entry
+        except OSError:
+            continue  # file vừa bị xoay vòng
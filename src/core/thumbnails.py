@@ -0,0 +1,217 @@
+"""Thumbnails - poster frame cho video đã download + cache trên đĩa (LRU)
+
+Decode video chạy trong process pool (không đụng GUI thread / GIL), kết quả là
+file JPEG nhỏ trong data/thumbnails/ với key = path + size + mtime → file bị
+ghi đè/thay thế thì tự sinh thumbnail mới. Cache bị giới hạn dung lượng, file
+ít dùng nhất bị xóa trước (mtime của file thumbnail = lần dùng gần nhất).
+
+Extract frame: ưu tiên ffmpeg (nếu có trong PATH), fallback OpenCV (cv2).
+"""
+import hashlib
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+THUMB_WIDTH = 160
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024  # 100 MB
+POSTER_SEEK_SECONDS = 0.5  # frame đầu thường đen/mờ
+
+ThumbnailCallback = Callable[[str, Optional[Path]], None]  # (video_path, thumb_path | None)
+
+
+def _ffmpeg_poster(video_path: str, dest: str, width: int) -> bool:
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return False
+    cmd = [ffmpeg, "-v", "error", "-y", "-ss", str(POSTER_SEEK_SECONDS), "-i", video_path,
+           "-frames:v", "1", "-vf", f"scale={width}:-2", "-f", "image2", dest]
+    flags = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+    try:
+        subprocess.run(cmd, check=True, timeout=30, capture_output=True, creationflags=flags)
+    except (subprocess.SubprocessError, OSError):
+        return False
+    return os.path.exists(dest) and os.path.getsize(dest) > 0
+
+
+def _cv2_poster(video_path: str, dest: str, width: int) -> bool:
+    if not CV2_AVAILABLE:
+        return False
+    cap = cv2.VideoCapture(video_path)
+    try:
+        cap.set(cv2.CAP_PROP_POS_MSEC, POSTER_SEEK_SECONDS * 1000)
+        ok, frame = cap.read()
+        if not ok:
+            # Video ngắn hơn seek → lấy frame đầu
+            cap.set(cv2.CAP_PROP_POS_MSEC, 0)
+            ok, frame = cap.read()
+        if not ok:
+            return False
+    finally:
+        cap.release()
+    h, w = frame.shape[:2]
+    frame = cv2.resize(frame, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    if not ok:
+        return False
+    with open(dest, "wb") as f:
+        f.write(buf.tobytes())
+    return True
+
+
+def extract_poster(video_path: str, dest: str, width: int = THUMB_WIDTH) -> bool:
+    """Ghi poster frame của video ra dest (JPEG). Chạy trong process con.
+
+    Ghi vào dest.part rồi rename → cache không bao giờ thấy file dở dang.
+    """
+    part = dest + ".part"
+    try:
+        ok = _ffmpeg_poster(video_path, part, width) or _cv2_poster(video_path, part, width)
+        if ok:
+            os.replace(part, dest)
+        return ok
+    finally:
+        if os.path.exists(part):
+            os.remove(part)
+
+
+def thumbnail_key(video_path: str, size: Optional[int], mtime: Optional[float]) -> str:
+    raw = f"{os.path.normcase(os.path.abspath(video_path))}|{size}|{mtime}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES, max_workers: int = 2,
+                 extractor: Callable[[str, str, int], bool] = extract_poster):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self._extractor = extractor
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, int] = OrderedDict()  # key -> bytes, cũ nhất trước
+        self._total = 0
+        self._pending: dict[str, Future] = {}
+        self._failed: set[str] = set()  # không retry video lỗi trong phiên này
+        self._touched: set[str] = set()  # đã cập nhật mtime (LRU) trong phiên này
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._load_index()
+
+    def _load_index(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        found = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".part"):
+                    os.remove(entry.path)  # rác của lần chạy bị kill
+                elif entry.name.endswith(".jpg") and entry.is_file():
+                    st = entry.stat()
+                    found.append((st.st_mtime, entry.name[:-4], st.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total += size
+        self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.jpg"
+
+    def get(self, video_path: str, size: Optional[int] = None,
+            mtime: Optional[float] = None) -> Optional[Path]:
+        """Thumbnail đã có trong cache (không extract). Đánh dấu vừa dùng."""
+        key = thumbnail_key(video_path, size, mtime)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        if key not in self._touched:
+            try:
+                os.utime(path)  # giữ thứ tự LRU qua các lần mở app
+            except OSError:
+                with self._lock:
+                    self._forget(key)
+                return None
+            self._touched.add(key)
+        return path
+
+    def request(self, video_path: str, size: Optional[int] = None, mtime: Optional[float] = None,
+                callback: Optional[ThumbnailCallback] = None) -> Optional[Future]:
+        """Extract nền nếu chưa có. callback chạy trên thread của pool (không phải GUI).
+
+        Trả về Future[Optional[Path]] (xong sau khi cache đã cập nhật), hoặc None nếu
+        đã có trong cache / video này đã extract lỗi.
+        """
+        key = thumbnail_key(video_path, size, mtime)
+        with self._lock:
+            if key in self._entries or key in self._failed:
+                return None
+            done = self._pending.get(key)
+            if done is None:
+                if self._pool is None:
+                    # spawn: fork từ process đang có thread (Qt, history writer) có thể deadlock
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+                done = Future()
+                self._pending[key] = done
+                job = self._pool.submit(self._extractor, video_path, str(self._path(key)), THUMB_WIDTH)
+                job.add_done_callback(lambda f: self._on_extracted(key, f, done))
+        if callback:
+            done.add_done_callback(lambda f: callback(video_path, f.result()))
+        return done
+
+    def _on_extracted(self, key: str, job: Future, done: Future) -> None:
+        try:
+            ok = not job.cancelled() and job.result()
+        except Exception as e:
+            print(f"[Thumbnails] Extract failed: {e}")
+            ok = False
+        size = 0
+        if ok:
+            try:
+                size = self._path(key).stat().st_size
+            except OSError:
+                ok = False
+        with self._lock:
+            self._pending.pop(key, None)
+            if ok:
+                self._entries[key] = size
+                self._total += size
+                self._evict(keep=key)
+            else:
+                self._failed.add(key)
+            ok = key in self._entries
+        done.set_result(self._path(key) if ok else None)
+
+    def _forget(self, key: str) -> None:
+        self._total -= self._entries.pop(key, 0)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Xóa thumbnail ít dùng nhất tới khi tổng dung lượng <= max_bytes (gọi khi giữ lock)"""
+        while self._total > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep and len(self._entries) == 1:
+                break
+            self._forget(key)
+            self._path(key).unlink(missing_ok=True)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def shutdown(self) -> None:
+        """Hủy các extract đang chờ, dừng process pool"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
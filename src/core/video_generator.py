@@ -9,6 +9,10 @@ from datetime import datetime
 from typing import Optional, Callable, Dict, Any, List, Tuple
 
 from .models import Account, VideoSettings, VideoTask
+from .progress import ProgressCallback, ProgressReporter, Stage
+from .cdp_downloads import DownloadTracker, DownloadWatch, move_download
+from .download_sink import DownloadError, download_to_file
+from .mp4_check import is_complete_mp4, mp4_problem
 from .cf_solver import (
     CloudflareSolver, ChallengePlatform, CF_SOLVER_AVAILABLE,
     get_chrome_user_agent
@@ -25,6 +29,8 @@ IMAGINE_URL = "https://grok.com/imagine"
 from .paths import output_path as _output_path
 OUTPUT_DIR = _output_path()
 VIDEO_DOWNLOAD_URL = "https://imagine-public.x.ai/imagine-public/share-videos/{post_id}.mp4?cache=1"
+# Chrome tải vào đây (tên file = guid) rồi mới chuyển về đúng tên/thư mục output
+DOWNLOAD_STAGING_DIR = OUTPUT_DIR / ".downloads"
 
 
 class VideoGenerator:
@@ -627,35 +633,24 @@ class VideoGenerator:
                 'Referer': 'https://grok.com/',
             }
             
-            response = requests.get(url, cookies=cookies_dict, headers=headers, timeout=120, stream=True)
+            last_mb = 0
             
-            if response.status_code == 200:
-                total_size = int(response.headers.get('content-length', 0))
-                downloaded = 0
-                
-                with open(path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
-                            if total_size > 0 and on_status and downloaded % (1024 * 1024) < 8192:
-                                pct = int(downloaded * 100 / total_size)
-                                on_status(f"📥 Downloading... {pct}%")
-                
-                if path.exists() and os.path.getsize(path) > 10000:
-                    if on_status:
-                        size_mb = os.path.getsize(path) / (1024 * 1024)
-                        on_status(f"✅ Downloaded: {filename} ({size_mb:.1f} MB)")
-                    return str(path)
-                else:
-                    if on_status:
-                        on_status(f"⚠️ File too small or empty")
-                    return None
-            else:
-                if on_status:
-                    on_status(f"⚠️ Download failed: HTTP {response.status_code}")
-                return None
+            def on_progress(done, total):
+                nonlocal last_mb
+                if total and on_status and done // (1024 * 1024) > last_mb:
+                    last_mb = done // (1024 * 1024)
+                    on_status(f"📥 Downloading... {int(done * 100 / total)}%")
             
+            result = download_to_file(requests.get, url, path, headers, validate=mp4_problem,
+                                      cookies=cookies_dict, timeout=120, on_progress=on_progress)
+            if on_status:
+                on_status(f"✅ Downloaded: {filename} ({result.size / (1024 * 1024):.1f} MB)")
+            return result.path
+            
+        except DownloadError as e:
+            if on_status:
+                on_status(f"⚠️ Download failed: {e}")
+            return None
         except Exception as e:
             if on_status:
                 on_status(f"⚠️ Download error: {e}")
@@ -699,23 +694,10 @@ class VideoGenerator:
                 'Referer': 'https://grok.com/',
             }
             
-            response = requests.get(url, headers=headers, timeout=120, stream=True)
-            
-            if response.status_code == 200:
-                with open(path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                
-                if path.exists() and os.path.getsize(path) > 10000:
-                    if on_status:
-                        size_mb = os.path.getsize(path) / (1024 * 1024)
-                        on_status(f"✅ Downloaded: {filename} ({size_mb:.1f} MB)")
-                    return str(path)
-            
+            result = download_to_file(requests.get, url, path, headers, validate=mp4_problem, timeout=120)
             if on_status:
-                on_status(f"❌ Failed: HTTP {response.status_code}")
-            return None
+                on_status(f"✅ Downloaded: {filename} ({result.size / (1024 * 1024):.1f} MB)")
+            return result.path
                 
         except Exception as e:
             if on_status:
@@ -735,12 +717,15 @@ class MultiTabVideoGenerator:
         account: Account,
         num_tabs: int = 3,
         headless: bool = True,
-        on_status: Optional[Callable] = None
+        on_status: Optional[Callable] = None,
+        on_progress: Optional[ProgressCallback] = None
     ):
         self.account = account
         self.num_tabs = num_tabs
         self.headless = headless
         self.on_status = on_status
+        self.on_progress = on_progress
+        self._tab_reporters: Dict[int, ProgressReporter] = {}  # tab_id -> task đang chạy
         
         self.browser: Optional[zendriver.Browser] = None
         self.config: Optional[zendriver.Config] = None  # Store config for user_data_dir
@@ -749,6 +734,9 @@ class MultiTabVideoGenerator:
         self._running = True
         self._user_data_dir: Optional[str] = None  # Browser profile directory
         self._auto_video_disabled = False  # Track if auto-video setting was disabled (image mode)
+        # Download qua CDP event (dùng chung cho mọi tab); False = browser không hỗ trợ → quét file
+        self._downloads = DownloadTracker(DOWNLOAD_STAGING_DIR)
+        self._download_events = True
     
     def _log(self, msg: str, tab_id: int = -1):
         """Log message with optional tab ID"""
@@ -760,6 +748,12 @@ class MultiTabVideoGenerator:
         if self.on_status:
             self.on_status(self.account.email, full_msg)
     
+    def _progress(self, tab_id: int, stage: Stage, percent: Optional[int] = None, message: str = "", result=None):
+        """Phát ProgressEvent cho task đang chạy trên tab (generate_batch gắn task_id)"""
+        reporter = self._tab_reporters.get(tab_id)
+        if reporter:
+            reporter(stage, percent, message, result)
+    
     async def start(self) -> bool:
         """Start browser and create tabs.
         
@@ -1468,6 +1462,8 @@ class MultiTabVideoGenerator:
         Retry toàn bộ flow nếu bất kỳ bước nào thất bại (kể cả download).
         """
         MAX_RETRIES = 3
+        if retry_count:
+            self._progress(tab_id, Stage.RETRYING, message=f"{retry_count}/{MAX_RETRIES}")
         task = VideoTask(
             account_email=self.account.email,
             prompt=prompt,
@@ -1499,6 +1495,7 @@ class MultiTabVideoGenerator:
             
             # Step 3: Upload image
             self._log(f"📤 Uploading: {os.path.basename(image_path)}", tab_id)
+            self._progress(tab_id, Stage.UPLOADING)
             if not await self._upload_image_on_tab(tab, image_path, tab_id):
                 task.status = "failed"
                 task.error_message = "Upload failed"
@@ -1544,6 +1541,7 @@ class MultiTabVideoGenerator:
                 return task
             
             self._log("✏️ Filling prompt + settings...", tab_id)
+            self._progress(tab_id, Stage.CREATING_POST)
             if not await self._fill_prompt_and_submit_on_post_page(tab, prompt, settings, tab_id):
                 if retry_count < MAX_RETRIES:
                     self._log("⚠️ Submit failed, retrying...", tab_id)
@@ -1585,6 +1583,7 @@ class MultiTabVideoGenerator:
             
             # Step 7: Wait for video render
             self._log("⏳ Waiting for video render...", tab_id)
+            self._progress(tab_id, Stage.RENDERING)
             video_status = await self._wait_for_video_ready_on_tab(tab, tab_id, timeout=150)
             
             if video_status == 'rejected':
@@ -1602,11 +1601,13 @@ class MultiTabVideoGenerator:
             if video_status == 'ready':
                 # Share + Download
                 self._log("🔗 Creating share link...", tab_id)
+                self._progress(tab_id, Stage.SHARING)
                 await self._click_share_button_on_tab(tab, tab_id)
                 await asyncio.sleep(3)
                 
                 # Download với retry riêng (thử download lại 2 lần trước khi retry toàn bộ flow)
                 self._log("📥 Downloading video...", tab_id)
+                self._progress(tab_id, Stage.DOWNLOADING)
                 output_path = None
                 for dl_attempt in range(3):
                     output_path = await self._download_video_on_tab(tab, task, tab_id, custom_output_dir, custom_filename)
@@ -1689,6 +1690,8 @@ class MultiTabVideoGenerator:
     ) -> VideoTask:
         """Generate video on a specific tab with retry support"""
         MAX_RETRIES = 3
+        if retry_count:
+            self._progress(tab_id, Stage.RETRYING, message=f"{retry_count}/{MAX_RETRIES}")
         
         task = VideoTask(
             account_email=self.account.email,
@@ -1722,6 +1725,7 @@ class MultiTabVideoGenerator:
             
             # Step 3: Enter prompt
             self._log(f"✏️ Entering prompt: {prompt[:30]}...", tab_id)
+            self._progress(tab_id, Stage.CREATING_POST)
             if not await self._enter_prompt_on_tab(tab, prompt, tab_id):
                 task.status = "failed"
                 task.error_message = "Failed to enter prompt"
@@ -1761,6 +1765,7 @@ class MultiTabVideoGenerator:
             
             # Step 6: STAY on post page and wait for video to render
             self._log("⏳ Waiting for video to render...", tab_id)
+            self._progress(tab_id, Stage.RENDERING)
             video_status = await self._wait_for_video_ready_on_tab(tab, tab_id, timeout=150)
             
             # Handle rejected video - retry with same prompt
@@ -1780,11 +1785,13 @@ class MultiTabVideoGenerator:
             if video_status == 'ready':
                 # Step 7: Click share button to create share link (makes video downloadable)
                 self._log("🔗 Creating share link...", tab_id)
+                self._progress(tab_id, Stage.SHARING)
                 await self._click_share_button_on_tab(tab, tab_id)
                 await asyncio.sleep(3)
                 
                 # Step 8: Download video — retry download 3 lần trước khi retry toàn bộ flow
                 self._log("📥 Downloading video...", tab_id)
+                self._progress(tab_id, Stage.DOWNLOADING)
                 output_path = None
                 for dl_attempt in range(3):
                     output_path = await self._download_video_on_tab(tab, task, tab_id, custom_output_dir, custom_filename)
@@ -1979,9 +1986,10 @@ class MultiTabVideoGenerator:
         Smart CDP download với retry.
         
         Strategy:
-        - Mở tab mới → set_download_behavior → navigate to download URL
-        - Check file mỗi 2s (nhanh hơn 5s cũ)
-        - Nếu không thấy file sau 30s → close tab, thử lại (tối đa 3 CDP attempts)
+        - Mở tab mới → bật download event (Browser.downloadWillBegin/downloadProgress) → navigate to download URL
+        - Event completed → chuyển file staging (tên = guid) về expected_file ngay
+        - Browser không hỗ trợ event → set_download_behavior cũ + check file mỗi 2s
+        - Không xong → close tab, thử lại (tối đa 3 CDP attempts)
         - Mỗi attempt thử cả URL gốc và URL có &dl=1
         - Tìm file theo post_id pattern, không dùng newest
         
@@ -2012,7 +2020,7 @@ class MultiTabVideoGenerator:
         # Nếu file đã tồn tại (từ attempt trước hoặc lần chạy trước), return luôn
         if expected_file.exists():
             size = os.path.getsize(expected_file)
-            if size > 10000:
+            if is_complete_mp4(expected_file):
                 self._log(f"✅ File already exists: {filename} ({size//1024}KB)", tab_id)
                 return str(expected_file)
         
@@ -2025,7 +2033,7 @@ class MultiTabVideoGenerator:
                 for match_file in matches:
                     if os.path.exists(match_file):
                         size = os.path.getsize(match_file)
-                        if size > 10000:
+                        if is_complete_mp4(match_file):
                             # Move to expected location
                             if match_file != str(expected_file):
                                 try:
@@ -2060,21 +2068,35 @@ class MultiTabVideoGenerator:
                 download_tab = await self.browser.get(video_url, new_tab=True)
                 await asyncio.sleep(2)
                 
-                # Set download behavior to custom output dir
-                try:
-                    await download_tab.send(cdp.browser.set_download_behavior(
-                        behavior="allow",
-                        download_path=str(output_dir.absolute())
-                    ))
-                except Exception as e:
-                    self._log(f"   set_download_behavior error: {e}", tab_id)
+                # Bật download event (guid → file staging); không được thì set thư mục như cũ + quét file
+                watch = await self._expect_download(download_tab, post_id, tab_id)
+                if watch is None:
+                    try:
+                        await download_tab.send(cdp.browser.set_download_behavior(
+                            behavior="allow",
+                            download_path=str(output_dir.absolute())
+                        ))
+                    except Exception as e:
+                        self._log(f"   set_download_behavior error: {e}", tab_id)
                 
                 # Trigger download
                 self._log(f"   Triggering download...", tab_id)
                 await download_tab.get(dl_url)
                 
-                # Check file nhanh — mỗi 2s, timeout 30s per attempt
-                found_path = await self._wait_for_download_file(post_id, tab_id, timeout=30, output_dir=output_dir, expected_filename=filename)
+                if watch is not None:
+                    # Event báo xong → biết path ngay, không ngủ/glob
+                    result = await self._downloads.wait(watch, timeout=120, begin_timeout=30)
+                    found_path = None
+                    problem = mp4_problem(result.path) if result else None
+                    if result and problem is None:
+                        found_path = move_download(result, expected_file)
+                        self._log(f"   📥 {result.received_bytes // 1024}KB", tab_id)
+                    elif problem:
+                        self._log(f"   ⚠️ MP4 hỏng: {problem}", tab_id)
+                        self._downloads.remove_file(result)
+                else:
+                    # Fallback: check file mỗi 2s, timeout 30s per attempt
+                    found_path = await self._wait_for_download_file(post_id, tab_id, timeout=30, output_dir=output_dir, expected_filename=filename)
                 
                 # Close download tab
                 try:
@@ -2089,7 +2111,7 @@ class MultiTabVideoGenerator:
                 
                 # Attempt failed, sẽ retry
                 if attempt < MAX_CDP_ATTEMPTS - 1:
-                    self._log(f"⚠️ Download not found after 30s, will retry...", tab_id)
+                    self._log(f"⚠️ Download not finished, will retry...", tab_id)
                     await asyncio.sleep(2)
                     
             except Exception as e:
@@ -2105,9 +2127,29 @@ class MultiTabVideoGenerator:
         self._log(f"❌ Download failed after {MAX_CDP_ATTEMPTS} CDP attempts", tab_id)
         return None
     
+    async def _expect_download(self, tab, post_id: str, tab_id: int) -> Optional[DownloadWatch]:
+        """Bật download event trên tab + đăng ký chờ download của post_id.
+        
+        None nếu browser/zendriver không hỗ trợ event (dùng _wait_for_download_file).
+        """
+        if not self._download_events:
+            return None
+        try:
+            await self._downloads.attach(tab)
+        except Exception as e:
+            self._download_events = False
+            self._log(f"   Download events unavailable ({e}), fallback to file scan", tab_id)
+            return None
+        
+        def on_progress(watch: DownloadWatch):
+            self._progress(tab_id, Stage.DOWNLOADING, 90 + watch.percent * 9 // 100,
+                           f"{watch.received_bytes / 1048576:.1f}/{watch.total_bytes / 1048576:.1f}MB")
+        
+        return self._downloads.expect(post_id, on_progress)
+    
     async def _wait_for_download_file(self, post_id: str, tab_id: int, timeout: int = 30, output_dir: Path = None, expected_filename: str = None) -> Optional[str]:
         """
-        Check file download mỗi 2s, return path nếu tìm thấy.
+        Fallback khi không có download event: check file download mỗi 2s, return path nếu tìm thấy.
         Tìm theo post_id pattern — tránh lẫn giữa các tab.
         Cũng check file mới nhất trong folder nếu không tìm thấy theo post_id.
         
@@ -2136,15 +2178,11 @@ class MultiTabVideoGenerator:
             
             # Check exact expected file
             if expected_file.exists():
-                size = os.path.getsize(expected_file)
-                if size > 10000:
-                    # Chờ thêm 1s rồi check size stable
-                    await asyncio.sleep(1)
-                    new_size = os.path.getsize(expected_file)
-                    if new_size == size:
-                        return str(expected_file)
-                    # File đang download, chờ tiếp
-                    continue
+                # Box MP4 khớp đúng size file = tải xong, không cần chờ size đứng yên
+                if is_complete_mp4(expected_file):
+                    return str(expected_file)
+                # File đang download, chờ tiếp
+                continue
             
             # Check in all search directories
             for search_dir in search_dirs:
@@ -2166,22 +2204,19 @@ class MultiTabVideoGenerator:
                     matches = glob.glob(str(search_dir / pattern))
                     for match_file in matches:
                         if match_file.endswith('.mp4') and os.path.exists(match_file):
-                            size = os.path.getsize(match_file)
-                            if size > 10000:
-                                await asyncio.sleep(1)
-                                if os.path.getsize(match_file) == size:
-                                    # Move to expected location if different
-                                    if match_file != str(expected_file):
-                                        try:
-                                            import shutil
-                                            # Ensure target dir exists
-                                            expected_file.parent.mkdir(parents=True, exist_ok=True)
-                                            shutil.move(match_file, str(expected_file))
-                                            return str(expected_file)
-                                        except Exception as e:
-                                            self._log(f"   Move error: {e}", tab_id)
-                                            return match_file
-                                    return match_file
+                            if is_complete_mp4(match_file):
+                                # Move to expected location if different
+                                if match_file != str(expected_file):
+                                    try:
+                                        import shutil
+                                        # Ensure target dir exists
+                                        expected_file.parent.mkdir(parents=True, exist_ok=True)
+                                        shutil.move(match_file, str(expected_file))
+                                        return str(expected_file)
+                                    except Exception as e:
+                                        self._log(f"   Move error: {e}", tab_id)
+                                        return match_file
+                                return match_file
             
             # Fallback 2: Check file mới nhất được tạo sau khi bắt đầu download
             for search_dir in search_dirs:
@@ -2193,21 +2228,18 @@ class MultiTabVideoGenerator:
                     if recent_files:
                         # Lấy file mới nhất
                         newest = max(recent_files, key=lambda f: f.stat().st_mtime)
-                        size = os.path.getsize(newest)
-                        if size > 10000:
-                            await asyncio.sleep(1)
-                            if os.path.getsize(newest) == size:
-                                # Move về đúng vị trí expected nếu khác
-                                if str(newest) != str(expected_file):
-                                    try:
-                                        import shutil
-                                        expected_file.parent.mkdir(parents=True, exist_ok=True)
-                                        shutil.move(str(newest), str(expected_file))
-                                        return str(expected_file)
-                                    except Exception as e:
-                                        self._log(f"   Move error: {e}", tab_id)
-                                        return str(newest)
-                                return str(newest)
+                        if is_complete_mp4(newest):
+                            # Move về đúng vị trí expected nếu khác
+                            if str(newest) != str(expected_file):
+                                try:
+                                    import shutil
+                                    expected_file.parent.mkdir(parents=True, exist_ok=True)
+                                    shutil.move(str(newest), str(expected_file))
+                                    return str(expected_file)
+                                except Exception as e:
+                                    self._log(f"   Move error: {e}", tab_id)
+                                    return str(newest)
+                            return str(newest)
                 except Exception as e:
                     pass
             
@@ -2484,7 +2516,8 @@ class MultiTabVideoGenerator:
         settings: VideoSettings,
         on_task_complete: Optional[Callable] = None,
         max_retries: int = 3,
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        task_ids: Optional[List[str]] = None
     ) -> List[VideoTask]:
         """
         Generate multiple videos concurrently using all tabs.
@@ -2495,6 +2528,7 @@ class MultiTabVideoGenerator:
             on_task_complete: Callback when each task completes
             max_retries: Number of retries for failed tasks (default 3)
             output_dir: Base output directory for videos
+            task_ids: Id song song với prompts → ProgressEvent qua on_progress (None = không phát)
         
         Retry logic:
         - Task status "failed" → retry
@@ -2517,9 +2551,10 @@ class MultiTabVideoGenerator:
             else:
                 normalized.append((p, None, None, len(normalized) + 1))  # text-only
         
-        prompt_queue = list(normalized)
-        retry_queue: List[Tuple[Tuple[str, Optional[str], Optional[str], int], int]] = []  # (item, retry_count)
-        active_tasks: Dict[int, Tuple[asyncio.Task, Tuple[str, Optional[str], Optional[str], int], int]] = {}
+        keys = list(task_ids) if task_ids else [None] * len(normalized)
+        prompt_queue = list(zip(normalized, keys))
+        retry_queue: List[Tuple[Tuple[Tuple[str, Optional[str], Optional[str], int], Optional[str]], int]] = []  # ((item, task_id), retry_count)
+        active_tasks: Dict[int, Tuple[asyncio.Task, Tuple[str, Optional[str], Optional[str], int], int, Optional[str]]] = {}
         
         mode = "Image→Video" if any(img for _, img, _, _ in normalized) else "Text→Video"
         self._log(f"📋 Starting batch ({mode}): {len(normalized)} prompts, {len(self.tabs)} tabs")
@@ -2533,17 +2568,22 @@ class MultiTabVideoGenerator:
             # Start new tasks on ready tabs
             for tab_id in range(len(self.tabs)):
                 if tab_id not in active_tasks and self.tab_ready[tab_id]:
-                    item = None
+                    item, key = None, None
                     retry_count = 0
                     
                     if retry_queue:
-                        item, retry_count = retry_queue.pop(0)
+                        (item, key), retry_count = retry_queue.pop(0)
                         self._log(f"🔄 Retrying ({retry_count}/{max_retries}): {item[0][:30]}...", tab_id)
                     elif prompt_queue:
-                        item = prompt_queue.pop(0)
+                        item, key = prompt_queue.pop(0)
                         self._log(f"▶️ Starting: {item[0][:30]}...", tab_id)
                     
                     if item:
+                        if key is not None:
+                            self._tab_reporters[tab_id] = ProgressReporter(self.on_progress, key, self.account.email)
+                        else:
+                            self._tab_reporters.pop(tab_id, None)
+                        self._progress(tab_id, Stage.STARTED)
                         prompt_text, image_path, subfolder, stt = item
                         # Build custom filename: {stt}_{prompt_short}.mp4
                         prompt_short = re.sub(r'[^\w\s]', '', prompt_text)[:30].replace(' ', '_')
@@ -2574,7 +2614,7 @@ class MultiTabVideoGenerator:
                                     custom_filename=custom_filename
                                 )
                             )
-                        active_tasks[tab_id] = (task, item, retry_count)
+                        active_tasks[tab_id] = (task, item, retry_count, key)
             
             # Wait for any task to complete
             if active_tasks:
@@ -2586,15 +2626,18 @@ class MultiTabVideoGenerator:
                 for completed_task in done:
                     completed_tab_id = None
                     item_used = None
+                    key_used = None
                     retry_count = 0
                     
-                    for tid, (t, item, r) in list(active_tasks.items()):
+                    for tid, (t, item, r, k) in list(active_tasks.items()):
                         if t == completed_task:
                             completed_tab_id = tid
                             item_used = item
+                            key_used = k
                             retry_count = r
                             del active_tasks[tid]
                             break
+                    report = self._tab_reporters.get(completed_tab_id) if key_used else None
                     
                     try:
                         video_task = completed_task.result()
@@ -2608,9 +2651,15 @@ class MultiTabVideoGenerator:
                         if actually_failed and retry_count < max_retries and item_used:
                             reason = video_task.error_message or "no output file"
                             self._log(f"⚠️ Failed ({reason}), will retry ({retry_count + 1}/{max_retries})", completed_tab_id or -1)
-                            retry_queue.append((item_used, retry_count + 1))
+                            retry_queue.append(((item_used, key_used), retry_count + 1))
+                            if report:
+                                report(Stage.RETRYING, message=reason)
                         else:
                             results.append(video_task)
+                            if report:
+                                ok = video_task.status == "completed" and video_task.output_path
+                                report(Stage.COMPLETED if ok else Stage.FAILED,
+                                       message=video_task.error_message or "", result=video_task)
                             if on_task_complete:
                                 on_task_complete(video_task)
                             if video_task.status == "completed" and video_task.output_path:
@@ -2620,7 +2669,11 @@ class MultiTabVideoGenerator:
                     except Exception as e:
                         self._log(f"❌ Task error: {e}")
                         if retry_count < max_retries and item_used:
-                            retry_queue.append((item_used, retry_count + 1))
+                            retry_queue.append(((item_used, key_used), retry_count + 1))
+                            if report:
+                                report(Stage.RETRYING, message=str(e))
+                        elif report:
+                            report(Stage.FAILED, message=str(e))
             else:
                 await asyncio.sleep(0.5)
         
@@ -19,6 +19,7 @@ try:
 except ImportError:
     ZENDRIVER_AVAILABLE = False
 
+from .mp4_check import is_complete_mp4
 from .paths import output_path as _output_path
 OUTPUT_DIR = _output_path()
 
@@ -208,18 +209,16 @@ class APIVideoGenerator:
                     newest = max(mp4_files, key=os.path.getctime)
                     size = os.path.getsize(newest)
                     
-                    if size > 10000:
-                        await asyncio.sleep(2)
-                        new_size = os.path.getsize(newest)
-                        if new_size == size:
-                            try:
-                                await download_tab.close()
-                            except:
-                                pass
-                            
-                            size_mb = size / (1024 * 1024)
-                            self._log(f"✅ Downloaded: {os.path.basename(newest)} ({size_mb:.1f} MB)")
-                            return newest
+                    # Box MP4 khớp đúng size file = tải xong
+                    if is_complete_mp4(newest):
+                        try:
+                            await download_tab.close()
+                        except:
+                            pass
+                        
+                        size_mb = size / (1024 * 1024)
+                        self._log(f"✅ Downloaded: {os.path.basename(newest)} ({size_mb:.1f} MB)")
+                        return newest
                 
                 if i % 3 == 0:
                     self._log(f"   Waiting... ({i * 5}s)")
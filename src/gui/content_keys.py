@@ -0,0 +1,25 @@
+"""Content Keys - tính content_key (sha256 ảnh nguồn) trên thread nền trước khi chạy batch"""
+from PySide6.QtCore import QThread, Signal
+
+from ..core.result_cache import compute_keys
+
+
+class ContentKeyWorker(QThread):
+    computed = Signal(list)  # content_key theo đúng thứ tự items (None nếu lỗi)
+
+    def __init__(self, items, settings, image_index=None):
+        super().__init__()
+        self.items = items  # item queue của tab (list hoặc PromptItems), prompt ở vị trí 0
+        self.settings = settings
+        self.image_index = image_index  # vị trí image_path trong item (None = không có ảnh)
+
+    def run(self):
+        col = self.image_index
+        try:
+            keys = compute_keys((item[0], self.settings, item[col] if col is not None else None)
+                                for item in self.items)
+        except Exception as e:
+            print(f"[ContentKeys] Hash error: {e}")
+            keys = [None] * len(self.items)
+        if not self.isInterruptionRequested():  # app đang đóng → không tiếp tục _launch
+            self.computed.emit(keys)
@@ -0,0 +1,241 @@
+"""History Model - QAbstractTableModel cho bảng History
+
+Model chỉ giữ các VideoTask đã fetch (từng trang DEFAULT_PAGE_SIZE qua
+canFetchMore/fetchMore khi cuộn tới cuối) và format text/màu lúc view hỏi
+data() → chỉ các row đang hiển thị được render, history 100k row vẫn mở ngay.
+Filter/search chạy phía SQLite (set_query), không lọc trên model.
+Cột Preview lấy thumbnail từ ThumbnailCache — chưa có thì extract nền, xong
+mới báo dataChanged cho đúng row đó.
+"""
+import os
+from typing import Callable, Optional
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRectF, Signal
+from PySide6.QtGui import QColor, QPainter, QPixmap, QPixmapCache
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle, QApplication
+
+from ..core.history_manager import DEFAULT_PAGE_SIZE
+from ..core.models import VideoTask
+from ..core.thumbnails import ThumbnailCache
+
+# fetch(cursor, limit) -> (tasks, next_cursor); cursor None = trang đầu
+FetchFunc = Callable[[object, int], tuple[list[VideoTask], object]]
+
+COL_THUMB, COL_TIME, COL_ACCOUNT, COL_PROMPT, COL_STATUS, COL_FILE, COL_ACTION = range(7)
+COLUMNS = ["Preview", "Time", "Account", "Prompt", "Status", "File", "Action"]
+
+BADGE_COLOR_ROLE = Qt.UserRole + 1  # màu nền badge (BadgeDelegate)
+TASK_ROLE = Qt.UserRole + 2
+
+GREEN, RED, ORANGE, BLUE = "#27ae60", "#e74c3c", "#f39c12", "#3498db"
+
+
+class HistoryTableModel(QAbstractTableModel):
+    _thumbnail_ready = Signal(str)  # video_path — emit từ thread của pool
+    
+    def __init__(self, parent=None, page_size: int = DEFAULT_PAGE_SIZE,
+                 thumbnails: Optional[ThumbnailCache] = None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.thumbnails = thumbnails
+        self._thumbnail_ready.connect(self._on_thumbnail_ready)
+        self._tasks: list[VideoTask] = []
+        self._next_cursor = None
+        self._fetch: Optional[FetchFunc] = None
+        self._action_text: dict[str, str] = {}  # task_id → trạng thái tải (đè cột Action)
+
+    # ---- Query ----
+
+    def set_query(self, fetch: FetchFunc) -> None:
+        """Đổi filter/search → load lại từ trang đầu"""
+        self._fetch = fetch
+        tasks, next_cursor = fetch(None, self.page_size)
+        self.beginResetModel()
+        self._tasks, self._next_cursor = tasks, next_cursor
+        self.endResetModel()
+
+    def reload(self, limit: Optional[int] = None) -> None:
+        """Query lại các row đã load (history vừa thay đổi).
+
+        limit: chỉ lấy lại bấy nhiêu row đầu (vd tới hết vùng đang hiển thị),
+        phần còn lại fetchMore khi cuộn tới. None = toàn bộ số row đã load.
+        """
+        if self._fetch is None:
+            return
+        limit = max(limit if limit is not None else len(self._tasks), self.page_size)
+        tasks, next_cursor = self._fetch(None, limit)
+        self.beginResetModel()
+        self._tasks, self._next_cursor = tasks, next_cursor
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._next_cursor is not None
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid() or self._next_cursor is None or self._fetch is None:
+            return
+        tasks, next_cursor = self._fetch(self._next_cursor, self.page_size)
+        self._next_cursor = next_cursor
+        if not tasks:
+            return
+        start = len(self._tasks)
+        self.beginInsertRows(QModelIndex(), start, start + len(tasks) - 1)
+        self._tasks.extend(tasks)
+        self.endInsertRows()
+
+    def task_at(self, row: int) -> Optional[VideoTask]:
+        return self._tasks[row] if 0 <= row < len(self._tasks) else None
+
+    def set_action_text(self, task_id: str, text: Optional[str]) -> None:
+        """Hiện progress tải ở cột Action (None = về hiển thị mặc định)"""
+        if text is None:
+            self._action_text.pop(task_id, None)
+        else:
+            self._action_text[task_id] = text
+        row = self.row_of(task_id)
+        if row >= 0:
+            index = self.index(row, COL_ACTION)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole, BADGE_COLOR_ROLE])
+
+    def row_of(self, task_id: str) -> int:
+        for row, task in enumerate(self._tasks):
+            if task.id == task_id:
+                return row
+        return -1
+
+    # ---- QAbstractTableModel ----
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._tasks)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self._tasks[index.row()]
+        col = index.column()
+
+        if role == Qt.DisplayRole:
+            if col == COL_ACTION and task.id in self._action_text:
+                return self._action_text[task.id]
+            return self._display(task, col)
+        if role == Qt.ToolTipRole:
+            if col == COL_PROMPT:
+                return task.prompt
+            if col == COL_STATUS:
+                return task.error_message or None
+            if col == COL_FILE:
+                return task.output_path or None
+            return None
+        if role == BADGE_COLOR_ROLE:
+            if col == COL_ACTION and task.id in self._action_text:
+                return BLUE
+            return self._badge_color(task, col)
+        if role == Qt.TextAlignmentRole and col in (COL_STATUS, COL_ACTION):
+            return int(Qt.AlignCenter)
+        if role == Qt.DecorationRole and col == COL_THUMB:
+            return self._thumbnail(task)
+        if role == Qt.UserRole:
+            return task.id
+        if role == TASK_ROLE:
+            return task
+        return None
+
+    def _thumbnail(self, task: VideoTask) -> Optional[QPixmap]:
+        if not self.thumbnails or not task.output_path or not task.file_exists:
+            return None
+        # QPixmapCache trước → paint lại không hash/stat gì
+        cache_key = f"thumb:{task.output_path}|{task.file_size}|{task.file_mtime}"
+        pixmap = QPixmapCache.find(cache_key)
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        path = self.thumbnails.get(task.output_path, task.file_size, task.file_mtime)
+        if path is None:
+            # Chưa có → extract nền, view sẽ hỏi lại khi dataChanged
+            self.thumbnails.request(task.output_path, task.file_size, task.file_mtime,
+                                    lambda video_path, _: self._thumbnail_ready.emit(video_path))
+            return None
+        pixmap = QPixmap(str(path))
+        QPixmapCache.insert(cache_key, pixmap)
+        return pixmap
+    
+    def _on_thumbnail_ready(self, video_path: str) -> None:
+        for row, task in enumerate(self._tasks):
+            if task.output_path == video_path:
+                index = self.index(row, COL_THUMB)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+    
+    @staticmethod
+    def _display(task: VideoTask, col: int) -> str:
+        if col == COL_THUMB:
+            return ""
+        if col == COL_TIME:
+            return task.created_at.strftime("%m-%d %H:%M") if task.created_at else "-"
+        if col == COL_ACCOUNT:
+            return task.account_email.split('@')[0][:12]
+        if col == COL_PROMPT:
+            return task.prompt
+        if col == COL_STATUS:
+            return "✅" if task.status == "completed" else "❌"
+        if col == COL_FILE:
+            # Trạng thái file đọc từ cache (file_exists), không stat từng row
+            if task.output_path and task.file_exists is not False:
+                return "📁 " + os.path.basename(task.output_path)[:20]
+            return "-"
+        if col == COL_ACTION:
+            if task.output_path and task.file_exists:
+                return "✅ Ready"
+            if task.media_url:
+                return "⬇️ Download"
+            return "-"
+        return ""
+
+    @staticmethod
+    def _badge_color(task: VideoTask, col: int) -> Optional[str]:
+        if col == COL_STATUS:
+            return GREEN if task.status == "completed" else RED
+        if col == COL_FILE:
+            return GREEN if task.output_path and task.file_exists else None
+        if col == COL_ACTION:
+            if task.output_path and task.file_exists:
+                return GREEN
+            if task.media_url:
+                return ORANGE
+        return None
+
+
+class BadgeDelegate(QStyledItemDelegate):
+    """Vẽ ô dạng badge bo góc (màu từ BADGE_COLOR_ROLE, chữ trắng)"""
+
+    def paint(self, painter: QPainter, option, index):
+        color = index.data(BADGE_COLOR_ROLE)
+        if not color:
+            super().paint(painter, option, index)
+            return
+
+        # Nền selection/hover theo style hiện tại, không vẽ text mặc định
+        self.initStyleOption(option, index)
+        text = option.text
+        option.text = ""
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = QRectF(option.rect).adjusted(4, 4, -4, -4)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(color))
+        painter.drawRoundedRect(rect, 6, 6)
+        painter.setPen(QColor("white"))
+        align = index.data(Qt.TextAlignmentRole) or int(Qt.AlignVCenter | Qt.AlignLeft)
+        text_rect = rect.adjusted(6, 0, -6, 0)
+        elided = option.fontMetrics.elidedText(text, Qt.ElideRight, int(text_rect.width()))
+        painter.drawText(text_rect, int(align) | int(Qt.AlignVCenter), elided)
+        painter.restore()
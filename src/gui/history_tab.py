@@ -4,142 +4,102 @@ import subprocess
 import sys
 from datetime import datetime
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QAbstractItemView,
     QPushButton, QHeaderView, QMessageBox, QLabel, QFrame,
-    QLineEdit, QComboBox, QFileDialog
+    QLineEdit, QComboBox, QFileDialog, QMenu, QCheckBox, QSpinBox
 )
-from PySide6.QtCore import Qt, QThread, Signal
-from PySide6.QtGui import QColor, QFont
-from ..core.history_manager import HistoryManager
+from PySide6.QtCore import Qt, QThread, Signal, QTimer, QFileSystemWatcher, QItemSelectionModel, QSize
+from PySide6.QtGui import QFont
+from ..core.history_manager import HistoryManager, DEFAULT_PAGE_SIZE
+from ..core.history_export import ExportCancelled, format_from_path
+from ..core.file_status import reconcile_file_status
 from ..core.video_generator import VideoGenerator
+from ..core.thumbnails import ThumbnailCache, THUMB_WIDTH
+from ..core.download_queue import (
+    DownloadJob, DownloadQueue, needs_download, redownload_target, DONE, FAILED, CANCELED, QUEUED
+)
+from .history_model import (
+    HistoryTableModel, BadgeDelegate, COL_THUMB, COL_PROMPT, COL_STATUS, COL_FILE, COL_ACTION
+)
 
 
-class DownloadWorker(QThread):
-    status_update = Signal(str)
-    finished = Signal(str, str)
+class ExportWorker(QThread):
+    """Export history ở background thread (reader connection riêng của thread)"""
+    progress = Signal(int, int)  # rows_done, rows_total
+    finished = Signal(bool, str)  # ok, message
     
-    def __init__(self, task_id, post_id, email, prompt, cookies=None):
+    def __init__(self, history_manager, path, kind, filters):
         super().__init__()
-        self.task_id = task_id
-        self.post_id = post_id
-        self.email = email
-        self.prompt = prompt
-        self.cookies = cookies  # Account cookies for authentication
+        self.history_manager = history_manager
+        self.path = path
+        self.kind = kind
+        self.filters = filters
+        self._cancelled = False
+    
+    def cancel(self):
+        self._cancelled = True
     
     def run(self):
         try:
-            output_path = self._download_sync()
-            self.finished.emit(self.task_id, output_path or "")
+            count = self.history_manager.export(
+                self.path, format_from_path(self.path), kind=self.kind,
+                progress=self.progress.emit,
+                is_cancelled=lambda: self._cancelled,
+                **self.filters
+            )
+            self.finished.emit(True, f"Exported {count} records → {os.path.basename(self.path)}")
+        except ExportCancelled:
+            self.finished.emit(False, "Export cancelled")
         except Exception as e:
-            self.status_update.emit(f"Error: {e}")
-            import traceback
-            traceback.print_exc()
-            self.finished.emit(self.task_id, "")
-    
-    def _download_sync(self):
-        """
-        Download video using zendriver browser with CDP download behavior.
-        
-        Strategy:
-        1. Open browser and navigate to video URL
-        2. Set CDP download behavior to allow downloads
-        3. Navigate to video URL with dl=1 to trigger download
-        """
-        import asyncio
-        return asyncio.run(self._download_async())
-    
-    async def _download_async(self):
-        """Async download using zendriver"""
-        import zendriver
-        from zendriver import cdp
-        from ..core.cf_solver import get_chrome_user_agent
-        from ..core.video_generator import OUTPUT_DIR, VIDEO_DOWNLOAD_URL
-        import os
-        import glob
-        
-        video_url = VIDEO_DOWNLOAD_URL.format(post_id=self.post_id)
-        user_agent = get_chrome_user_agent()
-        
-        self.status_update.emit("🔄 Starting browser for download...")
-        
-        # Create browser
-        config = zendriver.Config(headless=True)
-        config.add_argument(f"--user-agent={user_agent}")
-        
-        browser = zendriver.Browser(config)
-        await browser.start()
-        
+            self.finished.emit(False, f"Export error: {e}")
+        finally:
+            self.history_manager.release_reader()
+
+
+class FileStatusScanner(QThread):
+    """Reconcile cache trạng thái file output với filesystem (background)"""
+    finished = Signal(int, list)  # số row thay đổi, thư mục chứa output
+    
+    def __init__(self, history_manager, prefixes=None):
+        super().__init__()
+        self.history_manager = history_manager
+        self.prefixes = prefixes or [None]  # None = quét toàn bộ
+    
+    def run(self):
+        changed, dirs = 0, set()
         try:
-            # Step 1: Inject cookies
-            self.status_update.emit("🍪 Injecting cookies...")
-            await browser.main_tab.get("https://grok.com/favicon.ico")
-            await asyncio.sleep(1)
-            
-            if self.cookies:
-                for name, value in self.cookies.items():
-                    try:
-                        await browser.main_tab.send(
-                            cdp.network.set_cookie(
-                                name=name,
-                                value=value,
-                                domain=".grok.com",
-                                path="/",
-                                secure=True,
-                                http_only=name in ['sso', 'sso-rw'],
-                            )
-                        )
-                    except:
-                        pass
-            
-            # Step 2: Navigate to video URL to get __cf_bm cookie
-            self.status_update.emit("🌐 Getting download cookie...")
-            await browser.get(video_url, new_tab=True)
-            await asyncio.sleep(5)
-            
-            # Step 3: Set download behavior
-            OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-            await browser.main_tab.send(cdp.browser.set_download_behavior(
-                behavior="allow",
-                download_path=str(OUTPUT_DIR.absolute())
-            ))
-            
-            # Step 4: Navigate to download URL
-            download_url = f"{video_url}&dl=1" if '?' in video_url else f"{video_url}?dl=1"
-            self.status_update.emit("📥 Downloading video...")
-            await browser.main_tab.get(download_url)
-            
-            # Wait for download to complete
-            for i in range(60):  # Max 5 minutes
-                await asyncio.sleep(5)
-                
-                # Check for downloaded file
-                mp4_files = glob.glob(str(OUTPUT_DIR / "*.mp4"))
-                if mp4_files:
-                    newest = max(mp4_files, key=os.path.getctime)
-                    size = os.path.getsize(newest)
-                    
-                    # Check if download is complete (file size stable)
-                    if size > 10000:
-                        await asyncio.sleep(2)
-                        new_size = os.path.getsize(newest)
-                        if new_size == size:  # Size stable = download complete
-                            size_mb = size / (1024 * 1024)
-                            self.status_update.emit(f"✅ Downloaded: {os.path.basename(newest)} ({size_mb:.1f} MB)")
-                            return newest
-                
-                if i % 6 == 0:
-                    self.status_update.emit(f"⏳ Downloading... ({i * 5}s)")
-            
-            self.status_update.emit("❌ Download timeout")
-            return None
-            
+            for prefix in self.prefixes:
+                try:
+                    n, found = reconcile_file_status(self.history_manager, prefix=prefix)
+                    changed += n
+                    dirs |= found
+                except Exception as e:
+                    print(f"[FileStatus] Scan error ({prefix or 'all'}): {e}")
+        finally:
+            self.history_manager.release_reader()
+        self.finished.emit(changed, sorted(dirs))
+
+
+class MissingDownloadsScanner(QThread):
+    """Lấy các video cần tải lại (+ cookies) bằng query SQL, ngoài GUI thread"""
+    finished = Signal(list, dict)  # tasks, task_id → cookies
+    
+    def __init__(self, history_manager):
+        super().__init__()
+        self.history_manager = history_manager
+    
+    def run(self):
+        tasks, cookies = [], {}
+        try:
+            for batch in self.history_manager.iter_missing_downloads():
+                for task in batch:
+                    tasks.append(task)
+                    cookies[task.id] = self.history_manager.get_task_cookies(task.id)
         except Exception as e:
-            self.status_update.emit(f"❌ Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+            print(f"[History] Missing scan error: {e}")
         finally:
-            await browser.stop()
+            self.history_manager.release_reader()
+        self.finished.emit(tasks, cookies)
 
 
 class GlassFrame(QFrame):
@@ -227,15 +187,55 @@ class StatCard(QFrame):
         self.value_label.setText(str(value))
 
 
+MAINTENANCE_INTERVAL_MS = 6 * 60 * 60 * 1000  # archive + incremental vacuum mỗi 6 giờ
+RECONCILE_INTERVAL_MS = 10 * 60 * 1000  # quét lại trạng thái file output mỗi 10 phút
+REFRESH_COALESCE_MS = 500  # gom các lần writer commit liên tiếp thành 1 lần refresh
+
+
 class HistoryTab(QWidget):
+    history_flushed = Signal()  # writer thread commit xong → refresh trên GUI thread
+    maintenance_done = Signal(object)  # Future của run_maintenance
+    download_update = Signal(object)  # DownloadJob — emit từ thread của DownloadQueue
+    
     def __init__(self, history_manager: HistoryManager):
         super().__init__()
         self.history_manager = history_manager
-        self.download_workers = {}
-        self.all_tasks = []
         self.is_dark = True
+        # Tải lại video bằng HTTP (không mở browser), số luồng cố định
+        self.download_update.connect(self._on_download_update)
+        self.downloads = DownloadQueue(on_update=self.download_update.emit)
         self._setup_ui()
-        self.refresh()
+        self._load_page()
+        self._update_stats()
+        # Writer commit mỗi flush_interval khi đang chạy batch/tải → gom lại, chỉ refresh khi tab hiển thị
+        self._refresh_pending = False
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(REFRESH_COALESCE_MS)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self.history_flushed.connect(self._schedule_refresh)
+        self.history_manager.add_flush_listener(self.history_flushed.emit)
+        
+        # Archive + incremental vacuum chạy nền trên writer thread
+        self.maintenance_done.connect(self._on_maintenance_done)
+        self._maintenance_timer = QTimer(self)
+        self._maintenance_timer.timeout.connect(self._run_maintenance)
+        self._maintenance_timer.start(MAINTENANCE_INTERVAL_MS)
+        QTimer.singleShot(60 * 1000, self._run_maintenance)
+        
+        # Trạng thái file output: watcher theo thư mục + reconcile định kỳ
+        self.fs_watcher = QFileSystemWatcher(self)
+        self.fs_watcher.directoryChanged.connect(self._on_output_dir_changed)
+        self._changed_dirs = set()
+        self._dir_change_timer = QTimer(self)
+        self._dir_change_timer.setSingleShot(True)
+        self._dir_change_timer.setInterval(1000)
+        self._dir_change_timer.timeout.connect(self._scan_changed_dirs)
+        self.file_scanner = None
+        self._reconcile_timer = QTimer(self)
+        self._reconcile_timer.timeout.connect(self._reconcile_file_status)
+        self._reconcile_timer.start(RECONCILE_INTERVAL_MS)
+        QTimer.singleShot(2000, self._reconcile_file_status)
     
     def _setup_ui(self):
         layout = QVBoxLayout(self)
@@ -250,8 +250,12 @@ class HistoryTab(QWidget):
         self.stat_completed = StatCard("✅ Success", "0", "#27ae60")
         self.stat_failed = StatCard("❌ Failed", "0", "#e74c3c")
         self.stat_today = StatCard("📅 Today", "0", "#9b59b6")
+        self.stat_avg = StatCard("⏱️ Avg Time", "-", "#f39c12")
+        self.stat_images = StatCard("🖼️ Images", "0", "#1abc9c")
+        self.stat_cards = [self.stat_total, self.stat_completed, self.stat_failed,
+                           self.stat_today, self.stat_avg, self.stat_images]
         
-        for stat in [self.stat_total, self.stat_completed, self.stat_failed, self.stat_today]:
+        for stat in self.stat_cards:
             stat.setFixedHeight(70)
             stats_layout.addWidget(stat)
         
@@ -266,17 +270,44 @@ class HistoryTab(QWidget):
         self.search_label = QLabel("🔍 Search:")
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Prompt or email...")
-        self.search_input.textChanged.connect(self._filter_table)
+        # Debounce: chỉ query khi ngừng gõ 250ms
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(250)
+        self._search_timer.timeout.connect(self._filter_table)
+        self.search_input.textChanged.connect(self._search_timer.start)
         
         self.status_label = QLabel("Status:")
         self.status_filter = QComboBox()
         self.status_filter.addItems(["All", "Success", "Failed"])
         self.status_filter.currentIndexChanged.connect(self._filter_table)
         
+        self.archive_search_cb = QCheckBox("🗄️ Archive")
+        self.archive_search_cb.setToolTip("Search trong history đã archive")
+        self.archive_search_cb.toggled.connect(self._filter_table)
+        
+        self.archive_label = QLabel("Archive after:")
+        self.archive_days = QSpinBox()
+        self.archive_days.setRange(0, 3650)
+        self.archive_days.setSuffix(" days")
+        self.archive_days.setSpecialValueText("Off")
+        self.archive_days.setToolTip("Tự động chuyển history cũ hơn N ngày sang file archive theo tháng")
+        self.archive_days.setValue(int(self.history_manager.get_setting("archive_after_days", "0") or 0))
+        self.archive_days.valueChanged.connect(
+            lambda v: self.history_manager.set_setting("archive_after_days", v)
+        )
+        self.archive_btn = QPushButton("🗄️ Archive now")
+        self.archive_btn.setCursor(Qt.PointingHandCursor)
+        self.archive_btn.clicked.connect(self._run_maintenance)
+        
         filter_layout.addWidget(self.search_label)
         filter_layout.addWidget(self.search_input, stretch=1)
+        filter_layout.addWidget(self.archive_search_cb)
         filter_layout.addWidget(self.status_label)
         filter_layout.addWidget(self.status_filter)
+        filter_layout.addWidget(self.archive_label)
+        filter_layout.addWidget(self.archive_days)
+        filter_layout.addWidget(self.archive_btn)
         
         self.filter_card = filter_card
         layout.addWidget(filter_card)
@@ -291,13 +322,28 @@ class HistoryTab(QWidget):
         self.table_title.setFont(QFont("Segoe UI", 12, QFont.Bold))
         table_layout.addWidget(self.table_title)
         
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(["Time", "Account", "Prompt", "Status", "File", "Action"])
-        self.table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.table.setColumnWidth(5, 100)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.ExtendedSelection)  # Enable multi-select
+        # Model/view: row chỉ được format khi hiển thị, trang sau fetch khi cuộn tới cuối
+        from ..core.paths import data_path
+        self.thumbnails = ThumbnailCache(data_path("thumbnails"))
+        self.model = HistoryTableModel(self, page_size=DEFAULT_PAGE_SIZE, thumbnails=self.thumbnails)
+        self.model.rowsInserted.connect(self._update_count_label)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.badge_delegate = BadgeDelegate(self.table)
+        for col in (COL_STATUS, COL_FILE, COL_ACTION):
+            self.table.setItemDelegateForColumn(col, self.badge_delegate)
+        self.table.horizontalHeader().setSectionResizeMode(COL_PROMPT, QHeaderView.Stretch)
+        self.table.setColumnWidth(COL_ACTION, 100)
+        thumb_height = THUMB_WIDTH * 9 // 32  # 16:9, nửa kích thước
+        self.table.setIconSize(QSize(THUMB_WIDTH // 2, thumb_height))
+        self.table.setColumnWidth(COL_THUMB, THUMB_WIDTH // 2 + 12)
+        # Row height cố định → view không phải đo từng row
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(thumb_height + 8)
+        self.table.verticalHeader().hide()
+        self.table.setWordWrap(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)  # Enable multi-select
         self.table.doubleClicked.connect(self._open_video)
         table_layout.addWidget(self.table)
         
@@ -314,10 +360,20 @@ class HistoryTab(QWidget):
         self.delete_btn = QPushButton("🗑️ Delete")
         
         self.refresh_btn.clicked.connect(self.refresh)
-        self.download_btn.clicked.connect(self._download_selected)
+        self.download_menu = QMenu(self)
+        self.download_menu.addAction("⬇️ Selected", self._download_selected)
+        self.download_menu.addAction("⬇️ All missing", self._download_all_missing)
+        self.download_btn.setMenu(self.download_menu)
+        self.download_btn.clicked.connect(self.downloads.cancel_all)  # chỉ khi đang tải (không có menu)
         self.open_btn.clicked.connect(self._open_video)
         self.folder_btn.clicked.connect(self._open_folder)
-        self.export_btn.clicked.connect(self._export_csv)
+        self.export_menu = QMenu(self)
+        self.export_menu.addAction("🎬 Video history", lambda: self._export("video"))
+        self.export_menu.addAction("🖼️ Image history", lambda: self._export("image"))
+        self.export_btn.setMenu(self.export_menu)
+        self.export_btn.clicked.connect(self._cancel_export)  # chỉ khi đang export (không có menu)
+        self.export_worker = None
+        self.missing_scanner = None
         self.select_all_btn.clicked.connect(self._toggle_select_all)
         self.delete_btn.clicked.connect(self._delete_selected)
         
@@ -327,6 +383,9 @@ class HistoryTab(QWidget):
             btn_layout.addWidget(btn)
         
         btn_layout.addStretch()
+        
+        self.page_label = QLabel("")
+        btn_layout.addWidget(self.page_label)
         table_layout.addLayout(btn_layout)
         
         self.status_label_bottom = QLabel("")
@@ -342,7 +401,7 @@ class HistoryTab(QWidget):
         self._apply_theme()
     
     def _apply_theme(self):
-        for stat in [self.stat_total, self.stat_completed, self.stat_failed, self.stat_today]:
+        for stat in self.stat_cards:
             stat.set_dark(self.is_dark)
         
         self.filter_card.set_dark(self.is_dark)
@@ -351,15 +410,15 @@ class HistoryTab(QWidget):
         if self.is_dark:
             text_color = "white"
             table_style = """
-                QTableWidget {
+                QTableView {
                     background: rgba(20, 30, 50, 150);
                     color: white;
                     border: 1px solid rgba(100, 150, 255, 50);
                     border-radius: 8px;
                     gridline-color: rgba(100, 150, 255, 30);
                 }
-                QTableWidget::item { padding: 6px; }
-                QTableWidget::item:selected { background: rgba(100, 150, 255, 100); }
+                QTableView::item { padding: 6px; }
+                QTableView::item:selected { background: rgba(100, 150, 255, 100); }
                 QHeaderView::section {
                     background: rgba(40, 50, 70, 200);
                     color: white;
@@ -391,15 +450,15 @@ class HistoryTab(QWidget):
         else:
             text_color = "#333"
             table_style = """
-                QTableWidget {
+                QTableView {
                     background: white;
                     color: #333;
                     border: 1px solid rgba(100, 150, 200, 80);
                     border-radius: 8px;
                     gridline-color: rgba(100, 150, 200, 50);
                 }
-                QTableWidget::item { padding: 6px; }
-                QTableWidget::item:selected { background: rgba(100, 150, 255, 100); }
+                QTableView::item { padding: 6px; }
+                QTableView::item:selected { background: rgba(100, 150, 255, 100); }
                 QHeaderView::section {
                     background: rgba(240, 245, 255, 250);
                     color: #333;
@@ -429,14 +488,17 @@ class HistoryTab(QWidget):
                 QPushButton:hover { background: #f5f5f5; }
             """
         
-        for label in [self.search_label, self.status_label, self.table_title, self.status_label_bottom]:
+        for label in [self.search_label, self.status_label, self.table_title,
+                      self.status_label_bottom, self.page_label, self.archive_label,
+                      self.archive_search_cb]:
             label.setStyleSheet(f"color: {text_color};")
         
         self.table.setStyleSheet(table_style)
         self.search_input.setStyleSheet(input_style)
         self.status_filter.setStyleSheet(input_style)
+        self.archive_days.setStyleSheet(input_style.replace("QLineEdit, QComboBox", "QSpinBox"))
         
-        for btn in [self.refresh_btn, self.export_btn]:
+        for btn in [self.refresh_btn, self.export_btn, self.archive_btn]:
             btn.setStyleSheet(btn_style)
         
         self.select_all_btn.setStyleSheet("""
@@ -478,85 +540,165 @@ class HistoryTab(QWidget):
 
     
     def refresh(self):
-        self.all_tasks = self.history_manager.get_all_history()
-        self._update_table(self.all_tasks)
+        """Reload dữ liệu (giữ vùng đang hiển thị, vị trí cuộn và selection)"""
+        self._refresh_pending = False
+        self._refresh_timer.stop()
+        self._reload_table()
         self._update_stats()
     
-    def _update_table(self, tasks):
-        self.table.setRowCount(len(tasks))
-        
-        for i, task in enumerate(tasks):
-            time_str = task.created_at.strftime("%m-%d %H:%M") if task.created_at else "-"
-            time_item = QTableWidgetItem(time_str)
-            time_item.setData(Qt.UserRole, task.id)
-            self.table.setItem(i, 0, time_item)
-            
-            email_short = task.account_email.split('@')[0][:12]
-            self.table.setItem(i, 1, QTableWidgetItem(email_short))
-            
-            prompt_short = task.prompt[:50] + "..." if len(task.prompt) > 50 else task.prompt
-            prompt_item = QTableWidgetItem(prompt_short)
-            prompt_item.setToolTip(task.prompt)
-            self.table.setItem(i, 2, prompt_item)
-            
-            if task.status == "completed":
-                status_item = QTableWidgetItem("✅")
-                status_item.setBackground(QColor("#27ae60"))
-            else:
-                status_item = QTableWidgetItem("❌")
-                status_item.setBackground(QColor("#e74c3c"))
-                if task.error_message:
-                    status_item.setToolTip(task.error_message)
-            status_item.setForeground(QColor("white"))
-            self.table.setItem(i, 3, status_item)
-            
-            if task.output_path and os.path.exists(task.output_path):
-                file_item = QTableWidgetItem("📁 " + os.path.basename(task.output_path)[:20])
-                file_item.setToolTip(task.output_path)
-                file_item.setBackground(QColor("#27ae60"))
-                file_item.setForeground(QColor("white"))
-            else:
-                file_item = QTableWidgetItem("-")
-            self.table.setItem(i, 4, file_item)
-            
-            if task.output_path and os.path.exists(task.output_path):
-                action_item = QTableWidgetItem("✅ Ready")
-                action_item.setBackground(QColor("#27ae60"))
-            elif task.media_url:
-                action_item = QTableWidgetItem("⬇️ Download")
-                action_item.setBackground(QColor("#f39c12"))
-            else:
-                action_item = QTableWidgetItem("-")
-            action_item.setForeground(QColor("white"))
-            self.table.setItem(i, 5, action_item)
+    def _schedule_refresh(self):
+        if not self.isVisible():
+            self._refresh_pending = True  # refresh khi mở lại tab
+        elif not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._refresh_pending:
+            self.refresh()
+    
+    def _current_filters(self) -> dict:
+        status = self.status_filter.currentText()
+        return {
+            "status": {"Success": "completed", "Failed": "failed"}.get(status),
+            "text": self.search_input.text().strip() or None,
+        }
+    
+    def _query_fetcher(self):
+        """fetch(cursor, limit) theo filter/search hiện tại — model gọi khi cần thêm row"""
+        filters = self._current_filters()
+        text = filters.pop("text")
+        if text and self.archive_search_cb.isChecked():
+            # Search trong các file archive theo tháng
+            return lambda cursor, limit: self.history_manager.search_archives(
+                text, limit=limit, offset=cursor or 0, **filters
+            )
+        if text:
+            # Search → FTS5, xếp theo độ liên quan, cursor = offset
+            return lambda cursor, limit: self.history_manager.search(
+                text, limit=limit, offset=cursor or 0, **filters
+            )
+        return lambda cursor, limit: self.history_manager.query_history(
+            limit=limit, after=cursor, **filters
+        )
+    
+    def _load_page(self):
+        """Filter/search đổi → query lại từ đầu"""
+        self.model.set_query(self._query_fetcher())
+        self.table.scrollToTop()
+        self._update_count_label()
+    
+    def _reload_table(self):
+        selected = {self.model.task_at(i.row()).id for i in self.table.selectionModel().selectedRows()}
+        scroll = self.table.verticalScrollBar().value()
+        # Chỉ query lại tới row cuối đang hiển thị, phần dưới fetchMore khi cuộn tới
+        last_visible = self.table.rowAt(self.table.viewport().height() - 1)
+        self.model.reload(last_visible + 1 if last_visible >= 0 else None)
+        if selected:
+            selection = self.table.selectionModel()
+            for row in range(self.model.rowCount()):
+                if self.model.task_at(row).id in selected:
+                    selection.select(self.model.index(row, 0),
+                                     QItemSelectionModel.Select | QItemSelectionModel.Rows)
+        self.table.verticalScrollBar().setValue(scroll)
+        self._update_count_label()
+    
+    def _update_count_label(self, *args):
+        filters = self._current_filters()
+        text = filters.pop("text")
+        loaded = self.model.rowCount()
+        if text and self.archive_search_cb.isChecked():
+            self.page_label.setText(f"{loaded} loaded · 🗄️ archive")
+        else:
+            total = self.history_manager.count_history(text=text, **filters)
+            self.page_label.setText(f"{loaded} / {total} records")
+    
+    def _run_maintenance(self):
+        if getattr(self, "_maintenance_future", None) and not self._maintenance_future.done():
+            return
+        self.archive_btn.setEnabled(False)
+        future = self.history_manager.run_maintenance(archive_after_days=self.archive_days.value())
+        self._maintenance_future = future
+        future.add_done_callback(self.maintenance_done.emit)
+    
+    def _on_maintenance_done(self, future):
+        self.archive_btn.setEnabled(True)
+        try:
+            result = future.result()
+        except Exception as e:
+            self.status_label_bottom.setText(f"❌ Archive error: {e}")
+            return
+        moved = sum(result["archived"].values())
+        if moved:
+            months = ", ".join(sorted(result["archived"]))
+            self.status_label_bottom.setText(f"🗄️ Archived {moved} records ({months})")
+    
+    def _reconcile_file_status(self, prefixes=None):
+        if self.file_scanner and self.file_scanner.isRunning():
+            if prefixes:
+                # Đang quét → gom lại, quét sau
+                self._changed_dirs.update(prefixes)
+                self._dir_change_timer.start()
+            return
+        self.file_scanner = FileStatusScanner(self.history_manager, prefixes)
+        self.file_scanner.finished.connect(self._on_file_scan_done)
+        self.file_scanner.start()
+    
+    def _on_output_dir_changed(self, path):
+        self._changed_dirs.add(path)
+        self._dir_change_timer.start()  # debounce: gom các event trong 1s
+    
+    def _scan_changed_dirs(self):
+        dirs, self._changed_dirs = sorted(self._changed_dirs), set()
+        if dirs:
+            self._reconcile_file_status(dirs)
+    
+    def _on_file_scan_done(self, changed, dirs):
+        from ..core.paths import output_path
+        watch = set(dirs)
+        root = output_path()
+        if root.exists():
+            watch.add(str(root))
+        new_dirs = [d for d in watch if d not in set(self.fs_watcher.directories()) and os.path.isdir(d)]
+        if new_dirs:
+            self.fs_watcher.addPaths(new_dirs)
+        # changed > 0 → writer commit → history_flushed → refresh
+    
+    @staticmethod
+    def _format_duration(seconds):
+        if seconds is None:
+            return "-"
+        return f"{seconds / 60:.1f}m" if seconds >= 60 else f"{seconds:.0f}s"
     
     def _update_stats(self):
-        total = len(self.all_tasks)
-        completed = sum(1 for t in self.all_tasks if t.status == "completed")
-        failed = sum(1 for t in self.all_tasks if t.status == "failed")
-        today = datetime.now().date()
-        today_count = sum(1 for t in self.all_tasks if t.created_at and t.created_at.date() == today)
-        
-        self.stat_total.set_value(total)
-        self.stat_completed.set_value(completed)
-        self.stat_failed.set_value(failed)
-        self.stat_today.set_value(today_count)
+        stats = self.history_manager.get_stats()
+        image_stats = self.history_manager.get_stats(kind="image")
+        
+        self.stat_total.set_value(stats.overall.total)
+        self.stat_completed.set_value(stats.overall.completed)
+        self.stat_failed.set_value(stats.overall.failed)
+        self.stat_today.set_value(stats.today.total)
+        self.stat_avg.set_value(self._format_duration(stats.overall.avg_duration))
+        self.stat_images.set_value(image_stats.overall.total)
+        
+        # Tooltip: breakdown theo account / 7 ngày gần nhất
+        by_account = sorted(stats.by_account.items(), key=lambda kv: -kv[1].total)
+        self.stat_total.setToolTip("\n".join(
+            f"{email or '-'}: {b.total} (✅ {b.completed} / ❌ {b.failed}, "
+            f"⏱️ {self._format_duration(b.avg_duration)})"
+            for email, b in by_account[:20]
+        ))
+        recent_days = sorted(stats.by_day.items(), reverse=True)[:7]
+        self.stat_today.setToolTip("\n".join(
+            f"{day or '-'}: {b.total} (✅ {b.completed} / ❌ {b.failed})" for day, b in recent_days
+        ))
+        self.stat_images.setToolTip(
+            f"✅ {image_stats.overall.completed} / ❌ {image_stats.overall.failed} · "
+            f"Today: {image_stats.today.total}"
+        )
     
     def _filter_table(self):
-        search = self.search_input.text().lower()
-        status = self.status_filter.currentText()
-        
-        filtered = []
-        for task in self.all_tasks:
-            if search and search not in task.prompt.lower() and search not in task.account_email.lower():
-                continue
-            if status == "Success" and task.status != "completed":
-                continue
-            if status == "Failed" and task.status != "failed":
-                continue
-            filtered.append(task)
-        
-        self._update_table(filtered)
+        self._load_page()
     
     def _open_folder(self):
         from ..core.paths import output_path
@@ -570,12 +712,9 @@ class HistoryTab(QWidget):
             subprocess.run(["xdg-open", output_dir])
     
     def _open_video(self):
-        row = self.table.currentRow()
-        if row < 0:
-            return
-        path_item = self.table.item(row, 4)
-        if path_item:
-            file_path = path_item.toolTip()
+        task = self.model.task_at(self.table.currentIndex().row())
+        if task:
+            file_path = task.output_path
             if file_path and os.path.exists(file_path):
                 if sys.platform == "darwin":
                     subprocess.run(["open", file_path])
@@ -584,22 +723,42 @@ class HistoryTab(QWidget):
                 else:
                     subprocess.run(["xdg-open", file_path])
     
-    def _export_csv(self):
-        if not self.all_tasks:
+    def _export(self, kind):
+        if self.export_worker and self.export_worker.isRunning():
+            return
+        # Video: export theo filter đang chọn; Image: toàn bộ
+        filters = self._current_filters() if kind == "video" else {}
+        if not self.history_manager.count_history(kind=kind, **filters):
             QMessageBox.information(self, "Info", "No data to export")
             return
-        file_path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "history.csv", "CSV (*.csv)")
-        if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write("Time,Account,Prompt,Status,File\n")
-                    for task in self.all_tasks:
-                        time_str = task.created_at.strftime("%Y-%m-%d %H:%M") if task.created_at else ""
-                        prompt = task.prompt.replace('"', '""')
-                        f.write(f'"{time_str}","{task.account_email}","{prompt}","{task.status}","{task.output_path or ""}"\n')
-                QMessageBox.information(self, "Success", f"Exported {len(self.all_tasks)} records")
-            except Exception as e:
-                QMessageBox.warning(self, "Error", str(e))
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export History", f"{kind}_history.csv",
+            "CSV (*.csv);;JSON Lines (*.jsonl);;Parquet (*.parquet)"
+        )
+        if not file_path:
+            return
+        
+        worker = ExportWorker(self.history_manager, file_path, kind, filters)
+        worker.progress.connect(self._on_export_progress)
+        worker.finished.connect(self._on_export_done)
+        self.export_worker = worker
+        self.export_btn.setMenu(None)
+        self.export_btn.setText("⏹ Cancel Export")
+        worker.start()
+    
+    def _cancel_export(self):
+        if self.export_worker and self.export_worker.isRunning():
+            self.export_worker.cancel()
+    
+    def _on_export_progress(self, done, total):
+        pct = done * 100 // total if total else 100
+        self.status_label_bottom.setText(f"📥 Exporting... {done:,}/{total:,} ({pct}%)")
+    
+    def _on_export_done(self, ok, message):
+        self.export_worker = None
+        self.export_btn.setText("📥 Export")
+        self.export_btn.setMenu(self.export_menu)
+        self.status_label_bottom.setText(("✅ " if ok else "❌ ") + message)
     
     def _delete_selected(self):
         """Delete multiple selected records"""
@@ -611,12 +770,9 @@ class HistoryTab(QWidget):
         # Get all task IDs from selected rows
         task_ids = []
         for index in selected_rows:
-            row = index.row()
-            item = self.table.item(row, 0)
-            if item:
-                task_id = item.data(Qt.UserRole)
-                if task_id:
-                    task_ids.append(task_id)
+            task = self.model.task_at(index.row())
+            if task:
+                task_ids.append(task.id)
         
         if not task_ids:
             return
@@ -635,8 +791,8 @@ class HistoryTab(QWidget):
                 except Exception as e:
                     print(f"Error deleting {task_id}: {e}")
             
+            # Writer commit → history_flushed → refresh (không chờ writer trên GUI thread)
             self.status_label_bottom.setText(f"🗑️ Deleted {deleted} record{'s' if deleted > 1 else ''}")
-            self.refresh()
     
     def _toggle_select_all(self):
         """Toggle select all / deselect all"""
@@ -650,54 +806,87 @@ class HistoryTab(QWidget):
             self.select_all_btn.setText("☐ Deselect")
     
     def _download_selected(self):
-        row = self.table.currentRow()
-        if row < 0:
-            QMessageBox.warning(self, "Error", "Select a video to download")
-            return
-        task_id = self.table.item(row, 0).data(Qt.UserRole)
-        task = next((t for t in self.all_tasks if t.id == task_id), None)
-        if not task:
+        tasks = [self.model.task_at(i.row()) for i in self.table.selectionModel().selectedRows()]
+        if not tasks:
+            task = self.model.task_at(self.table.currentIndex().row())
+            tasks = [task] if task else []
+        if not tasks:
+            QMessageBox.warning(self, "Error", "Select videos to download")
             return
-        if task.output_path and os.path.exists(task.output_path):
-            QMessageBox.information(self, "Info", "Video already downloaded")
+        missing = [t for t in tasks if needs_download(t)]
+        if not missing:
+            QMessageBox.information(self, "Info", "Selected videos are already downloaded or have no URL")
             return
-        if not task.media_url:
-            QMessageBox.warning(self, "Error", "No URL available")
-            return
-        self._start_download(task)
+        self._queue_downloads(missing)
     
-    def _start_download(self, task):
-        if task.id in self.download_workers:
+    def _download_all_missing(self):
+        if self.missing_scanner and self.missing_scanner.isRunning():
             return
-        
-        # Extract post_id from media_url or use post_id directly
-        post_id = task.post_id
-        if not post_id and task.media_url:
-            import re
-            match = re.search(r'/([a-f0-9-]{36})\.mp4', task.media_url)
-            if match:
-                post_id = match.group(1)
-        
-        if not post_id:
-            QMessageBox.warning(self, "Error", "No post ID available")
+        self.status_label_bottom.setText("🔍 Finding missing videos...")
+        self.missing_scanner = MissingDownloadsScanner(self.history_manager)
+        self.missing_scanner.finished.connect(self._on_missing_found)
+        self.missing_scanner.start()
+    
+    def _on_missing_found(self, missing, cookies):
+        self.missing_scanner = None
+        self.status_label_bottom.setText("")
+        if not missing:
+            QMessageBox.information(self, "Info", "No missing videos")
             return
+        reply = QMessageBox.question(
+            self, "Download", f"Download {len(missing)} missing video(s)?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self._queue_downloads(missing, cookies)
+    
+    def _queue_downloads(self, tasks, cookies=None):
+        """cookies: task_id → cookies đã đọc sẵn (None = đọc từng task, chỉ dùng cho selection nhỏ)"""
+        from ..core.grok_api import USER_AGENT
+        from ..core.video_generator import OUTPUT_DIR, VIDEO_DOWNLOAD_URL
         
-        # Get cookies from task (saved during generation)
-        cookies = task.account_cookies
-        
-        worker = DownloadWorker(task.id, post_id, task.account_email, task.prompt, cookies)
-        worker.status_update.connect(lambda msg: self.status_label_bottom.setText(f"⬇️ {msg}"))
-        worker.finished.connect(self._on_download_done)
-        self.download_workers[task.id] = worker
-        worker.start()
-        self.status_label_bottom.setText(f"⬇️ Downloading: {task.prompt[:30]}...")
-    
-    def _on_download_done(self, task_id, output_path):
-        if task_id in self.download_workers:
-            del self.download_workers[task_id]
-        if output_path:
-            self.history_manager.update_output_path(task_id, output_path)
-            self.status_label_bottom.setText(f"✅ Downloaded: {os.path.basename(output_path)}")
+        queued = 0
+        for task in tasks:
+            if self.downloads.is_active(task.id):
+                continue
+            url, dest = redownload_target(task, OUTPUT_DIR, VIDEO_DOWNLOAD_URL)
+            headers = {"User-Agent": USER_AGENT, "Accept": "*/*", "Referer": "https://grok.com/"}
+            # Cookies (lưu lúc generate) chỉ cần cho link không public
+            task_cookies = (cookies.get(task.id) if cookies is not None
+                            else self.history_manager.get_task_cookies(task.id))
+            if task_cookies:
+                headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in task_cookies.items() if v)
+            self.downloads.submit(DownloadJob(task.id, url, dest, headers))
+            queued += 1
+        if queued:
+            self.download_btn.setMenu(None)
+            self._update_download_button()
+            self.status_label_bottom.setText(f"⬇️ Queued {queued} download{'s' if queued > 1 else ''}")
+    
+    def _update_download_button(self):
+        active = len(self.downloads.active())
+        if active:
+            self.download_btn.setText(f"⏹ Cancel ({active})")
+        else:
+            self.download_btn.setText("⬇️ Download")
+            self.download_btn.setMenu(self.download_menu)
+    
+    def _on_download_update(self, job):
+        if job.state == QUEUED:
+            self.model.set_action_text(job.task_id, "⏳ Queued")
+        elif job.state == DONE:
+            self.model.set_action_text(job.task_id, None)
+            # Writer commit → history_flushed → refresh (không chờ writer trên GUI thread)
+            self.history_manager.update_output_path(job.task_id, job.result.path, job.result.sha256)
+            size_mb = job.result.size / (1024 * 1024)
+            self.status_label_bottom.setText(f"✅ Downloaded: {os.path.basename(job.result.path)} ({size_mb:.1f} MB)")
+        elif job.state in (FAILED, CANCELED):
+            self.model.set_action_text(job.task_id, None)
+            if job.state == FAILED:
+                self.status_label_bottom.setText(f"❌ Download failed: {job.error}")
+        elif job.total_bytes:
+            self.model.set_action_text(job.task_id, f"⬇️ {job.percent}%")
         else:
-            self.status_label_bottom.setText("❌ Download failed")
-        self.refresh()
+            self.model.set_action_text(job.task_id, f"⬇️ {job.received_bytes / 1048576:.1f} MB")
+        if job.state in (DONE, FAILED, CANCELED):
+            self._update_download_button()
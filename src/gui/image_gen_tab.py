@@ -2,13 +2,15 @@
 import os
 import asyncio
 import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
+from uuid import uuid4
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QTextEdit, QComboBox, QPushButton, QMessageBox, QCheckBox,
     QFileDialog, QLabel, QTableWidget, QTableWidgetItem, QLineEdit,
-    QHeaderView, QSplitter, QFrame, QTabWidget, QProgressBar, QScrollArea
+    QHeaderView, QSplitter, QFrame, QTabWidget, QProgressBar, QScrollArea, QInputDialog
 )
 from PySide6.QtCore import Signal, QThread, Qt, QTimer, QTime
 from PySide6.QtGui import QColor, QFont
@@ -17,6 +19,15 @@ from ..core.account_manager import AccountManager
 from ..core.image_generator import MultiTabImageGenerator, ZENDRIVER_AVAILABLE
 from ..core.history_manager import HistoryManager
 from ..core.models import ImageSettings, ImageTask
+from ..core import run_log
+from ..core import job_journal
+from ..core.prompt_import import PromptItems
+from ..core.result_cache import image_output_stem, reuse_output
+from ..core.progress import ProgressEvent, ProgressReporter, Stage
+from .ui_updates import shared_scheduler
+from .log_view import LogView
+from .prompt_importer import PREVIEW_LINES, PromptImportWorker
+from .content_keys import ContentKeyWorker
 
 
 SETTINGS_FILE = None  # Resolved lazily via paths module
@@ -36,20 +47,23 @@ def _img_output_dir():
 # Shared prompt queue for all workers — ensures natural order
 class SharedPromptQueue:
     """Thread-safe queue để các account lấy prompt theo thứ tự."""
-    def __init__(self, prompts: list):
-        self._prompts = list(enumerate(prompts))  # [(index, prompt), ...]
+    def __init__(self, prompts, skip=()):
+        # prompts: list hoặc PromptItems — chỉ giữ hàng đợi index (index theo list gốc kể cả khi skip)
+        self._prompts = prompts
+        self._order = deque(i for i in range(len(prompts)) if i not in skip)
         self._lock = threading.Lock()
     
     def get_next(self):
         """Lấy prompt tiếp theo. Returns (index, prompt) or None if empty."""
         with self._lock:
-            if self._prompts:
-                return self._prompts.pop(0)
+            if self._order:
+                i = self._order.popleft()
+                return i, self._prompts[i]
             return None
     
     def is_empty(self):
         with self._lock:
-            return len(self._prompts) == 0
+            return len(self._order) == 0
 
 
 class NoScrollComboBox(QComboBox):
@@ -60,13 +74,15 @@ class NoScrollComboBox(QComboBox):
 class ImageAccountWorker(QThread):
     """Worker cho 1 account — lấy prompt từ shared queue theo thứ tự."""
     status_update = Signal(str, str)  # email, message
+    progress = Signal(object)  # ProgressEvent
     task_completed = Signal(str, int, object)  # email, prompt_index, ImageTask
     all_finished = Signal(str)  # email
 
-    def __init__(self, account, shared_queue, settings, output_dir, headless=True):
+    def __init__(self, account, shared_queue, settings, output_dir, headless=True, task_ids=None):
         super().__init__()
         self.account = account
         self.shared_queue = shared_queue  # SharedPromptQueue
+        self.task_ids = task_ids  # task_id theo prompt_index (dùng chung giữa các worker)
         self.settings = settings
         self.output_dir = output_dir
         self.headless = headless
@@ -91,7 +107,8 @@ class ImageAccountWorker(QThread):
             account=self.account,
             num_tabs=1,  # 1 tab per account for simplicity
             headless=self.headless,
-            on_status=lambda email, msg: self.status_update.emit(email, msg)
+            on_status=lambda email, msg: self.status_update.emit(email, msg),
+            on_progress=self.progress.emit
         )
         try:
             if not await self._generator.start():
@@ -123,17 +140,20 @@ class ImageAccountWorker(QThread):
                     actual_output_dir = self.output_dir
                 
                 # Build custom filename: {stt}_{prompt_short}.jpg
-                import re
-                prompt_short = re.sub(r'[^\w\s]', '', prompt)[:30].replace(' ', '_')
-                custom_filename = f"{stt}_{prompt_short}"
+                custom_filename = image_output_stem(stt, prompt)
                 
+                task_id = self.task_ids[prompt_idx] if self.task_ids else uuid4().hex
+                report = ProgressReporter(self.progress.emit, task_id, self.account.email)
                 task = await self._generator.generate_images_on_tab(
                     tab_id=0,
                     prompt=prompt,
                     settings=self.settings,
                     output_dir=actual_output_dir,
-                    custom_filename=custom_filename
+                    custom_filename=custom_filename,
+                    task_id=task_id
                 )
+                report(Stage.COMPLETED if task.status == "completed" else Stage.FAILED,
+                       message=task.error_message or "", result=task)
                 self.task_completed.emit(self.account.email, prompt_idx, task)
                 
         finally:
@@ -227,6 +247,21 @@ class ImageGenTab(QWidget):
 
         self._output_dir = str(_img_output_dir())
         self._start_time = None
+        self._row_by_task: dict = {}
+        self._content_keys: list = []  # content_key từng row (tính lúc Start) → history không hash lại
+        self._imported = None  # PromptStore từ Nhập TXT / Nhập Folder (None = dùng ô nhập)
+        self._import_worker = None
+        self._key_worker = None  # ContentKeyWorker của lần Start đang chờ
+        self._key_plan = None
+
+        # Journal batch (jobs.db) → tắt app giữa chừng vẫn "Tiếp tục" được
+        self.journal = job_journal.shared_journal()
+        self._batch_id = None
+        self._job_idx: list = []  # row queue -> idx item trong journal
+        self._resume_plan = None  # (BatchInfo, [JobItem]) chờ _start dùng
+
+        # Update từ worker gom lại, áp dụng mỗi ~100ms
+        self.ui_updates = shared_scheduler()
 
         self._setup_ui()
         self.refresh_accounts()
@@ -331,12 +366,17 @@ class ImageGenTab(QWidget):
         self.clear_btn = QPushButton("🗑️ Xóa")
         self.import_btn.clicked.connect(self._import_prompts)
         self.import_folder_btn.clicked.connect(self._import_folder)
-        self.clear_btn.clicked.connect(lambda: self.prompt_input.clear())
+        self.clear_btn.clicked.connect(self._clear_prompts)
         btn_row.addWidget(self.import_btn)
         btn_row.addWidget(self.import_folder_btn)
         btn_row.addWidget(self.clear_btn)
         left_layout.addLayout(btn_row)
 
+        self.import_info = QLabel("")
+        self.import_info.setFont(QFont("Segoe UI", 9))
+        self.import_info.setWordWrap(True)
+        left_layout.addWidget(self.import_info)
+
         # Output folder
         self.output_title = QLabel("📂 Thư mục xuất:")
         self.output_title.setFont(QFont("Segoe UI", 10))
@@ -395,10 +435,14 @@ class ImageGenTab(QWidget):
         self.start_btn = QPushButton("▶️ Bắt đầu")
         self.stop_btn = QPushButton("⏹️ Dừng")
         self.stop_btn.setEnabled(False)
+        self.resume_btn = QPushButton("⏯️ Tiếp tục")
+        self.resume_btn.setToolTip("Tiếp tục batch trước (bỏ qua ảnh đã xong)")
         self.start_btn.clicked.connect(self._start)
         self.stop_btn.clicked.connect(self._stop)
+        self.resume_btn.clicked.connect(self._resume_batch)
         ctrl_row.addWidget(self.start_btn)
         ctrl_row.addWidget(self.stop_btn)
+        ctrl_row.addWidget(self.resume_btn)
         left_layout.addLayout(ctrl_row)
 
         left_layout.addStretch()
@@ -461,9 +505,8 @@ class ImageGenTab(QWidget):
         self.log_title.setFont(QFont("Segoe UI", 10, QFont.Bold))
         right_layout.addWidget(self.log_title)
 
-        self.log = QTextEdit()
-        self.log.setReadOnly(True)
-        self.log.setMaximumHeight(100)
+        self.log = LogView("image")
+        self.log.setMaximumHeight(130)
         right_layout.addWidget(self.log)
 
         splitter.addWidget(right)
@@ -538,7 +581,7 @@ class ImageGenTab(QWidget):
                 QPushButton:hover { background: rgba(55, 65, 85, 240); }
             """
             log_style = """
-                QTextEdit {
+                QListView {
                     background: rgba(10, 15, 25, 220); color: #0f0;
                     border: 1px solid rgba(0, 200, 0, 40); border-radius: 6px;
                     font-family: Consolas, monospace; font-size: 11px; padding: 6px;
@@ -599,7 +642,7 @@ class ImageGenTab(QWidget):
                 QPushButton:hover { background: #f5f5f5; }
             """
             log_style = """
-                QTextEdit {
+                QListView {
                     background: rgba(20, 30, 50, 240); color: #0f0;
                     border: 1px solid rgba(0, 150, 0, 50); border-radius: 6px;
                     font-family: Consolas, monospace; font-size: 11px; padding: 6px;
@@ -633,7 +676,7 @@ class ImageGenTab(QWidget):
 
         # Apply styles
         for label in [self.prompt_title, self.output_title, self.settings_title,
-                      self.acc_title, self.log_title, self.aspect_label]:
+                      self.acc_title, self.log_title, self.aspect_label, self.import_info]:
             label.setStyleSheet(f"color: {text_color}; background: transparent;")
 
         self.progress_status.setStyleSheet(f"color: {text_color}; background: transparent;")
@@ -680,7 +723,7 @@ class ImageGenTab(QWidget):
             table.setStyleSheet(table_style)
 
         for btn in [self.import_btn, self.import_folder_btn, self.clear_btn, self.start_btn, self.stop_btn,
-                    self.output_browse_btn]:
+                    self.resume_btn, self.output_browse_btn]:
             btn.setStyleSheet(btn_style)
 
         self.log.setStyleSheet(log_style)
@@ -720,63 +763,72 @@ class ImageGenTab(QWidget):
 
     # ==================== Import / Output ====================
 
+    def _clear_prompts(self):
+        """Xóa prompt + batch đã import"""
+        if self._import_worker:
+            # Kể cả khi worker vừa chạy xong: signal imported có thể còn trong hàng đợi
+            self._import_worker.requestInterruption()
+        self._imported = None
+        self.prompt_input.clear()
+        self.prompt_input.setReadOnly(False)
+        self.import_info.setText("")
+
     def _import_prompts(self):
         """Import single TXT file - creates subfolder with same name"""
         path, _ = QFileDialog.getOpenFileName(self, "Chọn file TXT", "", "Text Files (*.txt)")
         if path:
-            try:
-                from pathlib import Path as P
-                txt_path = P(path)
-                with open(path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                self.prompt_input.setPlainText(content)
-                lines = [l.strip() for l in content.strip().split('\n') if l.strip()]
-                
-                # Store batch info: single file = single batch
-                subfolder_name = txt_path.stem  # filename without .txt
-                self._batch_queue = [(subfolder_name, lines)]
-                
-                self._log(f"📄 Đã nhập {len(lines)} prompt từ {subfolder_name}.txt")
-            except Exception as e:
-                QMessageBox.warning(self, "Lỗi", f"Không thể đọc file: {e}")
+            self._start_import([Path(path)])
 
     def _import_folder(self):
         """Import folder chứa nhiều file TXT - mỗi file = 1 batch với subfolder riêng"""
         folder = QFileDialog.getExistingDirectory(self, "Chọn folder chứa file TXT")
         if not folder:
             return
-        
-        try:
-            from pathlib import Path as P
-            folder_path = P(folder)
-            txt_files = sorted(folder_path.glob("*.txt"))
-            
-            if not txt_files:
-                QMessageBox.warning(self, "Lỗi", "Không tìm thấy file TXT trong folder!")
-                return
-            
-            # Build batch queue: [(subfolder_name, [prompts]), ...]
-            self._batch_queue = []
-            all_prompts = []
-            total_count = 0
-            
-            for txt_file in txt_files:
-                with open(txt_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                lines = [l.strip() for l in content.strip().split('\n') if l.strip()]
-                if lines:
-                    subfolder_name = txt_file.stem  # filename without .txt
-                    self._batch_queue.append((subfolder_name, lines))
-                    all_prompts.extend(lines)
-                    total_count += len(lines)
-            
-            # Show in prompt input
-            self.prompt_input.setPlainText('\n'.join(all_prompts))
-            
-            self._log(f"📁 Đã nhập {total_count} prompt từ {len(self._batch_queue)} file TXT")
-            
-        except Exception as e:
-            QMessageBox.warning(self, "Lỗi", f"Không thể đọc folder: {e}")
+        txt_files = sorted(Path(folder).glob("*.txt"))
+        if not txt_files:
+            QMessageBox.warning(self, "Lỗi", "Không tìm thấy file TXT trong folder!")
+            return
+        self._start_import(txt_files)
+
+    def _start_import(self, paths):
+        """Đọc TXT nền (từng dòng) — UI chỉ nhận tiến độ và kết quả"""
+        if self._import_worker and self._import_worker.isRunning():
+            return
+        self.import_btn.setEnabled(False)
+        self.import_folder_btn.setEnabled(False)
+        self.import_info.setText(f"⏳ Đang đọc {len(paths)} file...")
+        worker = PromptImportWorker(paths)
+        worker.progress.connect(self._on_import_progress)
+        worker.imported.connect(self._on_imported)
+        worker.failed.connect(lambda err: QMessageBox.warning(self, "Lỗi", f"Không thể đọc file: {err}"))
+        worker.finished.connect(self._on_import_finished)
+        self._import_worker = worker
+        worker.start()
+
+    def _on_import_progress(self, done: int, total: int, count: int):
+        pct = int(done * 100 / total) if total else 100
+        self.import_info.setText(f"⏳ Đang đọc... {pct}% — {count:,} prompt")
+
+    def _on_imported(self, store):
+        worker = self.sender()
+        if worker is not None and worker.isInterruptionRequested():
+            return  # đã bấm Xóa trong lúc import
+        if not len(store):
+            QMessageBox.warning(self, "Lỗi", "File TXT không có prompt nào")
+            return
+        self._imported = store
+        # Chỉ hiện preview — không đổ toàn bộ prompt vào QTextEdit
+        self.prompt_input.setPlainText('\n'.join(store.preview(PREVIEW_LINES)))
+        self.prompt_input.setReadOnly(True)
+        more = f" (hiện {PREVIEW_LINES} đầu)" if len(store) > PREVIEW_LINES else ""
+        self.import_info.setText(f"📁 {len(store):,} prompt — {store.summary()}{more}")
+        self._log(f"📁 Đã nhập {len(store):,} prompt từ {len(store.batches)} file TXT")
+
+    def _on_import_finished(self):
+        self.import_btn.setEnabled(True)
+        self.import_folder_btn.setEnabled(True)
+        if self._imported is None and self.import_info.text().startswith("⏳"):
+            self.import_info.setText("")
 
     def _browse_output(self):
         folder = QFileDialog.getExistingDirectory(self, "Chọn thư mục xuất")
@@ -788,21 +840,19 @@ class ImageGenTab(QWidget):
 
     def _start(self):
         """Start image generation."""
-        # Get prompts
-        text = self.prompt_input.toPlainText().strip()
-        if not text:
-            QMessageBox.warning(self, "Lỗi", "Vui lòng nhập prompt!")
-            return
-
-        # Build prompt list with subfolder info
-        # Check if we have batch info from file import
-        if hasattr(self, '_batch_queue') and self._batch_queue:
-            # Build items with subfolder info from batch queue
-            all_items = []
-            for subfolder_name, prompts in self._batch_queue:
-                for idx, prompt in enumerate(prompts, start=1):
-                    all_items.append((prompt, subfolder_name, idx))
+        plan, self._resume_plan = self._resume_plan, None
+
+        # Build prompt list with subfolder info: batch đang tiếp tục, file đã import (PromptStore) hoặc ô nhập
+        if plan is not None:
+            batch, jobs = plan
+            all_items = [(j.prompt, j.subfolder, j.stt) for j in jobs]
+        elif self._imported is not None:
+            all_items = PromptItems(self._imported)  # đọc thẳng từ PromptStore, không copy
         else:
+            text = self.prompt_input.toPlainText().strip()
+            if not text:
+                QMessageBox.warning(self, "Lỗi", "Vui lòng nhập prompt!")
+                return
             # Simple text input - no subfolder
             prompts = [l.strip() for l in text.split('\n') if l.strip()]
             all_items = [(p, None, i+1) for i, p in enumerate(prompts)]
@@ -840,11 +890,61 @@ class ImageGenTab(QWidget):
         if subfolders_created:
             self._log(f"📁 Tạo {len(subfolders_created)} subfolder: {', '.join(sorted(subfolders_created)[:5])}...")
 
+        # Prompt đã có ảnh trong history (cùng prompt + settings) → hỏi dùng lại.
+        # content_key tính trên thread nền, xong mới tiếp tục _launch
+        self.start_btn.setEnabled(False)
+        self.resume_btn.setEnabled(False)
+        worker = ContentKeyWorker(all_items, self._current_settings)
+        worker.computed.connect(self._on_keys_computed)
+        # Giữ reference tới khi thread kết thúc hẳn (tránh "QThread destroyed while running")
+        worker.finished.connect(self._on_key_worker_finished)
+        worker.finished.connect(worker.deleteLater)
+        self._key_plan = (plan, all_items, logged_in)
+        self._key_worker = worker
+        worker.start()
+
+    def _on_keys_computed(self, keys):
+        plan, all_items, logged_in = self._key_plan
+        self._key_plan = None
+        self._launch(plan, all_items, logged_in, keys)
+
+    def _on_key_worker_finished(self):
+        if self.sender() is self._key_worker:
+            self._key_worker = None
+
+    def _stop_key_worker(self):
+        """Đóng app khi đang tính content_key → chờ thread xong (không _launch nữa)"""
+        worker = self._key_worker
+        if worker is not None and worker.isRunning():
+            worker.requestInterruption()
+            worker.wait(3000)
+
+    def _launch(self, plan, all_items, logged_in, keys):
+        """Phần còn lại của _start khi đã có content_key của từng item"""
+        reused = self._offer_reuse(all_items, keys)
+
+        # Journal: batch mới hoặc batch đang tiếp tục
+        if plan is not None:
+            batch, jobs = plan
+            self._batch_id = batch.id
+            self._job_idx = [j.idx for j in jobs]
+            self.journal.mark_pending(self._batch_id, self._job_idx)
+        else:
+            subfolders = sorted({it[1] for it in all_items if it[1]})
+            self._batch_id = self.journal.create_batch(
+                "image", ((p, None, sub, stt) for p, sub, stt in all_items), self._current_output_dir,
+                {"aspect": self.aspect_combo.currentIndex(),
+                 "name": ", ".join(subfolders)[:60] if subfolders else all_items[0][0][:40]})
+            self._job_idx = list(range(len(all_items)))
+
         # Reset state
         self.completed_tasks = []
         self.failed_tasks = []
         self.prompt_queue = all_items  # list of (prompt, subfolder, stt)
         self.account_workers = {}
+        self._task_ids = [uuid4().hex for _ in all_items]
+        self._row_by_task = {task_id: row for row, task_id in enumerate(self._task_ids)}
+        self._content_keys = keys
 
         # Populate queue table
         total = len(all_items)
@@ -858,19 +958,36 @@ class ImageGenTab(QWidget):
         self.run_table.setRowCount(0)
         self.done_table.setRowCount(0)
 
+        # Item dùng lại: xong ngay, không vào shared queue
+        for i, path in reused.items():
+            prompt, subfolder, _ = all_items[i]
+            self.completed_tasks.append(ImageTask(prompt=prompt, settings=self._current_settings,
+                                                  status="completed", output_paths=[path],
+                                                  output_dir=os.path.dirname(path)))
+            self.queue_table.item(i, 2).setText("♻️ Dùng lại")
+            self._mark_job(i, job_journal.DONE, path)
+        if reused:
+            self._log(f"♻️ Dùng lại {len(reused)} ảnh đã có")
+        if len(reused) == total:
+            self.progress_status.setText(f"✅ Hoàn thành: {total}/{total} prompts (dùng lại)")
+            self.start_btn.setEnabled(True)
+            self.resume_btn.setEnabled(True)
+            return
+
         # Shared queue — tất cả accounts lấy prompt theo thứ tự từ đây
-        self.shared_queue = SharedPromptQueue(all_items)
+        self.shared_queue = SharedPromptQueue(all_items, skip=reused)
 
         # UI state - update immediately
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
+        self.resume_btn.setEnabled(False)
         self.progress_status.setText(f"🚀 Đang khởi tạo {len(logged_in)} tài khoản...")
         self._start_time = datetime.now()
         self._elapsed_timer.start(1000)
 
         # Store pending accounts for staggered start
         self._pending_accounts = list(logged_in)
-        self._log(f"🚀 Bắt đầu {total} ảnh với {len(logged_in)} tài khoản")
+        self._log(f"🚀 Bắt đầu {total - len(reused)} ảnh với {len(logged_in)} tài khoản")
         
         # Start first worker immediately, others with delay
         if self._pending_accounts:
@@ -892,9 +1009,11 @@ class ImageGenTab(QWidget):
             shared_queue=self.shared_queue,
             settings=self._current_settings,
             output_dir=self._current_output_dir,
-            headless=True
+            headless=True,
+            task_ids=self._task_ids
         )
         worker.status_update.connect(self._on_status_update)
+        worker.progress.connect(self._on_progress)
         worker.task_completed.connect(self._on_task_completed)
         worker.all_finished.connect(self._on_worker_finished)
         self.account_workers[account.email] = worker
@@ -908,6 +1027,7 @@ class ImageGenTab(QWidget):
             worker.stop()
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
+        self.resume_btn.setEnabled(True)
         self.progress_status.setText("⏹️ Đã dừng")
         self._elapsed_timer.stop()
         self._log("⏹️ Đã dừng tất cả")
@@ -916,9 +1036,11 @@ class ImageGenTab(QWidget):
 
     def _on_status_update(self, email: str, message: str):
         """Handle status update from worker."""
-        self._log(message)
+        self._log(message, account=email)
+        # Gom theo account → chỉ message mới nhất mỗi frame được vẽ
+        self.ui_updates.post(("image", "run", email), lambda: self._set_run_status(email, message))
 
-        # Update running table
+    def _set_run_status(self, email: str, message: str):
         found = False
         for row in range(self.run_table.rowCount()):
             item = self.run_table.item(row, 0)
@@ -933,6 +1055,30 @@ class ImageGenTab(QWidget):
             self.run_table.setItem(row, 1, QTableWidgetItem("..."))
             self.run_table.setItem(row, 2, QTableWidgetItem(message[-60:]))
 
+    _STAGE_LABELS = {
+        Stage.STARTED: "▶️ Bắt đầu",
+        Stage.CREATING_POST: "✏️ Nhập prompt",
+        Stage.RENDERING: "⏳ Đang tạo ảnh",
+        Stage.DOWNLOADING: "📥 Đang tải",
+        Stage.RETRYING: "🔄 Thử lại",
+    }
+
+    def _on_progress(self, event: ProgressEvent):
+        """Cập nhật cột trạng thái của đúng row (tra task_id)"""
+        row = self._row_by_task.get(event.task_id)
+        label = self._STAGE_LABELS.get(event.stage)
+        if row is None or label is None or event.stage.is_final:
+            return
+        if event.stage == Stage.STARTED:
+            self._mark_job(row, job_journal.RUNNING)
+        text = f"{label} · {event.elapsed:.0f}s" if event.elapsed >= 1 else label
+        self.ui_updates.post(("image", "progress", row), lambda: self._set_row_status(row, text))
+
+    def _set_row_status(self, row: int, text: str):
+        status_item = self.queue_table.item(row, 2)
+        if status_item:
+            status_item.setText(text)
+
     def _on_task_completed(self, email: str, prompt_idx: int, task):
         """Handle completed image task."""
         if not isinstance(task, ImageTask):
@@ -940,6 +1086,7 @@ class ImageGenTab(QWidget):
 
         if task.status == "completed" and task.output_paths:
             self.completed_tasks.append(task)
+            self._mark_job(prompt_idx, job_journal.DONE, task.output_paths[0])
 
             # Add to done table
             row = self.done_table.rowCount()
@@ -950,6 +1097,8 @@ class ImageGenTab(QWidget):
             self.done_table.setItem(row, 3, QTableWidgetItem(task.output_dir or ""))
 
             # Save to history
+            if task.content_key is None:
+                task.content_key = self._row_content_key(prompt_idx, task)
             try:
                 self.history_manager.add_image_history(task)
             except Exception as e:
@@ -958,8 +1107,10 @@ class ImageGenTab(QWidget):
             self.image_completed.emit()
         else:
             self.failed_tasks.append(task)
+            self._mark_job(prompt_idx, job_journal.FAILED, task.error_message)
 
-        # Update queue table status by prompt_idx
+        # Update queue table status by prompt_idx (bỏ progress cũ đang chờ flush)
+        self.ui_updates.cancel(("image", "progress", prompt_idx))
         if 0 <= prompt_idx < self.queue_table.rowCount():
             status_item = self.queue_table.item(prompt_idx, 2)
             if status_item:
@@ -984,6 +1135,7 @@ class ImageGenTab(QWidget):
         if not self.account_workers:
             self.start_btn.setEnabled(True)
             self.stop_btn.setEnabled(False)
+            self.resume_btn.setEnabled(True)
             self._elapsed_timer.stop()
             total = len(self.completed_tasks) + len(self.failed_tasks)
             self.progress_status.setText(
@@ -991,6 +1143,88 @@ class ImageGenTab(QWidget):
             )
             self.progress_bar.setValue(100)
 
+    # ==================== Job Journal ====================
+
+    def _mark_job(self, row: int, state: str, detail=None):
+        """Ghi chuyển trạng thái của row queue vào journal"""
+        if self._batch_id is None or not 0 <= row < len(self._job_idx):
+            return
+        idx = self._job_idx[row]
+        try:
+            if state == job_journal.RUNNING:
+                self.journal.mark_running(self._batch_id, idx)
+            elif state == job_journal.DONE:
+                self.journal.mark_done(self._batch_id, idx, detail)
+            elif state == job_journal.FAILED:
+                self.journal.mark_failed(self._batch_id, idx, detail)
+            else:
+                self.journal.mark_pending(self._batch_id, [idx])
+        except Exception as e:
+            print(f"[JobJournal] {e}")
+
+    def _resume_batch(self):
+        """Dựng lại queue từ journal (chỉ prompt chưa xong) rồi chạy tiếp"""
+        if self.account_workers:
+            QMessageBox.warning(self, "Lỗi", "Đang tạo ảnh, vui lòng đợi hoàn tất")
+            return
+        batches = self.journal.resumable_batches("image")
+        if not batches:
+            QMessageBox.information(self, "Tiếp tục batch", "Không có batch nào còn dang dở")
+            return
+        labels = [b.label() for b in batches]
+        label, ok = QInputDialog.getItem(self, "Tiếp tục batch", "Chọn batch:", labels, 0, False)
+        if not ok:
+            return
+        batch = batches[labels.index(label)]
+        jobs = self.journal.items(batch.id, exclude_done=True)
+
+        self.aspect_combo.setCurrentIndex(batch.settings.get("aspect", self.aspect_combo.currentIndex()))
+        if batch.output_dir:
+            self._output_dir = batch.output_dir
+            self.output_input.setText(batch.output_dir)
+
+        self._log(f"⏯️ Tiếp tục batch: {len(jobs)}/{batch.total} prompt chưa xong ({batch.done} đã xong)")
+        self._resume_plan = (batch, jobs)
+        self._start()
+
+    # ==================== Result reuse ====================
+
+    def _row_content_key(self, row: int, task):
+        """content_key đã tính lúc Start cho row (None nếu prompt/settings đã đổi → history tự tính)"""
+        if not 0 <= row < len(self._content_keys):
+            return None
+        if (task.prompt, task.settings) != (self.prompt_queue[row][0], self._current_settings):
+            return None
+        return self._content_keys[row]
+
+    def _offer_reuse(self, items, keys) -> dict:
+        """Row có ảnh cũ trùng content_key → hardlink/copy sang tên file mới (nếu user đồng ý).
+
+        keys: content_key từng item (ContentKeyWorker). Trả về {row: output_path} của các row đã dùng lại.
+        """
+        found = self.history_manager.find_reusable(keys, "image")
+        rows = [i for i, key in enumerate(keys) if key in found]
+        if not rows:
+            return {}
+        answer = QMessageBox.question(
+            self, "Dùng lại ảnh",
+            f"{len(rows)}/{len(items)} prompt đã có ảnh (cùng prompt, settings).\n"
+            "Dùng lại ảnh cũ thay vì tạo lại?")
+        if answer != QMessageBox.Yes:
+            return {}
+
+        reused = {}
+        base = Path(self._current_output_dir)
+        for i in rows:
+            prompt, subfolder, stt = items[i]
+            src, _ = found[keys[i]]
+            name = image_output_stem(stt, prompt) + Path(src).suffix
+            try:
+                reused[i] = reuse_output(src, (base / subfolder if subfolder else base) / name)
+            except OSError as e:
+                self._log(f"⚠️ #{i+1} không dùng lại được: {e}")
+        return reused
+
     # ==================== Stats & Elapsed ====================
 
     def _update_stats(self):
@@ -1018,9 +1252,6 @@ class ImageGenTab(QWidget):
 
     # ==================== Logging ====================
 
-    def _log(self, msg: str):
-        ts = datetime.now().strftime("%H:%M:%S")
-        self.log.append(f"[{ts}] {msg}")
-        # Auto-scroll
-        sb = self.log.verticalScrollBar()
-        sb.setValue(sb.maximum())
+    def _log(self, msg: str, account: str = ""):
+        # Ghi file (nền) + ring buffer của view
+        self.log.append(run_log.write("image", msg, account=account))
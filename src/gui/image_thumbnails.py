@@ -0,0 +1,92 @@
+"""Image Thumbnails - load thumbnail ảnh nguồn không block GUI thread
+
+QImageReader.setScaledSize cho phép decoder (JPEG...) giải mã thẳng ở độ phân
+giải nhỏ thay vì decode full 4K rồi scale. Decode chạy trên QThreadPool, kết
+quả (QImage) quay về GUI thread qua signal, chuyển thành QPixmap và giữ trong
+LRU cache theo (path, size) → cùng ảnh hiện ở nhiều row chỉ decode 1 lần.
+"""
+from collections import OrderedDict
+from typing import Optional
+
+from PySide6.QtCore import QObject, QRunnable, QSize, Qt, QThreadPool, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+DEFAULT_CACHE_ENTRIES = 512
+
+
+class _DecodeJob(QRunnable):
+    def __init__(self, loader: "ImageThumbnailLoader", path: str, size: QSize):
+        super().__init__()
+        self.loader = loader
+        self.path = path
+        self.size = size
+
+    def run(self):
+        try:
+            reader = QImageReader(self.path)
+            reader.setAutoTransform(True)  # xoay theo EXIF
+            source = reader.size()
+            if source.isValid():
+                reader.setScaledSize(source.scaled(self.size, Qt.KeepAspectRatio))
+            image = reader.read()
+            if image.isNull():
+                print(f"[Thumbnails] Cannot read {self.path}: {reader.errorString()}")
+        except Exception as e:
+            print(f"[Thumbnails] Decode error {self.path}: {e}")
+            image = QImage()
+        # Luôn emit (kể cả lỗi) để loader bỏ đánh dấu đang decode
+        # Emit từ thread pool → queued sang GUI thread (loader sống ở GUI thread)
+        self.loader._decoded.emit(self.path, self.size, image)
+
+
+class ImageThumbnailLoader(QObject):
+    ready = Signal(str, QPixmap)  # (path, pixmap) — luôn trên GUI thread
+    failed = Signal(str)  # path — không đọc được ảnh, bên gọi bỏ row đang chờ
+    _decoded = Signal(str, QSize, QImage)
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES, max_threads: int = 2, parent=None):
+        super().__init__(parent)
+        self.max_entries = max_entries
+        self._cache: OrderedDict[tuple[str, int, int], QPixmap] = OrderedDict()
+        self._pending: set[tuple[str, int, int]] = set()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._decoded.connect(self._on_decoded)
+
+    def request(self, path: str, size: QSize) -> Optional[QPixmap]:
+        """Pixmap nếu đã cache, nếu không thì decode nền (kết quả qua signal ready)"""
+        key = (path, size.width(), size.height())
+        pixmap = self._cache.get(key)
+        if pixmap is not None:
+            self._cache.move_to_end(key)
+            return pixmap
+        if key not in self._pending:
+            self._pending.add(key)
+            self._pool.start(_DecodeJob(self, path, QSize(size)))
+        return None
+
+    def _on_decoded(self, path: str, size: QSize, image: QImage) -> None:
+        key = (path, size.width(), size.height())
+        self._pending.discard(key)
+        if image.isNull():
+            self.failed.emit(path)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._cache[key] = pixmap
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        self.ready.emit(path, pixmap)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+_shared: Optional[ImageThumbnailLoader] = None
+
+
+def shared_loader() -> ImageThumbnailLoader:
+    """Loader dùng chung cho các tab (tạo lần đầu trên GUI thread)"""
+    global _shared
+    if _shared is None:
+        _shared = ImageThumbnailLoader()
+    return _shared
@@ -0,0 +1,248 @@
+"""Log View - nhật ký chạy dạng QListView trên ring buffer (thay QTextEdit)
+
+View chỉ giữ RING_SIZE dòng mới nhất → bộ nhớ / chi phí append không tăng theo
+độ dài phiên chạy. Toàn bộ log nằm trong file (core.run_log); lọc level /
+tài khoản / chữ trên buffer đang hiển thị, "Tìm trong file" quét file nền.
+Dòng mới được gom và chèn 1 lần mỗi frame qua UiUpdateScheduler.
+"""
+import logging
+from collections import deque
+from typing import Optional
+
+from PySide6.QtCore import (
+    QAbstractListModel, QModelIndex, QSortFilterProxyModel, Qt, QThread, QTimer, Signal
+)
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (
+    QComboBox, QHBoxLayout, QLabel, QLineEdit, QListView, QPushButton, QVBoxLayout, QWidget
+)
+
+from ..core import run_log
+from ..core.run_log import LogEntry, RING_SIZE
+from .ui_updates import shared_scheduler
+
+ENTRY_ROLE = Qt.UserRole + 1
+
+LEVEL_COLORS = {
+    logging.DEBUG: "#7f8c8d",
+    logging.WARNING: "#f39c12",
+    logging.ERROR: "#e74c3c",
+}
+
+LEVEL_FILTERS = [
+    ("Tất cả", logging.DEBUG),
+    ("Info", logging.INFO),
+    ("Cảnh báo", logging.WARNING),
+    ("Lỗi", logging.ERROR),
+]
+
+
+class LogModel(QAbstractListModel):
+    """Ring buffer LogEntry: đầy thì bỏ dòng cũ nhất"""
+
+    def __init__(self, max_entries: int = RING_SIZE, parent=None):
+        super().__init__(parent)
+        self.max_entries = max_entries
+        self._entries: deque[LogEntry] = deque()
+
+    def append(self, entries: list[LogEntry]) -> None:
+        if not entries:
+            return
+        if len(entries) >= self.max_entries:
+            self.set_entries(entries[-self.max_entries:])
+            return
+        overflow = len(self._entries) + len(entries) - self.max_entries
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._entries.popleft()
+            self.endRemoveRows()
+        start = len(self._entries)
+        self.beginInsertRows(QModelIndex(), start, start + len(entries) - 1)
+        self._entries.extend(entries)
+        self.endInsertRows()
+
+    def set_entries(self, entries: list[LogEntry]) -> None:
+        self.beginResetModel()
+        self._entries = deque(entries[-self.max_entries:])
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._entries[index.row()]
+        if role == Qt.DisplayRole:
+            return entry.format()
+        if role == Qt.ForegroundRole:
+            color = LEVEL_COLORS.get(entry.level)
+            return QColor(color) if color else None
+        if role == Qt.ToolTipRole:
+            tip = f"{entry.time:%Y-%m-%d %H:%M:%S} · {entry.level_name}"
+            return f"{tip} · {entry.account}" if entry.account else tip
+        if role == ENTRY_ROLE:
+            return entry
+        return None
+
+
+class LogFilterProxy(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.min_level = logging.INFO
+        self.account = ""
+        self.text = ""
+
+    def set_filter(self, min_level: int, account: str, text: str) -> None:
+        self.min_level, self.account, self.text = min_level, account, text
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent) -> bool:
+        entry = self.sourceModel().index(source_row, 0, source_parent).data(ENTRY_ROLE)
+        return entry is not None and entry.matches(self.min_level, self.account, self.text)
+
+
+class LogSearchWorker(QThread):
+    finished_search = Signal(list)  # list[LogEntry]
+
+    def __init__(self, source: str, text: str, min_level: int, account: str):
+        super().__init__()
+        self.source = source
+        self.text = text
+        self.min_level = min_level
+        self.account = account
+
+    def run(self):
+        directory = run_log.log_dir()
+        results = []
+        if directory is not None:
+            try:
+                results = run_log.search(directory, self.text, self.min_level, self.account,
+                                         source=self.source, limit=RING_SIZE)
+            except Exception as e:
+                print(f"[LogView] Search failed: {e}")
+        self.finished_search.emit(results)
+
+
+class LogView(QWidget):
+    """Log của 1 tab: bộ lọc + QListView. append() gọi từ GUI thread."""
+
+    def __init__(self, source: str, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.ui_updates = shared_scheduler()
+        self._pending: list[LogEntry] = []
+        self._accounts: set[str] = set()
+        self._search_worker: Optional[LogSearchWorker] = None
+
+        self.live_model = LogModel(parent=self)
+        self.results_model = LogModel(parent=self)
+        self.proxy = LogFilterProxy(self)
+        self.proxy.setSourceModel(self.live_model)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        bar = QHBoxLayout()
+        self.level_combo = QComboBox()
+        for label, level in LEVEL_FILTERS:
+            self.level_combo.addItem(label, level)
+        self.level_combo.setCurrentIndex(1)  # Info
+        self.level_combo.currentIndexChanged.connect(self._apply_filter)
+        bar.addWidget(self.level_combo)
+
+        self.account_combo = QComboBox()
+        self.account_combo.addItem("Tất cả tài khoản", "")
+        self.account_combo.currentIndexChanged.connect(self._apply_filter)
+        bar.addWidget(self.account_combo)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍 Lọc log...")
+        self.search_input.setClearButtonEnabled(True)
+        bar.addWidget(self.search_input, stretch=1)
+
+        self.file_search_btn = QPushButton("🔎 Tìm trong file")
+        self.file_search_btn.setToolTip("Tìm trong toàn bộ file log (kể cả dòng đã rời khỏi view)")
+        self.file_search_btn.clicked.connect(self._search_files)
+        bar.addWidget(self.file_search_btn)
+
+        self.live_btn = QPushButton("↩ Live")
+        self.live_btn.setVisible(False)
+        self.live_btn.clicked.connect(self._show_live)
+        bar.addWidget(self.live_btn)
+
+        self.result_label = QLabel()
+        self.result_label.setVisible(False)
+        bar.addWidget(self.result_label)
+        layout.addLayout(bar)
+
+        self.list = QListView()
+        self.list.setModel(self.proxy)
+        self.list.setUniformItemSizes(True)  # không đo từng dòng
+        self.list.setWordWrap(False)
+        self.list.setSelectionMode(QListView.ExtendedSelection)
+        layout.addWidget(self.list)
+
+        # Gõ filter → áp dụng sau 250ms ngừng gõ
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(250)
+        self._filter_timer.timeout.connect(self._apply_filter)
+        self.search_input.textChanged.connect(self._filter_timer.start)
+
+    def append(self, entry: LogEntry) -> None:
+        self._pending.append(entry)
+        self.ui_updates.post(("log", id(self)), self._flush)
+
+    def _flush(self) -> None:
+        entries, self._pending = self._pending, []
+        for entry in entries:
+            if entry.account and entry.account not in self._accounts:
+                self._accounts.add(entry.account)
+                self.account_combo.addItem(entry.account, entry.account)
+        sb = self.list.verticalScrollBar()
+        follow = sb.value() >= sb.maximum()  # đang ở cuối → tiếp tục bám cuối
+        self.live_model.append(entries)
+        if follow and self.proxy.sourceModel() is self.live_model:
+            self.list.scrollToBottom()
+
+    def clear(self) -> None:
+        self._pending.clear()
+        self.live_model.set_entries([])
+
+    def _filter_args(self) -> tuple[int, str, str]:
+        return (self.level_combo.currentData(), self.account_combo.currentData() or "",
+                self.search_input.text().strip())
+
+    def _apply_filter(self) -> None:
+        self.proxy.set_filter(*self._filter_args())
+        self.list.scrollToBottom()
+
+    def _search_files(self) -> None:
+        if self._search_worker and self._search_worker.isRunning():
+            return
+        min_level, account, text = self._filter_args()
+        self.file_search_btn.setEnabled(False)
+        self.file_search_btn.setText("⏳ Đang tìm...")
+        self._search_worker = LogSearchWorker(self.source, text, min_level, account)
+        self._search_worker.finished_search.connect(self._on_search_done)
+        self._search_worker.start()
+
+    def _on_search_done(self, results: list) -> None:
+        self.file_search_btn.setEnabled(True)
+        self.file_search_btn.setText("🔎 Tìm trong file")
+        self.results_model.set_entries(results)
+        self.proxy.setSourceModel(self.results_model)
+        self.result_label.setText(f"{len(results)} dòng" + (" (mới nhất)" if len(results) >= RING_SIZE else ""))
+        self.result_label.setVisible(True)
+        self.live_btn.setVisible(True)
+        self.list.scrollToBottom()
+
+    def _show_live(self) -> None:
+        self.proxy.setSourceModel(self.live_model)
+        self.results_model.set_entries([])
+        self.result_label.setVisible(False)
+        self.live_btn.setVisible(False)
+        self.list.scrollToBottom()
@@ -9,16 +9,18 @@ from PySide6.QtWidgets import (
     QDialog, QProgressBar, QTextEdit
 )
 from PySide6.QtCore import Qt, QTimer, QPointF, Property, QPropertyAnimation, QThread, Signal
-from PySide6.QtGui import QFont, QPainter, QLinearGradient, QRadialGradient, QColor, QPen
+from PySide6.QtGui import QFont, QPainter, QLinearGradient, QRadialGradient, QColor, QPen, QKeySequence, QShortcut
 from .account_tab import AccountTab
 from .video_gen_tab import VideoGenTab
 from .image_gen_tab import ImageGenTab
 from .history_tab import HistoryTab
+from .ui_updates import UiStatsOverlay, shared_scheduler
 from ..core.account_manager import AccountManager
 from ..core.session_manager import SessionManager
 from ..core.history_manager import HistoryManager
 from ..core.d1_manager import D1Manager
 from ..core.paths import data_path
+from ..core import run_log
 from ..core.version import APP_VERSION
 from ..core.updater import UpdateChecker, UpdateDownloader, apply_update
 
@@ -373,6 +375,8 @@ class MainWindow(QMainWindow):
         self.session_manager = SessionManager()
         self.history_manager = HistoryManager()
         self.d1_manager = D1Manager()
+        # Nhật ký chạy video/ảnh → data/logs/run.log (xoay vòng, ghi nền)
+        run_log.start(data_path("logs"))
 
         self._setup_ui()
         self._apply_theme()
@@ -539,8 +543,7 @@ class MainWindow(QMainWindow):
         
         # Connect signals
         self.account_tab.account_changed.connect(self._on_account_changed)
-        self.video_gen_tab.video_completed.connect(self._on_video_completed)
-        self.image_gen_tab.image_completed.connect(self._on_video_completed)
+        # History tab tự refresh khi history writer commit (HistoryTab.history_flushed)
         
         # Initial state
         self._switch_tab(0)
@@ -550,10 +553,17 @@ class MainWindow(QMainWindow):
         self.status_timer = QTimer()
         self.status_timer.timeout.connect(self._update_status)
         self.status_timer.start(3000)
+        
+        # Debug overlay: thời gian GUI dành cho update từ worker (Ctrl+Shift+D)
+        self.ui_overlay = UiStatsOverlay(shared_scheduler(), central)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.ui_overlay.toggle)
+        if os.environ.get("GROK_UI_DEBUG"):
+            self.ui_overlay.toggle()
     
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self.bg.setGeometry(self.centralWidget().rect())
+        self.ui_overlay.reposition()
     
     def _switch_tab(self, idx):
         self.stack.setCurrentIndex(idx)
@@ -677,9 +687,6 @@ class MainWindow(QMainWindow):
         self.image_gen_tab.refresh_accounts()
         self._update_account_count()
     
-    def _on_video_completed(self):
-        self.history_tab.refresh()
-    
     def _update_account_count(self):
         accounts = self.account_manager.get_all_accounts()
         logged_in = sum(1 for a in accounts if a.status == "logged_in")
@@ -733,9 +740,17 @@ class MainWindow(QMainWindow):
         dlg.exec()
     
     def closeEvent(self, event):
+        self.video_gen_tab._stop_key_worker()
+        self.image_gen_tab._stop_key_worker()
         if hasattr(self.video_gen_tab, '_stop_generation'):
             self.video_gen_tab._stop_generation()
         if hasattr(self.image_gen_tab, '_stop'):
             self.image_gen_tab._stop()
+        self.history_tab.downloads.shutdown(wait=False)  # .part giữ lại, lần sau resume
+        # Flush-on-shutdown: commit hết history đang queue trước khi app os._exit()
+        if not self.history_manager.flush(timeout=10):
+            print("[History] Flush timeout on shutdown")
         self.history_manager.close()
+        self.history_tab.thumbnails.shutdown()
+        run_log.stop()
         event.accept()
@@ -0,0 +1,90 @@
+"""Progress Delegate - vẽ cột tiến độ của bảng queue từ data của item
+
+Thay cho 1 QProgressBar (+ stylesheet riêng) mỗi row: item chỉ giữ % / text /
+trạng thái, delegate vẽ thanh tiến độ lúc paint → populate hàng nghìn row và
+cuộn không phải tạo/layout widget. Màu lấy từ vài palette dùng chung.
+"""
+from typing import NamedTuple
+
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QColor, QFont, QLinearGradient, QPainter
+from PySide6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QTableWidgetItem
+
+PERCENT_ROLE = Qt.UserRole + 1
+STATE_ROLE = Qt.UserRole + 2
+
+ACTIVE, DONE, WARNING, FAILED = "active", "done", "warning", "failed"
+FINAL_STATES = (DONE, FAILED)
+
+BAR_HEIGHT = 20
+
+
+class ProgressPalette(NamedTuple):
+    border: QColor
+    chunk_start: QColor
+    chunk_end: QColor
+
+
+BACKGROUND = QColor(40, 50, 70, 180)
+TEXT_COLOR = QColor("white")
+
+PALETTES = {
+    ACTIVE: ProgressPalette(QColor(100, 150, 255, 50), QColor("#3498db"), QColor("#2ecc71")),
+    DONE: ProgressPalette(QColor(39, 174, 96, 100), QColor("#27ae60"), QColor("#2ecc71")),
+    WARNING: ProgressPalette(QColor(243, 156, 18, 100), QColor("#f39c12"), QColor("#f39c12")),
+    FAILED: ProgressPalette(QColor(231, 76, 60, 100), QColor("#e74c3c"), QColor("#e74c3c")),
+}
+
+
+def set_progress(item: QTableWidgetItem, percent: int, text: str, state: str = ACTIVE) -> None:
+    """Cập nhật data của ô tiến độ (view tự repaint đúng ô đó)"""
+    item.setData(PERCENT_ROLE, max(0, min(int(percent), 100)))
+    item.setData(STATE_ROLE, state)
+    item.setText(text)
+
+
+class ProgressDelegate(QStyledItemDelegate):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._font = QFont()
+        self._font.setPixelSize(10)
+
+    def paint(self, painter: QPainter, option, index):
+        state = index.data(STATE_ROLE)
+        if state is None:
+            super().paint(painter, option, index)
+            return
+
+        # Nền selection/hover theo style hiện tại, không vẽ text mặc định
+        self.initStyleOption(option, index)
+        text = option.text
+        option.text = ""
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+        palette = PALETTES.get(state, PALETTES[ACTIVE])
+        percent = index.data(PERCENT_ROLE) or 0
+        rect = QRectF(option.rect).adjusted(3, 0, -3, 0)
+        rect.setTop(rect.center().y() - BAR_HEIGHT / 2)
+        rect.setHeight(BAR_HEIGHT)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(palette.border)
+        painter.setBrush(BACKGROUND)
+        painter.drawRoundedRect(rect.adjusted(0.5, 0.5, -0.5, -0.5), 4, 4)
+
+        if percent > 0:
+            chunk = rect.adjusted(1, 1, -1, -1)
+            chunk.setWidth(chunk.width() * percent / 100)
+            gradient = QLinearGradient(chunk.topLeft(), chunk.topRight())
+            gradient.setColorAt(0, palette.chunk_start)
+            gradient.setColorAt(1, palette.chunk_end)
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(gradient)
+            painter.drawRoundedRect(chunk, 3, 3)
+
+        painter.setFont(self._font)
+        painter.setPen(TEXT_COLOR)
+        painter.drawText(rect, Qt.AlignCenter, text)
+        painter.restore()
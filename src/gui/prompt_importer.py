@@ -0,0 +1,28 @@
+"""Prompt Importer - đọc file/folder TXT trên thread nền (core.prompt_import)"""
+from pathlib import Path
+
+from PySide6.QtCore import QThread, Signal
+
+from ..core.prompt_import import import_prompt_files
+
+PREVIEW_LINES = 200  # số prompt hiện trong ô nhập sau khi import
+
+
+class PromptImportWorker(QThread):
+    progress = Signal(int, int, int)  # bytes đã đọc, tổng bytes, số prompt
+    imported = Signal(object)  # PromptStore
+    failed = Signal(str)
+
+    def __init__(self, paths: list[Path]):
+        super().__init__()
+        self.paths = paths
+
+    def run(self):
+        try:
+            store = import_prompt_files(self.paths, on_progress=self.progress.emit,
+                                        is_cancelled=self.isInterruptionRequested)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if store is not None and not self.isInterruptionRequested():
+            self.imported.emit(store)
@@ -0,0 +1,119 @@
+"""UI Updates - gom update từ worker signal, áp dụng 1 lần mỗi frame (~100ms)
+
+Worker (video/ảnh) bắn status_update/progress liên tục; mỗi signal sửa bảng,
+append log và nhảy scrollbar ngay → nhiều worker cùng chạy thì GUI thread chỉ
+lo repaint. Handler của tab chỉ post() vào đây: update cùng key (vd. cùng row)
+bị gộp, chỉ cái mới nhất được chạy (LogView gom dòng log theo cách này).
+
+Thời gian GUI thread dành cho flush (ms/giây) hiện ở UiStatsOverlay
+(Ctrl+Shift+D, hoặc bật sẵn bằng env GROK_UI_DEBUG=1).
+"""
+import time
+from typing import Callable, Hashable, Optional
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+from PySide6.QtWidgets import QLabel
+
+FLUSH_INTERVAL_MS = 100
+STATS_WINDOW_SECONDS = 1.0
+
+
+class UiUpdateScheduler(QObject):
+    # (ms GUI/giây, update nhận/giây, update thực chạy/giây)
+    stats_updated = Signal(float, int, int)
+
+    def __init__(self, interval_ms: int = FLUSH_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self._pending: dict[Hashable, Callable[[], None]] = {}
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        # Thống kê cho overlay
+        self._window_start = time.perf_counter()
+        self._busy = 0.0
+        self._posted = 0
+        self._applied = 0
+
+    def post(self, key: Optional[Hashable], fn: Callable[[], None]) -> None:
+        """Hẹn chạy fn ở flush kế tiếp. Cùng key → chỉ fn mới nhất được chạy.
+
+        key None = không gộp (luôn chạy).
+        """
+        self._posted += 1
+        self._pending[object() if key is None else key] = fn
+        self._schedule()
+
+    def cancel(self, key: Hashable) -> None:
+        """Bỏ update đang chờ của key (vd. row đã xong, không cần progress cũ)"""
+        self._pending.pop(key, None)
+
+    def _schedule(self) -> None:
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Chạy hết update đang chờ (gọi tự động mỗi interval)"""
+        started = time.perf_counter()
+        pending, self._pending = self._pending, {}
+        for fn in pending.values():
+            try:
+                fn()
+            except Exception as e:
+                print(f"[UiUpdates] Update failed: {e}")
+        now = time.perf_counter()
+        self._busy += now - started
+        self._applied += len(pending)
+        if not self._pending:
+            self._timer.stop()
+        self._report(now, force=not self._timer.isActive())  # idle → báo 1 lần cho overlay
+
+    def _report(self, now: float, force: bool = False) -> None:
+        elapsed = now - self._window_start
+        if elapsed < STATS_WINDOW_SECONDS and not force:
+            return
+        elapsed = max(elapsed, STATS_WINDOW_SECONDS)
+        self.stats_updated.emit(self._busy * 1000 / elapsed,
+                                round(self._posted / elapsed), round(self._applied / elapsed))
+        self._window_start = now
+        self._busy = 0.0
+        self._posted = self._applied = 0
+
+
+class UiStatsOverlay(QLabel):
+    """Label nhỏ góc trên phải: thời gian GUI dành cho update mỗi giây"""
+
+    def __init__(self, scheduler: UiUpdateScheduler, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "background: rgba(0, 0, 0, 160); color: #2ecc71; font: 10px 'Consolas';"
+            "padding: 3px 6px; border-radius: 4px;"
+        )
+        self._on_stats(0.0, 0, 0)
+        scheduler.stats_updated.connect(self._on_stats)
+        self.hide()
+
+    def _on_stats(self, busy_ms: float, posted: int, applied: int) -> None:
+        self.setText(f"UI {busy_ms:.1f} ms/s · {posted} ev/s → {applied} applied")
+        self.adjustSize()
+        self.reposition()
+
+    def reposition(self) -> None:
+        if self.parentWidget():
+            self.move(self.parentWidget().width() - self.width() - 8, 8)
+            self.raise_()
+
+    def toggle(self) -> None:
+        self.setVisible(not self.isVisible())
+        self.reposition()
+
+
+_shared: Optional[UiUpdateScheduler] = None
+
+
+def shared_scheduler() -> UiUpdateScheduler:
+    """Scheduler dùng chung cho các tab (tạo lần đầu trên GUI thread)"""
+    global _shared
+    if _shared is None:
+        _shared = UiUpdateScheduler()
+    return _shared
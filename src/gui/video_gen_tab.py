@@ -1,16 +1,18 @@
 """Video Generation Tab - Clean Modern UI with Multi-Tab Support + Image-to-Video"""
 import json
-import re
+import logging
 import os
 import asyncio
 from pathlib import Path
 from datetime import datetime
+from uuid import uuid4
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
     QTextEdit, QComboBox, QPushButton, QMessageBox, QCheckBox,
     QFileDialog, QLabel, QTableWidget, QTableWidgetItem, QLineEdit,
     QHeaderView, QSplitter, QFrame, QTabWidget, QProgressBar, QScrollArea,
-    QButtonGroup, QRadioButton, QListWidget, QListWidgetItem, QDialog, QSlider
+    QButtonGroup, QRadioButton, QListWidget, QListWidgetItem, QDialog, QSlider,
+    QInputDialog
 )
 from PySide6.QtCore import Signal, QThread, Qt, QTimer, QTime, QSize, QUrl
 from PySide6.QtGui import QColor, QFont, QPixmap, QIcon
@@ -21,6 +23,21 @@ from ..core.account_manager import AccountManager
 from ..core.video_generator import VideoGenerator, MultiTabVideoGenerator, ZENDRIVER_AVAILABLE
 from ..core.history_manager import HistoryManager
 from ..core.grok_api import GrokAPI, VIDEO_DOWNLOAD_URL
+from ..core import run_log
+from ..core import job_journal
+from ..core.prompt_import import PromptItems, take_items
+from ..core.result_cache import reuse_output, video_output_name
+from ..core.download_sink import DownloadError, download_to_file
+from ..core.mp4_check import mp4_problem
+from ..core.progress import ProgressEvent, ProgressReporter, Stage, STAGE_PERCENT
+from .image_thumbnails import shared_loader
+from .ui_updates import shared_scheduler
+from .log_view import LogView
+from .prompt_importer import PREVIEW_LINES, PromptImportWorker
+from .content_keys import ContentKeyWorker
+from .progress_delegate import (
+    ACTIVE, DONE, FAILED, FINAL_STATES, STATE_ROLE, WARNING, ProgressDelegate, set_progress
+)
 
 # --- Video limit helpers (gọi D1 API) ---
 AUTH_API_BASE = "https://grok-auth-api.kh431248.workers.dev"
@@ -158,14 +175,7 @@ class NoScrollComboBox(QComboBox):
     def wheelEvent(self, event):
         event.ignore()  # Bỏ qua scroll event
 from ..core.models import VideoSettings
-
-
-def natural_sort_key(s):
-    """Natural sort key: '2.jpg' < '10.jpg' (not lexicographic)"""
-    return [int(c) if c.isdigit() else c.lower() for c in re.split(r'(\d+)', str(s))]
-
-
-IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp'}
+from ..core.dir_index import IMAGE_EXTENSIONS, find_image_pairs, shared_indexer
 
 SETTINGS_FILE = None  # Resolved lazily via paths module
 DEFAULT_OUTPUT_DIR = None  # Resolved lazily via paths module
@@ -188,18 +198,21 @@ class AccountWorker(QThread):
     Supports both text-to-video and image-to-video.
     """
     status_update = Signal(str, str)  # email, message
-    task_completed = Signal(str, object)  # email, VideoTask
+    progress = Signal(object)  # ProgressEvent
+    task_completed = Signal(str, str, object)  # email, task_id, VideoTask
     all_finished = Signal(str)  # email
     
-    def __init__(self, account, prompts, settings, output_dir, num_tabs=3, headless=True):
+    def __init__(self, account, prompts, settings, output_dir, num_tabs=3, headless=True, task_ids=None):
         """
         Args:
             prompts: List of tuples (prompt, image_path, subfolder, stt)
             output_dir: Base output directory
+            task_ids: Id song song với prompts (tab dùng để tra row)
         """
         super().__init__()
         self.account = account
         self.prompts = prompts  # list of (prompt, image_path, subfolder, stt)
+        self.task_ids = list(task_ids) if task_ids else [uuid4().hex for _ in prompts]
         self.settings = settings
         self.output_dir = output_dir
         self.num_tabs = num_tabs
@@ -230,7 +243,8 @@ class AccountWorker(QThread):
             account=self.account,
             num_tabs=self.num_tabs,
             headless=self.headless,
-            on_status=lambda email, msg: self.status_update.emit(email, msg)
+            on_status=lambda email, msg: self.status_update.emit(email, msg),
+            on_progress=self._on_progress
         )
         
         try:
@@ -242,20 +256,22 @@ class AccountWorker(QThread):
                 )
                 return
             
-            # Generate videos
-            def on_task_complete(task):
-                self.task_completed.emit(self.account.email, task)
-            
+            # Generate videos — kết quả từng task đi qua ProgressEvent (COMPLETED/FAILED)
             await self._generator.generate_batch(
                 self.prompts,
                 self.settings,
-                on_task_complete,
-                output_dir=self.output_dir
+                output_dir=self.output_dir,
+                task_ids=self.task_ids
             )
             
         finally:
             await self._generator.stop()
     
+    def _on_progress(self, event: ProgressEvent):
+        self.progress.emit(event)
+        if event.stage.is_final and event.result is not None:
+            self.task_completed.emit(self.account.email, event.task_id, event.result)
+    
     def stop(self):
         self._stopped = True
         if self._generator:
@@ -269,14 +285,15 @@ class APIAccountWorker(QThread):
     Hỗ trợ multi-thread concurrent (num_tabs video cùng lúc).
     """
     status_update = Signal(str, str)  # email, message
-    task_completed = Signal(str, object)  # email, VideoTask
-    step_progress = Signal(str, int, int)  # email, queue_index, percent (0-100)
+    progress = Signal(object)  # ProgressEvent (task_id, stage, percent, elapsed)
+    task_completed = Signal(str, str, object)  # email, task_id, VideoTask
     all_finished = Signal(str)  # email
 
-    def __init__(self, account, prompts, settings, output_dir, num_tabs=3, headless=True):
+    def __init__(self, account, prompts, settings, output_dir, num_tabs=3, headless=True, task_ids=None):
         super().__init__()
         self.account = account
         self.prompts = prompts  # list of (prompt, image_path, subfolder, stt)
+        self.task_ids = list(task_ids) if task_ids else [uuid4().hex for _ in prompts]
         self.settings = settings
         self.output_dir = output_dir
         self.num_tabs = num_tabs
@@ -308,11 +325,12 @@ class APIAccountWorker(QThread):
 
         def _process_with_retry(cookies, item, i, total):
             """Wrapper retry 3 lần cho _process_one — chỉ emit failed task sau lần cuối"""
+            report = ProgressReporter(self.progress.emit, self.task_ids[i], email)
             for attempt in range(1, MAX_RETRIES + 1):
                 if self._stopped:
                     return
                 try:
-                    self._process_one(cookies, item, i, total)
+                    self._process_one(cookies, item, i, total, report)
                     return  # Thành công → thoát
                 except Exception as e:
                     if attempt < MAX_RETRIES:
@@ -321,7 +339,7 @@ class APIAccountWorker(QThread):
                             f"   🔄 [{i+1}/{total}] Retry {attempt}/{MAX_RETRIES} sau 5s... ({str(e)[:60]})"
                         )
                         # Reset progress bar về 0 cho lần retry tiếp
-                        self.step_progress.emit(email, i, 0)
+                        report(Stage.RETRYING, message=str(e)[:60])
                         time.sleep(5)
                     else:
                         # Hết retry → emit failed task + raise
@@ -340,8 +358,8 @@ class APIAccountWorker(QThread):
                             status="failed",
                             error_message=f"Failed sau {MAX_RETRIES} retries: {str(e)[:100]}",
                         )
-                        self.step_progress.emit(email, i, -1)
-                        self.task_completed.emit(email, failed_task)
+                        report(Stage.FAILED, message=failed_task.error_message, result=failed_task)
+                        self.task_completed.emit(email, self.task_ids[i], failed_task)
                         raise
 
         try:
@@ -371,7 +389,7 @@ class APIAccountWorker(QThread):
         self.all_finished.emit(email)
 
 
-    def _process_one(self, cookies, item, idx, total):
+    def _process_one(self, cookies, item, idx, total, report: ProgressReporter):
         """Xử lý 1 video — chạy trong thread pool.
 
         Hỗ trợ 2 mode:
@@ -409,7 +427,7 @@ class APIAccountWorker(QThread):
         )
 
         mode_label = "🖼️ Img→Vid" if is_image_mode else "📝 Txt→Vid"
-        self.step_progress.emit(email, idx, 5)
+        report(Stage.STARTED)
         self.status_update.emit(email, f"[{idx+1}/{total}] {mode_label} 📤 {prompt[:40]}...")
         self.status_update.emit(email, f"   ⚙️ Settings: {self.settings.aspect_ratio}, {self.settings.video_length}s, {self.settings.resolution}")
 
@@ -418,7 +436,7 @@ class APIAccountWorker(QThread):
             if is_image_mode:
                 # ===== IMAGE-TO-VIDEO FLOW =====
                 # Step 1a: Upload image
-                self.step_progress.emit(email, idx, 10)
+                report(Stage.UPLOADING)
                 self.status_update.emit(email, f"   📤 Uploading image: {Path(image_path).name}...")
                 file_id = api.upload_image(
                     cookies=cookies,
@@ -429,7 +447,7 @@ class APIAccountWorker(QThread):
                     raise RuntimeError("Upload image failed")
 
                 # Step 1b: Check asset ready
-                self.step_progress.emit(email, idx, 13)
+                report(Stage.UPLOADING, 13, "check asset")
                 self.status_update.emit(email, f"   🔍 Checking asset ready...")
                 asset_ok = api.check_asset_ready(
                     cookies=cookies,
@@ -442,7 +460,7 @@ class APIAccountWorker(QThread):
                     raise RuntimeError("Asset not ready after upload")
 
                 # Step 1c: Update user settings
-                self.step_progress.emit(email, idx, 16)
+                report(Stage.UPLOADING, 16, "settings")
                 api.update_user_settings(
                     cookies=cookies,
                     disable_auto_video=True,
@@ -450,7 +468,7 @@ class APIAccountWorker(QThread):
                 )
 
                 # Step 1d: Create media post (lấy parentPostId cho share link)
-                self.step_progress.emit(email, idx, 18)
+                report(Stage.CREATING_POST, 18)
                 parent_id = api.create_media_post(
                     cookies=cookies,
                     prompt=prompt or "image to video",
@@ -462,7 +480,7 @@ class APIAccountWorker(QThread):
                 time.sleep(0.5)
 
                 # Step 2: Conversations new with fileAttachments + parentPostId
-                self.step_progress.emit(email, idx, 20)
+                report(Stage.RENDERING, 20)
                 user_id = cookies.get("x-userid", "")
                 post_id = api.conversations_new(
                     cookies=cookies,
@@ -472,14 +490,14 @@ class APIAccountWorker(QThread):
                     video_length=self.settings.video_length,
                     resolution=self.settings.resolution,
                     on_status=lambda msg, e=email: self.status_update.emit(e, msg),
-                    on_progress=lambda pct, e=email, i=idx: self.step_progress.emit(e, i, pct),
+                    on_progress=lambda pct: report(Stage.RENDERING, pct),
                     file_attachment_id=file_id,
                     user_id=user_id,
                 )
             else:
                 # ===== TEXT-TO-VIDEO FLOW =====
                 # Step 1: Create media post
-                self.step_progress.emit(email, idx, 20)
+                report(Stage.CREATING_POST)
                 parent_id = api.create_media_post(
                     cookies=cookies,
                     prompt=prompt,
@@ -491,7 +509,7 @@ class APIAccountWorker(QThread):
                 time.sleep(1)
 
                 # Step 2: Conversations new → postId
-                self.step_progress.emit(email, idx, 50)
+                report(Stage.RENDERING)
                 post_id = api.conversations_new(
                     cookies=cookies,
                     prompt=prompt,
@@ -500,7 +518,7 @@ class APIAccountWorker(QThread):
                     video_length=self.settings.video_length,
                     resolution=self.settings.resolution,
                     on_status=lambda msg, e=email: self.status_update.emit(e, msg),
-                    on_progress=lambda pct, e=email, i=idx: self.step_progress.emit(e, i, pct),
+                    on_progress=lambda pct: report(Stage.RENDERING, pct),
                 )
 
             # === Common: check postId ===
@@ -508,7 +526,7 @@ class APIAccountWorker(QThread):
                 raise RuntimeError("Conversations new failed — không tìm thấy postId")
 
             # === Step 3: Create share link (retry — đợi video render xong) ===
-            self.step_progress.emit(email, idx, 70)
+            report(Stage.SHARING)
             share_ok = api.create_share_link(
                 cookies=cookies,
                 post_id=post_id,
@@ -518,46 +536,51 @@ class APIAccountWorker(QThread):
             )
 
             # === Step 4: Download video ===
-            self.step_progress.emit(email, idx, 90)
+            report(Stage.DOWNLOADING)
             video_url = VIDEO_DOWNLOAD_URL.format(post_id=post_id)
-            output_path = None
+            download = None
 
             if share_ok:
                 # Thử download, retry nếu chưa sẵn sàng
                 for attempt in range(1, 5):
-                    output_path = self._download_video(cookies, post_id, video_url, subfolder, stt, prompt)
-                    if output_path:
+                    download = self._download_video(cookies, post_id, video_url, subfolder, stt, prompt)
+                    if download:
                         break
                     self.status_update.emit(email, f"   ⏳ Video chưa sẵn sàng, retry {attempt}/4 sau 5s...")
                     time.sleep(5)
             else:
                 self.status_update.emit(email, f"   ⚠️ Share link failed, thử download trực tiếp...")
-                output_path = self._download_video(cookies, post_id, video_url, subfolder, stt, prompt)
+                download = self._download_video(cookies, post_id, video_url, subfolder, stt, prompt)
 
             task.post_id = post_id
             task.media_url = video_url
             task.status = "completed"
             task.completed_at = datetime.now()
             task.account_cookies = cookies
-            if output_path:
-                task.output_path = output_path
+            if download:
+                task.output_path = download.path
+                task.file_size = download.size
+                task.file_sha256 = download.sha256
 
-            self.step_progress.emit(email, idx, 100)
+            report(Stage.COMPLETED, result=task)
             self.status_update.emit(email, f"[{idx+1}/{total}] ✅ {post_id[:12]}...")
-            self.task_completed.emit(email, task)
+            self.task_completed.emit(email, report.task_id, task)
 
         except Exception as e:
             task.status = "failed"
             task.error_message = str(e)
-            self.step_progress.emit(email, idx, -1)
-            # Không emit task_completed ở đây — retry wrapper sẽ xử lý
+            # Không emit task_completed / FAILED ở đây — retry wrapper sẽ xử lý
             raise
         finally:
             api.close()
 
 
     def _download_video(self, cookies, post_id, video_url, subfolder, stt, prompt):
-        """Download video qua curl_cffi — không cần browser."""
+        """Download video qua curl_cffi — không cần browser.
+
+        Stream từng chunk vào .part (resume bằng Range nếu đứt) → rename khi đủ.
+        Trả về DownloadResult (path, size, sha256) hoặc None.
+        """
         try:
             from curl_cffi import requests as curl_requests
         except ImportError:
@@ -568,6 +591,7 @@ class APIAccountWorker(QThread):
             from ..core.grok_api import USER_AGENT
             # Detect nếu là assets.grok.com → dùng Referer khác
             is_assets = "assets.grok.com" in video_url
+            cookie_str = "; ".join(f"{k}={v}" for k, v in cookies.items() if v)
             headers = {
                 "User-Agent": USER_AGENT,
                 "Accept": "*/*",
@@ -576,41 +600,27 @@ class APIAccountWorker(QThread):
                 "Sec-Fetch-Dest": "empty",
                 "Sec-Fetch-Mode": "cors",
                 "Sec-Fetch-Site": "same-site" if is_assets else "cross-site",
+                "Cookie": cookie_str,
             }
-            cookie_str = "; ".join(f"{k}={v}" for k, v in cookies.items() if v)
-
-            resp = curl_requests.get(
-                video_url,
-                headers={**headers, "Cookie": cookie_str},
-                impersonate="chrome133a",
-                timeout=120,
-            )
 
-            content_len = len(resp.content) if resp.content else 0
-
-            if resp.status_code == 200 and content_len > 10000:
-                # Xác định output path
-                base = Path(self.output_dir)
-                if subfolder:
-                    base = base / subfolder
-                base.mkdir(parents=True, exist_ok=True)
-
-                # Tên file: stt_prompt_postid.mp4
-                safe_prompt = re.sub(r'[^\w\s-]', '', prompt[:30]).strip().replace(' ', '_')
-                filename = f"{stt:03d}_{safe_prompt}_{post_id[:8]}.mp4"
-                filepath = base / filename
-
-                with open(filepath, "wb") as f:
-                    f.write(resp.content)
+            # Xác định output path — Tên file: stt_prompt_postid.mp4
+            base = Path(self.output_dir)
+            if subfolder:
+                base = base / subfolder
+            filepath = base / video_output_name(stt, prompt, post_id)
 
-                size_mb = content_len / (1024 * 1024)
-                self.status_update.emit(self.account.email, f"📥 Downloaded: {filename} ({size_mb:.1f}MB)")
-                return str(filepath)
-            else:
-                self.status_update.emit(self.account.email,
-                    f"⚠️ Download failed: status={resp.status_code} size={content_len}")
-                return None
+            result = download_to_file(
+                curl_requests.get, video_url, filepath, headers,
+                validate=mp4_problem, impersonate="chrome133a", timeout=120,
+            )
+            size_mb = result.size / (1024 * 1024)
+            resumed = f", resume từ {result.resumed_from // 1024}KB" if result.resumed_from else ""
+            self.status_update.emit(self.account.email, f"📥 Downloaded: {filepath.name} ({size_mb:.1f}MB{resumed})")
+            return result
 
+        except DownloadError as e:
+            self.status_update.emit(self.account.email, f"⚠️ Download failed: {e}")
+            return None
         except Exception as e:
             self.status_update.emit(self.account.email, f"⚠️ Download error: {e}")
             return None
@@ -736,14 +746,35 @@ class VideoGenTab(QWidget):
         self.account_prompts: dict = {}  # email -> list of prompts
         self.account_prompt_idx: dict = {}  # email -> current index in queue table
         
-        # Track which tab is currently processing which queue index
-        # key: "email:tab_num" -> queue_idx
-        self.tab_current_idx: dict = {}
+        # task_id (do tab cấp cho mỗi row queue) <-> row
+        self._task_ids: list = []
+        self._row_by_task: dict = {}
+        # content_key từng row (tính lúc Start) + settings đã dùng → history không hash lại
+        self._content_keys: list = []
+        self._key_settings = None
+        
+        # Journal batch (jobs.db) → tắt app giữa chừng vẫn "Tiếp tục" được
+        self.journal = job_journal.shared_journal()
+        self._batch_id = None
+        self._job_idx: list = []  # row queue -> idx item trong journal
+        self._resume_plan = None  # (BatchInfo, [JobItem]) chờ _start dùng
         
         # Output folder & batch tracking
         self._output_dir = str(_output_dir())
         self._current_batch_name = ""  # subfolder name (from TXT filename)
-        self._batch_queue: list = []  # list of (batch_name, [prompts]) for folder import
+        self._imported = None  # PromptStore từ Nhập TXT / Nhập Folder (None = dùng ô nhập)
+        self._import_worker = None
+        self._key_worker = None  # ContentKeyWorker của lần Start đang chờ
+        self._key_plan = None
+        
+        # Thumbnail ảnh nguồn (i2v) decode nền → path -> các row queue đang chờ
+        self.thumb_loader = shared_loader()
+        self.thumb_loader.ready.connect(self._on_thumbnail_loaded)
+        self.thumb_loader.failed.connect(self._on_thumbnail_failed)
+        self._pending_thumbs: dict = {}
+        
+        # Update từ worker gom lại, áp dụng mỗi ~100ms (không repaint theo từng signal)
+        self.ui_updates = shared_scheduler()
         
         self._setup_ui()
         self.refresh_accounts()
@@ -1046,10 +1077,14 @@ class VideoGenTab(QWidget):
         self.start_btn = QPushButton("▶️ Bắt đầu")
         self.stop_btn = QPushButton("⏹️ Dừng")
         self.stop_btn.setEnabled(False)
+        self.resume_btn = QPushButton("⏯️ Tiếp tục")
+        self.resume_btn.setToolTip("Tiếp tục batch trước (bỏ qua video đã xong)")
         self.start_btn.clicked.connect(self._start)
         self.stop_btn.clicked.connect(self._stop)
+        self.resume_btn.clicked.connect(self._resume_batch)
         ctrl_row.addWidget(self.start_btn)
         ctrl_row.addWidget(self.stop_btn)
+        ctrl_row.addWidget(self.resume_btn)
         left_layout.addLayout(ctrl_row)
         
         left_layout.addStretch()
@@ -1082,6 +1117,7 @@ class VideoGenTab(QWidget):
         self.queue_table.setColumnWidth(3, 120)
         self.queue_table.setIconSize(QSize(40, 40))
         self.queue_table.verticalHeader().setDefaultSectionSize(44)  # Đủ chỗ cho thumbnail 40x40
+        self.queue_table.setItemDelegateForColumn(3, ProgressDelegate(self.queue_table))
         # Double-click cột Prompt để sửa
         self.queue_table.setEditTriggers(QTableWidget.NoEditTriggers)
         self.queue_table.cellDoubleClicked.connect(self._on_queue_double_click)
@@ -1133,9 +1169,8 @@ class VideoGenTab(QWidget):
         self.log_title.setFont(QFont("Segoe UI", 10, QFont.Bold))
         right_layout.addWidget(self.log_title)
         
-        self.log = QTextEdit()
-        self.log.setReadOnly(True)
-        self.log.setMaximumHeight(100)
+        self.log = LogView("video")
+        self.log.setMaximumHeight(130)
         right_layout.addWidget(self.log)
         
         splitter.addWidget(right)
@@ -1221,7 +1256,7 @@ class VideoGenTab(QWidget):
                 QPushButton:hover { background: rgba(55, 65, 85, 240); }
             """
             log_style = """
-                QTextEdit {
+                QListView {
                     background: rgba(10, 15, 25, 220);
                     color: #0f0;
                     border: 1px solid rgba(0, 200, 0, 40);
@@ -1305,7 +1340,7 @@ class VideoGenTab(QWidget):
                 QPushButton:hover { background: #f5f5f5; }
             """
             log_style = """
-                QTextEdit {
+                QListView {
                     background: rgba(20, 30, 50, 240);
                     color: #0f0;
                     border: 1px solid rgba(0, 150, 0, 50);
@@ -1414,6 +1449,14 @@ class VideoGenTab(QWidget):
             QPushButton:hover { background: #c0392b; }
             QPushButton:disabled { background: #666; color: #999; }
         """)
+        self.resume_btn.setStyleSheet("""
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #2980b9, stop:1 #3498db);
+                color: white; border: none; border-radius: 6px; padding: 10px 14px; font-weight: bold;
+            }
+            QPushButton:hover { background: #3498db; }
+            QPushButton:disabled { background: #666; color: #999; }
+        """)
         self.regen_btn.setStyleSheet("""
             QPushButton {
                 background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #e67e22, stop:1 #f39c12);
@@ -1530,12 +1573,8 @@ class VideoGenTab(QWidget):
         if not folder:
             return
         
-        # Find images with natural sort
-        images = []
-        for f in Path(folder).iterdir():
-            if f.suffix.lower() in IMAGE_EXTENSIONS and f.is_file():
-                images.append(f)
-        images.sort(key=lambda f: natural_sort_key(f.name))
+        # Find images with natural sort (1 lần scandir, cache theo mtime)
+        images = [Path(e.path) for e in shared_indexer().scan(folder).files(IMAGE_EXTENSIONS)]
         
         if not images:
             QMessageBox.warning(self, "Lỗi", f"Không tìm thấy ảnh trong:\n{folder}")
@@ -1620,47 +1659,15 @@ class VideoGenTab(QWidget):
         parent_path = Path(parent)
         found_pairs = 0
         
-        # Tìm tất cả subfolder có file TXT cùng tên
-        for item in sorted(parent_path.iterdir(), key=lambda f: natural_sort_key(f.name)):
-            if not item.is_dir():
-                continue
-            # Skip hidden folders
-            if item.name.startswith('.'):
-                continue
-            
-            # Tìm file TXT match: cùng tên subfolder hoặc nằm trong subfolder
-            txt_candidates = [
-                parent_path / f"{item.name}.txt",           # parent/subfolder.txt
-                item / f"{item.name}.txt",                   # subfolder/subfolder.txt
-                item / "prompt.txt",                          # subfolder/prompt.txt
-                item / "prompts.txt",                         # subfolder/prompts.txt
-            ]
-            
-            txt_path = None
-            for candidate in txt_candidates:
-                if candidate.exists():
-                    txt_path = candidate
-                    break
-            
-            if not txt_path:
-                # Tìm bất kỳ file .txt nào trong parent cùng tên
-                for f in parent_path.iterdir():
-                    if f.suffix.lower() == '.txt' and f.stem.lower() == item.name.lower():
-                        txt_path = f
-                        break
-            
-            if not txt_path:
-                continue
-            
-            # Tìm ảnh trong subfolder
-            images = []
-            for f in item.iterdir():
-                if f.suffix.lower() in IMAGE_EXTENSIONS and f.is_file():
-                    images.append(f)
-            images.sort(key=lambda f: natural_sort_key(f.name))
-            
-            if not images:
-                continue
+        # Subfolder có file TXT cùng tên — mỗi thư mục scandir 1 lần (song song, cache theo mtime)
+        try:
+            pairs = find_image_pairs(parent_path, shared_indexer())
+        except OSError as e:
+            QMessageBox.warning(self, "Lỗi", f"Không đọc được folder:\n{e}")
+            return
+        
+        for pair in pairs:
+            item, txt_path, images = pair.folder, pair.txt_path, pair.images
             
             # Đọc prompts
             try:
@@ -1758,59 +1765,71 @@ class VideoGenTab(QWidget):
     
     def _clear_prompts(self):
         """Clear prompts and batch info"""
+        if self._import_worker:
+            # Kể cả khi worker vừa chạy xong: signal imported có thể còn trong hàng đợi
+            self._import_worker.requestInterruption()
+        self._imported = None
         self.prompt_input.clear()
-        self._batch_queue = []
+        self.prompt_input.setReadOnly(False)
         self.batch_info.setText("")
     
     def _import_prompts(self):
         path, _ = QFileDialog.getOpenFileName(self, "Chọn file", "", "Text (*.txt)")
         if path:
-            try:
-                from pathlib import Path
-                txt_path = Path(path)
-                with open(path, 'r', encoding='utf-8') as f:
-                    prompts = [l.strip() for l in f if l.strip()]
-                self.prompt_input.setPlainText('\n'.join(prompts))
-                
-                # Store batch info: single file = single batch
-                subfolder_name = txt_path.stem  # filename without .txt
-                self._batch_queue = [(subfolder_name, prompts)]
-                self.batch_info.setText(f"📁 Batch: {subfolder_name} ({len(prompts)} prompts)")
-                
-                self._log(f"✅ Đã nhập {len(prompts)} prompt từ {subfolder_name}.txt")
-            except Exception as e:
-                QMessageBox.warning(self, "Lỗi", str(e))
+            self._start_import([Path(path)])
 
     def _import_folder(self):
         """Import folder chứa nhiều file TXT - mỗi file = 1 batch với subfolder riêng"""
         folder = QFileDialog.getExistingDirectory(self, "Chọn folder chứa file TXT")
         if folder:
-            try:
-                from pathlib import Path
-                txt_files = sorted(Path(folder).glob("*.txt"))
-                if not txt_files:
-                    QMessageBox.warning(self, "Lỗi", "Không tìm thấy file .txt trong folder")
-                    return
-                
-                # Store batch info: list of (subfolder_name, [prompts])
-                self._batch_queue = []
-                all_prompts = []
-                
-                for f in txt_files:
-                    lines = [l.strip() for l in f.read_text(encoding='utf-8').splitlines() if l.strip()]
-                    if lines:
-                        subfolder_name = f.stem  # filename without .txt
-                        self._batch_queue.append((subfolder_name, lines))
-                        all_prompts.extend(lines)
-                
-                self.prompt_input.setPlainText('\n'.join(all_prompts))
-                self._log(f"✅ Đã nhập {len(all_prompts)} prompt từ {len(txt_files)} file")
-                
-                # Show batch info
-                batch_info = ", ".join([f"{name}({len(prompts)})" for name, prompts in self._batch_queue])
-                self.batch_info.setText(f"📁 Batches: {batch_info}")
-            except Exception as e:
-                QMessageBox.warning(self, "Lỗi", str(e))
+            txt_files = sorted(Path(folder).glob("*.txt"))
+            if not txt_files:
+                QMessageBox.warning(self, "Lỗi", "Không tìm thấy file .txt trong folder")
+                return
+            self._start_import(txt_files)
+    
+    def _start_import(self, paths):
+        """Đọc TXT nền (từng dòng) — UI chỉ nhận tiến độ và kết quả"""
+        if self._import_worker and self._import_worker.isRunning():
+            return
+        self.import_btn.setEnabled(False)
+        self.import_folder_btn.setEnabled(False)
+        self.batch_info.setText(f"⏳ Đang đọc {len(paths)} file...")
+        worker = PromptImportWorker(paths)
+        worker.progress.connect(self._on_import_progress)
+        worker.imported.connect(self._on_imported)
+        worker.failed.connect(lambda err: QMessageBox.warning(self, "Lỗi", err))
+        worker.finished.connect(self._on_import_finished)
+        self._import_worker = worker
+        worker.start()
+    
+    def _on_import_progress(self, done, total, count):
+        pct = int(done * 100 / total) if total else 100
+        self.batch_info.setText(f"⏳ Đang đọc... {pct}% — {count:,} prompt")
+    
+    def _on_imported(self, store):
+        worker = self.sender()
+        if worker is not None and worker.isInterruptionRequested():
+            return  # đã bấm Xóa trong lúc import
+        if not len(store):
+            QMessageBox.warning(self, "Lỗi", "File TXT không có prompt nào")
+            return
+        self._imported = store
+        # Chỉ hiện preview — không đổ toàn bộ prompt vào QTextEdit
+        self.prompt_input.setPlainText('\n'.join(store.preview(PREVIEW_LINES)))
+        self.prompt_input.setReadOnly(True)
+        more = f" (hiện {PREVIEW_LINES} đầu)" if len(store) > PREVIEW_LINES else ""
+        if len(store.batches) == 1:
+            self.batch_info.setText(f"📁 Batch: {store.batches[0][0]} ({len(store):,} prompts){more}")
+        else:
+            self.batch_info.setText(f"📁 Batches: {store.summary()}{more}")
+        self._log(f"✅ Đã nhập {len(store):,} prompt từ {len(store.batches)} file")
+    
+    def _on_import_finished(self):
+        self.import_btn.setEnabled(True)
+        self.import_folder_btn.setEnabled(True)
+        if self._imported is None and self.batch_info.text().startswith("⏳"):
+            self.batch_info.setText("")
 
     def _browse_output(self):
         folder = QFileDialog.getExistingDirectory(self, "Chọn thư mục xuất video")
@@ -1823,28 +1842,28 @@ class VideoGenTab(QWidget):
         """Start multi-tab video generation (text or image mode)"""
         from pathlib import Path
         
+        plan, self._resume_plan = self._resume_plan, None
+        
         # Build prompt list based on mode
-        if self._gen_mode == "image":
+        if plan is not None:
+            # Tiếp tục batch: item chưa xong trong journal
+            batch, jobs = plan
+            all_items = [(j.prompt, j.image_path, j.subfolder, j.stt) for j in jobs]
+        elif self._gen_mode == "image":
             # Image mode: get (prompt, image_path, subfolder, stt) tuples
             all_items = self._get_image_prompts()
             if not all_items:
                 QMessageBox.warning(self, "Lỗi", "Thêm ít nhất 1 cặp Folder + TXT")
                 return
         else:
-            # Text mode: get prompts from text input
-            text = self.prompt_input.toPlainText().strip()
-            if not text:
-                QMessageBox.warning(self, "Lỗi", "Nhập prompt trước")
-                return
-            
-            # Check if we have batch info from folder import
-            if hasattr(self, '_batch_queue') and self._batch_queue:
-                # Build items with subfolder info from batch queue
-                all_items = []
-                for subfolder_name, prompts in self._batch_queue:
-                    for idx, prompt in enumerate(prompts, start=1):
-                        all_items.append((prompt, None, subfolder_name, idx))
+            # Text mode: prompt từ file đã import (đọc thẳng từ PromptStore) hoặc ô nhập
+            if self._imported is not None:
+                all_items = PromptItems(self._imported, with_image=True)
             else:
+                text = self.prompt_input.toPlainText().strip()
+                if not text:
+                    QMessageBox.warning(self, "Lỗi", "Nhập prompt trước")
+                    return
                 # Simple text input - no subfolder
                 prompts = [p.strip() for p in text.split('\n') if p.strip()]
                 all_items = [(p, None, None, i+1) for i, p in enumerate(prompts)]
@@ -1873,6 +1892,42 @@ class VideoGenTab(QWidget):
                 total = len(all_items)
                 self._log(f"⚠️ Chỉ tạo {remaining} video (giới hạn quota)")
         
+        # Prompt đã có video trong history (cùng prompt + settings + ảnh) → hỏi dùng lại.
+        # Hash ảnh nguồn chạy trên thread nền, xong mới tiếp tục _launch
+        settings = self._reuse_settings()
+        self.start_btn.setEnabled(False)
+        self.resume_btn.setEnabled(False)
+        self.progress_status.setText(f"🔍 Đang kiểm tra {total} prompt đã có video...")
+        worker = ContentKeyWorker(all_items, settings, image_index=1)
+        worker.computed.connect(self._on_keys_computed)
+        # Giữ reference tới khi thread kết thúc hẳn (tránh "QThread destroyed while running")
+        worker.finished.connect(self._on_key_worker_finished)
+        worker.finished.connect(worker.deleteLater)
+        self._key_plan = (plan, all_items, accounts, settings)
+        self._key_worker = worker
+        worker.start()
+    
+    def _on_keys_computed(self, keys):
+        plan, all_items, accounts, self._key_settings = self._key_plan
+        self._key_plan = None
+        self._launch(plan, all_items, accounts, keys)
+    
+    def _on_key_worker_finished(self):
+        if self.sender() is self._key_worker:
+            self._key_worker = None
+    
+    def _stop_key_worker(self):
+        """Đóng app khi đang tính content_key → chờ thread xong (không _launch nữa)"""
+        worker = self._key_worker
+        if worker is not None and worker.isRunning():
+            worker.requestInterruption()
+            worker.wait(3000)
+    
+    def _launch(self, plan, all_items, accounts, keys):
+        """Phần còn lại của _start khi đã có content_key của từng item"""
+        total = len(all_items)
+        reused = self._offer_reuse(all_items, keys)
+        
         # Create subfolders for each unique subfolder name
         base_output = Path(self._output_dir)
         subfolders_created = set()
@@ -1885,16 +1940,28 @@ class VideoGenTab(QWidget):
         if subfolders_created:
             self._log(f"📁 Tạo {len(subfolders_created)} subfolder: {', '.join(sorted(subfolders_created))}")
         
+        # Journal: batch mới hoặc batch đang tiếp tục
+        if plan is not None:
+            batch, jobs = plan
+            self._batch_id = batch.id
+            self._job_idx = [j.idx for j in jobs[:len(all_items)]]
+            self.journal.mark_pending(self._batch_id, self._job_idx)
+        else:
+            self._batch_id = self.journal.create_batch(
+                "video", all_items, self._output_dir, self._journal_settings(all_items))
+            self._job_idx = list(range(len(all_items)))
+        
         # Reset state
-        self.prompt_queue = all_items  # list of (prompt, image_path, subfolder, stt)
+        self.prompt_queue = all_items  # (prompt, image_path, subfolder, stt) — list hoặc PromptItems
         self.completed_prompts = []
         self.failed_prompts = []
         self.current_idx = 0
-        self._processed_indices = set()  # Track which queue indices have been processed
-        self._mapped_queue_indices = set()  # Track which queue indices have been mapped to tabs
+        # Mỗi row queue có task_id cố định (giữ qua retry/failover/tạo lại) → tra row O(1)
+        self._task_ids = [uuid4().hex for _ in all_items]
+        self._row_by_task = {task_id: row for row, task_id in enumerate(self._task_ids)}
+        self._content_keys = keys
         self.account_prompts = {}
         self.account_prompt_idx = {}
-        self.tab_current_idx = {}
         
         # Failover state: khi prompt fail → đổi account retry
         self._retry_queue = []  # list of (item, queue_idx, tried_emails_set)
@@ -1909,41 +1976,21 @@ class VideoGenTab(QWidget):
             prompt = item[0]
             img_path = item[1]
             self.queue_table.setItem(i, 0, QTableWidgetItem(str(i+1)))
-            prompt_item = QTableWidgetItem(prompt[:50])
-            # Lưu metadata vào UserRole để dùng cho Tạo Lại
-            prompt_item.setData(Qt.UserRole, item)  # (prompt, image_path, subfolder, stt)
-            self.queue_table.setItem(i, 1, prompt_item)
+            # Metadata gốc đọc từ prompt_queue[row]; UserRole chỉ set khi Tạo Lại sửa prompt
+            self.queue_table.setItem(i, 1, QTableWidgetItem(prompt[:50]))
             # Cột Xem — ban đầu trống, sẽ thêm nút ▶️ khi video download xong
             self.queue_table.setItem(i, 2, QTableWidgetItem(""))
-            self.queue_table.setItem(i, 3, QTableWidgetItem(""))
-            # Progress bar widget cho cột Trạng thái
-            pbar = QProgressBar()
-            pbar.setRange(0, 100)
-            pbar.setValue(0)
-            pbar.setFixedHeight(20)
-            pbar.setFormat("Chờ")
-            pbar.setAlignment(Qt.AlignCenter)
-            pbar.setStyleSheet("""
-                QProgressBar {
-                    background: rgba(40, 50, 70, 180);
-                    border: 1px solid rgba(100, 150, 255, 50);
-                    border-radius: 4px;
-                    color: white;
-                    font-size: 10px;
-                    text-align: center;
-                }
-                QProgressBar::chunk {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #3498db, stop:1 #2ecc71);
-                    border-radius: 3px;
-                }
-            """)
-            self.queue_table.setCellWidget(i, 3, pbar)
+            # Cột Trạng thái: ProgressDelegate vẽ từ data của item (không tạo widget)
+            status_item = QTableWidgetItem()
+            set_progress(status_item, 0, "Chờ")
+            self.queue_table.setItem(i, 3, status_item)
         
         self.run_table.setRowCount(0)
         self.done_table.setRowCount(0)
         
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
+        self.resume_btn.setEnabled(False)
         
         # Reset progress bar
         self.progress_bar.setRange(0, total)
@@ -1955,6 +2002,20 @@ class VideoGenTab(QWidget):
         self._start_time = QTime.currentTime()
         self._elapsed_timer.start(1000)
         
+        # Item dùng lại: xong ngay, không giao cho account nào
+        if reused:
+            from ..core.models import VideoTask
+            for i, path in reused.items():
+                prompt, image_path = all_items[i][0], all_items[i][1]
+                self.completed_prompts.append(VideoTask(prompt=prompt, image_path=image_path,
+                                                        status="completed", output_path=path))
+                self._set_row_progress(i, 100, "♻️ Dùng lại", DONE)
+                self._mark_job(i, job_journal.DONE, path)
+            self.progress_bar.setValue(len(reused))
+            self.progress_percent.setText(f"{len(reused)}/{total} — {len(reused) * 100 // total}%")
+            self._log(f"♻️ Dùng lại {len(reused)} video đã có")
+        pending = [i for i in range(total) if i not in reused]
+        
         num_tabs = 3  # 3 luồng concurrent per account
         
         # Distribute items: sequential chunks (natural sort từ trên xuống)
@@ -1964,24 +2025,26 @@ class VideoGenTab(QWidget):
             self.account_prompts[acc.email] = []
             self.account_prompt_idx[acc.email] = []
         
-        chunk_size = total // n_acc
-        remainder = total % n_acc
+        chunk_size = len(pending) // n_acc
+        remainder = len(pending) % n_acc
         offset = 0
         for ai, acc in enumerate(accounts):
             # Accounts đầu nhận thêm 1 item nếu có dư
             count = chunk_size + (1 if ai < remainder else 0)
-            for j in range(count):
-                idx = offset + j
-                if idx < total:
-                    self.account_prompts[acc.email].append(all_items[idx])
-                    self.account_prompt_idx[acc.email].append(idx)
+            idxs = pending[offset:offset + count]
+            self.account_prompts[acc.email] = take_items(all_items, idxs)
+            self.account_prompt_idx[acc.email] = idxs
             offset += count
         
         # Lưu danh sách accounts để failover
         self._all_accounts = accounts[:]
         
+        if not pending:
+            self._finish_run()
+            return
+        
         total_concurrent = len(accounts) * num_tabs
-        self._log(f"🚀 Starting {total} videos ({mode_label})")
+        self._log(f"🚀 Starting {len(pending)} videos ({mode_label})")
         self._log(f"   {len(accounts)} accounts × {num_tabs} tabs = {total_concurrent} concurrent")
         for acc in accounts:
             idx_list = self.account_prompt_idx[acc.email]
@@ -2036,11 +2099,12 @@ class VideoGenTab(QWidget):
         worker = APIAccountWorker(
             account, items, settings, self._output_dir,
             num_tabs=num_tabs,
-            headless=True
+            headless=True,
+            task_ids=[self._task_ids[i] for i in idx_list]
         )
         worker.status_update.connect(self._on_account_status)
         worker.task_completed.connect(self._on_task_completed)
-        worker.step_progress.connect(self._on_step_progress)
+        worker.progress.connect(self._on_progress)
         worker.all_finished.connect(self._on_account_finished)
         
         self.account_workers[account.email] = worker
@@ -2056,255 +2120,98 @@ class VideoGenTab(QWidget):
     def _on_account_status(self, email, msg):
         """Handle status update from account worker.
         
-        Quy tắc:
-        - Browser-level messages (không có [TabN]): chỉ update running table
-        - Tab-level messages (có [TabN]): update queue table cho prompt đang xử lý
+        Chỉ update running table + status bar chung. Tiến độ từng row queue
+        đi qua ProgressEvent (_on_progress), không parse text log.
+        Update được gom theo account → chỉ message mới nhất mỗi frame được vẽ.
         """
-        import re
-        
-        # Update running table — luôn luôn
-        for i in range(self.run_table.rowCount()):
-            if self.run_table.item(i, 0) and self.run_table.item(i, 0).text() == email:
-                short_msg = msg.split(']')[-1].strip()[:40] if ']' in msg else msg[:40]
-                self.run_table.setItem(i, 2, QTableWidgetItem(short_msg))
-                break
-        
-        # Check if tab-level message
-        tab_match = re.search(r'\[Tab(\d+)\]', msg)
+        # Chi tiết từng bước của worker → level DEBUG (ẩn khi lọc Info), lỗi giữ level
+        level = run_log.guess_level(msg)
+        self._log(msg, account=email, level=logging.DEBUG if level == logging.INFO else level)
         
-        if tab_match:
-            # Tab-level → update queue table
-            self._update_queue_from_tab_msg(email, msg, tab_match)
+        short_msg = msg.split(']')[-1].strip()[:40] if ']' in msg else msg[:40]
+        self.ui_updates.post(("video", "run", email), lambda: self._set_run_status(email, short_msg))
         
         # Update progress status bar (global)
+        status = None
         if any(kw in msg for kw in ['Cloudflare', '🔐', 'cf_clearance']):
-            self.progress_status.setText(f"🔐 [{email[:15]}] Giải Cloudflare...")
+            status = f"🔐 [{email[:15]}] Giải Cloudflare..."
         elif any(kw in msg for kw in ['Browser ready', '✅ Browser']):
-            self.progress_status.setText(f"✅ [{email[:15]}] Browser sẵn sàng")
+            status = f"✅ [{email[:15]}] Browser sẵn sàng"
         elif '📤' in msg:
-            self.progress_status.setText("📤 Đang gửi yêu cầu...")
+            status = "📤 Đang gửi yêu cầu..."
         elif '⏳' in msg and 'Rendering' in msg:
-            self.progress_status.setText("⏳ Đang tạo video...")
+            status = "⏳ Đang tạo video..."
         elif '📥' in msg:
-            self.progress_status.setText("📥 Đang tải video...")
+            status = "📥 Đang tải video..."
+        if status:
+            self.ui_updates.post(("video", "progress_status"), lambda: self.progress_status.setText(status))
     
-    def _update_queue_from_tab_msg(self, email, msg, tab_match):
-        """Update queue table from a tab-specific message.
-        
-        Logic:
-        1. Khi thấy "Starting: <prompt>..." → map tab_key → queue_idx bằng prompt text
-        2. Các message sau đó update queue_idx đã map
-        3. Prompt chưa được tab nào pick → giữ "⏳ Chờ"
-        """
-        import re
-        
-        if email not in self.account_prompt_idx:
-            return
-        
-        indices = self.account_prompt_idx.get(email, [])
-        if not indices:
-            return
-        
-        tab_num = int(tab_match.group(1)) - 1
-        tab_key = f"{email}:{tab_num}"
-        
-        # Initialize mapped indices tracking if not exists
-        if not hasattr(self, '_mapped_queue_indices'):
-            self._mapped_queue_indices = set()
-        
-        # Detect "Starting:" → map tab to prompt by matching text
-        start_match = re.search(r'(?:Starting|Retrying[^:]*): (.+?)\.\.\.', msg)
-        if start_match:
-            prompt_prefix = start_match.group(1).strip()[:20]
-            for qi in indices:
-                # Skip already mapped indices
-                if qi in self._mapped_queue_indices:
-                    continue
-                if qi < self.queue_table.rowCount():
-                    queue_item = self.queue_table.item(qi, 1)
-                    if queue_item and queue_item.text()[:20] == prompt_prefix:
-                        self.tab_current_idx[tab_key] = qi
-                        self._mapped_queue_indices.add(qi)
-                        break
-        
-        # Get mapped queue index
-        idx = self.tab_current_idx.get(tab_key)
-        if idx is None or idx >= self.queue_table.rowCount():
-            return
-        
-        # Don't overwrite completed/failed status — check progress bar
-        pbar = self.queue_table.cellWidget(idx, 3)
-        if isinstance(pbar, QProgressBar):
-            fmt = pbar.format()
-            if fmt in ('✅ Xong', '❌ Lỗi'):
-                return
-        
-        # Map message → progress bar format text (progress % handled by step_progress signal)
-        # This is a fallback for status messages not covered by step_progress
-        status_text = None
-        
-        if any(kw in msg for kw in ['▶️ Starting', 'Starting:']):
-            status_text = "Bắt đầu..."
-        elif '🎬' in msg:
-            status_text = "Chọn mode..."
-        elif '⚙️' in msg:
-            status_text = "Cài đặt..."
-        elif '✏️' in msg:
-            status_text = "Nhập prompt..."
-        elif '📤' in msg:
-            status_text = "Tạo post..."
-        elif '✅ Post ID' in msg or '🆔' in msg:
-            status_text = "Có Post ID"
-        elif 'Rendering' in msg or ('⏳' in msg and 'render' in msg.lower()):
-            time_match = re.search(r'\((\d+)s\)', msg)
-            status_text = f"Render {time_match.group(1)}s" if time_match else "Rendering..."
-        elif '⏳' in msg and 'video' in msg.lower():
-            status_text = "Chờ render..."
-        elif '🔗' in msg:
-            status_text = "Share link..."
-        elif '📥' in msg:
-            status_text = "Tải xuống..."
-        elif '✅ Downloaded' in msg or '✅ Done' in msg:
-            status_text = "✅ Xong"
-        elif '🔄 Ready' in msg:
-            return
-        
-        if status_text and isinstance(pbar, QProgressBar):
-            pbar.setFormat(status_text)
+    def _set_run_status(self, email, short_msg):
+        for i in range(self.run_table.rowCount()):
+            if self.run_table.item(i, 0) and self.run_table.item(i, 0).text() == email:
+                self.run_table.setItem(i, 2, QTableWidgetItem(short_msg))
+                break
+    
+    # Nhãn progress bar theo stage
+    _STAGE_LABELS = {
+        Stage.QUEUED: "Chờ",
+        Stage.STARTED: "Bắt đầu...",
+        Stage.UPLOADING: "Tải ảnh lên...",
+        Stage.CREATING_POST: "Tạo post...",
+        Stage.RENDERING: "Rendering...",
+        Stage.SHARING: "Share link...",
+        Stage.DOWNLOADING: "Tải xuống...",
+        Stage.RETRYING: "🔄 Thử lại...",
+    }
     
-    def _on_step_progress(self, email, worker_idx, percent):
-        """Handle step progress from worker — update progress bar in queue table.
+    def _on_progress(self, event: ProgressEvent):
+        """ProgressEvent từ worker → update progress bar của đúng row (tra task_id, O(1)).
         
-        worker_idx = index trong worker's prompts list
-        Cần map sang queue_idx qua account_prompt_idx.
-        percent: 0-100 = progress, -1 = failed
+        COMPLETED/FAILED do _on_task_completed xử lý (failover, history...).
+        Nhiều event của cùng row trong 1 frame → chỉ event mới nhất được vẽ.
         """
-        if email not in self.account_prompt_idx:
-            return
-        
-        indices = self.account_prompt_idx.get(email, [])
-        if worker_idx < 0 or worker_idx >= len(indices):
+        row = self._row_by_task.get(event.task_id)
+        if row is None or event.stage.is_final:
             return
-        
-        queue_idx = indices[worker_idx]
-        if queue_idx >= self.queue_table.rowCount():
+        if event.stage == Stage.STARTED:
+            self._mark_job(row, job_journal.RUNNING)
+        self.ui_updates.post(("video", "progress", row), lambda: self._apply_progress(row, event))
+    
+    def _apply_progress(self, row: int, event: ProgressEvent):
+        if row >= self.queue_table.rowCount():
             return
-        
-        pbar = self.queue_table.cellWidget(queue_idx, 3)
-        if not isinstance(pbar, QProgressBar):
+        item = self.queue_table.item(row, 3)
+        # Không ghi đè trạng thái cuối (event trễ của lần chạy trước)
+        if item is None or item.data(STATE_ROLE) in FINAL_STATES:
             return
         
-        # Step labels
-        step_labels = {
-            0: "Chờ", 5: "Bắt đầu...", 20: "Tạo post...",
-            50: "Rendering...", 70: "Share link...",
-            90: "Tải xuống...", 100: "✅ Xong"
-        }
-        
-        if percent == -1:
-            # Failed
-            pbar.setValue(100)
-            pbar.setFormat("❌ Lỗi")
-            pbar.setStyleSheet("""
-                QProgressBar {
-                    background: rgba(40, 50, 70, 180);
-                    border: 1px solid rgba(231, 76, 60, 100);
-                    border-radius: 4px;
-                    color: white;
-                    font-size: 10px;
-                    text-align: center;
-                }
-                QProgressBar::chunk {
-                    background: #e74c3c;
-                    border-radius: 3px;
-                }
-            """)
-        else:
-            pbar.setValue(percent)
-            # Exact match first, then range-based label
-            if percent in step_labels:
-                label = step_labels[percent]
-            elif 50 < percent < 70:
-                label = f"Rendering {percent}%"
-            else:
-                label = f"{percent}%"
-            pbar.setFormat(label)
-            
-            if percent >= 100:
-                pbar.setStyleSheet("""
-                    QProgressBar {
-                        background: rgba(40, 50, 70, 180);
-                        border: 1px solid rgba(39, 174, 96, 100);
-                        border-radius: 4px;
-                        color: white;
-                        font-size: 10px;
-                        text-align: center;
-                    }
-                    QProgressBar::chunk {
-                        background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #27ae60, stop:1 #2ecc71);
-                        border-radius: 3px;
-                    }
-                """)
-    
-    def _on_task_completed(self, email, task):
-        """Handle individual task completion.
-        
-        Tìm queue index bằng prompt text match, skip những item đã xử lý.
-        """
-        # Initialize processed tracking if not exists
-        if not hasattr(self, '_processed_indices'):
-            self._processed_indices = set()
-        
-        # Find the queue index for this prompt by text match
-        idx = -1
-        if email in self.account_prompt_idx:
-            items_list = self.account_prompts.get(email, [])
-            indices_list = self.account_prompt_idx.get(email, [])
-            for i, (item, qi) in enumerate(zip(items_list, indices_list)):
-                # Skip already processed indices
-                if qi in self._processed_indices:
-                    continue
-                # item can be (prompt, image) tuple/list or str
-                p = item[0] if isinstance(item, (tuple, list)) else item
-                if p == task.prompt:
-                    idx = qi
-                    self._processed_indices.add(qi)
-                    break
-        
-        # Fallback: search queue table by prompt text (skip processed)
-        if idx < 0:
-            for qi in range(self.queue_table.rowCount()):
-                if qi in self._processed_indices:
-                    continue
-                queue_item = self.queue_table.item(qi, 1)
-                if queue_item and queue_item.text() == task.prompt[:50]:
-                    idx = qi
-                    self._processed_indices.add(qi)
-                    break
+        label = self._STAGE_LABELS.get(event.stage, f"{event.percent}%")
+        if event.stage == Stage.RENDERING and event.percent > STAGE_PERCENT[Stage.RENDERING]:
+            label = f"Rendering {event.percent}%"
+        set_progress(item, event.percent, label)
+        item.setToolTip(f"{event.stage.value} · {event.elapsed:.0f}s"
+                        + (f"\n{event.message}" if event.message else ""))
+    
+    def _set_row_progress(self, row: int, percent: int, text: str, state: str = ACTIVE):
+        item = self.queue_table.item(row, 3)
+        if item is None:
+            item = QTableWidgetItem()
+            self.queue_table.setItem(row, 3, item)
+        set_progress(item, percent, text, state)
+        item.setToolTip("")
+    
+    def _on_task_completed(self, email, task_id, task):
+        """Handle individual task completion — row tra theo task_id."""
+        idx = self._row_by_task.get(task_id, -1)
+        # Progress đang chờ flush của row này đã lỗi thời
+        self.ui_updates.cancel(("video", "progress", idx))
         
-        # Update queue table — progress bar widget
+        # Update queue table — cột tiến độ (ProgressDelegate)
         if idx >= 0 and idx < self.queue_table.rowCount():
-            pbar = self.queue_table.cellWidget(idx, 3)
-            
             if task.status == "completed":
-                if isinstance(pbar, QProgressBar):
-                    pbar.setValue(100)
-                    pbar.setFormat("✅ Xong")
-                    pbar.setStyleSheet("""
-                        QProgressBar {
-                            background: rgba(40, 50, 70, 180);
-                            border: 1px solid rgba(39, 174, 96, 100);
-                            border-radius: 4px;
-                            color: white;
-                            font-size: 10px;
-                            text-align: center;
-                        }
-                        QProgressBar::chunk {
-                            background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #27ae60, stop:1 #2ecc71);
-                            border-radius: 3px;
-                        }
-                    """)
+                self._set_row_progress(idx, 100, "✅ Xong", DONE)
                 self.completed_prompts.append(task)
+                self._mark_job(idx, job_journal.DONE, task.output_path)
                 
                 # Thêm preview cho cột Xem: ảnh thumbnail (i2v) hoặc nút ▶️ (t2v)
                 if task.image_path and os.path.exists(task.image_path):
@@ -2314,10 +2221,12 @@ class VideoGenTab(QWidget):
                     thumb_label.setAlignment(Qt.AlignCenter)
                     thumb_label.setToolTip(os.path.basename(task.image_path))
                     thumb_label.setStyleSheet("border: 1px solid rgba(100,150,255,80); border-radius: 4px;")
-                    pix = QPixmap(task.image_path)
-                    if not pix.isNull():
-                        pix = pix.scaled(38, 38, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                    thumb_label.setProperty("thumb_path", task.image_path)
+                    pix = self.thumb_loader.request(task.image_path, QSize(38, 38))
+                    if pix is not None:
                         thumb_label.setPixmap(pix)
+                    else:
+                        self._pending_thumbs.setdefault(task.image_path, set()).add(idx)
                     self.queue_table.setCellWidget(idx, 2, thumb_label)
                 elif task.output_path and os.path.exists(task.output_path):
                     preview_btn = QPushButton("▶️")
@@ -2352,7 +2261,7 @@ class VideoGenTab(QWidget):
                     if idx >= 0:
                         prompt_item_widget = self.queue_table.item(idx, 1)
                         if prompt_item_widget:
-                            original_item = prompt_item_widget.data(Qt.UserRole)
+                            original_item = self._row_item(idx, prompt_item_widget)
                     if not original_item:
                         original_item = (task.prompt, task.image_path, None, idx + 1)
                     
@@ -2373,26 +2282,9 @@ class VideoGenTab(QWidget):
                     if available:
                         # Còn account khác → đưa vào retry_queue, KHÔNG đánh dấu failed
                         self._retry_queue.append((original_item, idx, tried))
-                        # Undo processed để có thể match lại khi retry
-                        self._processed_indices.discard(idx)
+                        self._mark_job(idx, job_journal.PENDING)
                         # Update progress bar → chờ đổi account
-                        if isinstance(pbar, QProgressBar):
-                            pbar.setValue(0)
-                            pbar.setFormat("🔄 Đổi acc...")
-                            pbar.setStyleSheet("""
-                                QProgressBar {
-                                    background: rgba(40, 50, 70, 180);
-                                    border: 1px solid rgba(243, 156, 18, 100);
-                                    border-radius: 4px;
-                                    color: white;
-                                    font-size: 10px;
-                                    text-align: center;
-                                }
-                                QProgressBar::chunk {
-                                    background: #f39c12;
-                                    border-radius: 3px;
-                                }
-                            """)
+                        self._set_row_progress(idx, 0, "🔄 Đổi acc...", WARNING)
                         self._log(f"🔄 [{email[:15]}] #{idx+1} lỗi → chờ đổi account ({(task.error_message or '')[:40]})")
                         # Thử dispatch ngay nếu có account rảnh
                         self._dispatch_retry_queue()
@@ -2400,45 +2292,15 @@ class VideoGenTab(QWidget):
                         return
                     else:
                         # Hết account khả dụng → đánh dấu failed thật sự
-                        if isinstance(pbar, QProgressBar):
-                            pbar.setValue(100)
-                            pbar.setFormat("❌ Lỗi")
-                            pbar.setStyleSheet("""
-                                QProgressBar {
-                                    background: rgba(40, 50, 70, 180);
-                                    border: 1px solid rgba(231, 76, 60, 100);
-                                    border-radius: 4px;
-                                    color: white;
-                                    font-size: 10px;
-                                    text-align: center;
-                                }
-                                QProgressBar::chunk {
-                                    background: #e74c3c;
-                                    border-radius: 3px;
-                                }
-                            """)
+                        self._set_row_progress(idx, 100, "❌ Lỗi", FAILED)
                         self.failed_prompts.append(task)
+                        self._mark_job(idx, job_journal.FAILED, task.error_message)
                         self._log(f"❌ [{email[:15]}] #{idx+1} hết account khả dụng — {(task.error_message or '')[:30]}")
                 else:
                     # Không có failover state → fallback cũ
-                    if isinstance(pbar, QProgressBar):
-                        pbar.setValue(100)
-                        pbar.setFormat("❌ Lỗi")
-                        pbar.setStyleSheet("""
-                            QProgressBar {
-                                background: rgba(40, 50, 70, 180);
-                                border: 1px solid rgba(231, 76, 60, 100);
-                                border-radius: 4px;
-                                color: white;
-                                font-size: 10px;
-                                text-align: center;
-                            }
-                            QProgressBar::chunk {
-                                background: #e74c3c;
-                                border-radius: 3px;
-                            }
-                        """)
+                    self._set_row_progress(idx, 100, "❌ Lỗi", FAILED)
                     self.failed_prompts.append(task)
+                    self._mark_job(idx, job_journal.FAILED, task.error_message)
                     self._log(f"❌ [{email[:15]}] #{idx+1} {(task.error_message or '')[:30]}")
         
         # Update progress bar
@@ -2455,6 +2317,8 @@ class VideoGenTab(QWidget):
         
         # Save to history
         if task.status == "completed":
+            if task.content_key is None:
+                task.content_key = self._row_content_key(idx, task)
             self.history_manager.add_history(task)
             self.video_completed.emit()
             # Record video usage lên D1 API
@@ -2486,26 +2350,31 @@ class VideoGenTab(QWidget):
         # Check if all workers are done (kể cả accounts chờ stagger timer)
         pending_stagger = getattr(self, '_pending_stagger_count', 0)
         if not self.account_workers and pending_stagger <= 0:
-            # Kiểm tra retry_queue lần cuối — nếu còn item thì đánh dấu failed
-            if hasattr(self, '_retry_queue') and self._retry_queue:
-                self._finalize_retry_queue()
-            
-            self.start_btn.setEnabled(True)
-            self.stop_btn.setEnabled(False)
-            self._elapsed_timer.stop()
-            
-            # Final progress state
-            total = len(self.prompt_queue)
-            done = len(self.completed_prompts)
-            failed = len(self.failed_prompts)
-            self.progress_bar.setValue(total)
-            self.progress_percent.setText(f"{done + failed}/{total} — 100%")
-            if failed == 0:
-                self.progress_status.setText(f"🎉 Hoàn thành tất cả! {done} video")
-            else:
-                self.progress_status.setText(f"⚠️ Xong: {done} thành công, {failed} lỗi")
-            
-            self._log(f"🎉 All done! {done} OK, {failed} failed")
+            self._finish_run()
+    
+    def _finish_run(self):
+        """Không còn worker nào → chốt retry queue + trạng thái cuối"""
+        # Kiểm tra retry_queue lần cuối — nếu còn item thì đánh dấu failed
+        if hasattr(self, '_retry_queue') and self._retry_queue:
+            self._finalize_retry_queue()
+        
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.resume_btn.setEnabled(True)
+        self._elapsed_timer.stop()
+        
+        # Final progress state
+        total = len(self.prompt_queue)
+        done = len(self.completed_prompts)
+        failed = len(self.failed_prompts)
+        self.progress_bar.setValue(total)
+        self.progress_percent.setText(f"{done + failed}/{total} — 100%")
+        if failed == 0:
+            self.progress_status.setText(f"🎉 Hoàn thành tất cả! {done} video")
+        else:
+            self.progress_status.setText(f"⚠️ Xong: {done} thành công, {failed} lỗi")
+        
+        self._log(f"🎉 All done! {done} OK, {failed} failed")
     
     def _dispatch_retry_queue(self):
         """Giao prompt lỗi cho account rảnh (failover).
@@ -2591,11 +2460,12 @@ class VideoGenTab(QWidget):
             worker = APIAccountWorker(
                 acc, items, settings, self._output_dir,
                 num_tabs=min(len(items), 3),
-                headless=True
+                headless=True,
+                task_ids=[self._task_ids[i] for i in indices]
             )
             worker.status_update.connect(self._on_account_status)
             worker.task_completed.connect(self._on_task_completed)
-            worker.step_progress.connect(self._on_step_progress)
+            worker.progress.connect(self._on_progress)
             worker.all_finished.connect(self._on_account_finished)
             
             self.account_workers[acc.email] = worker
@@ -2619,27 +2489,11 @@ class VideoGenTab(QWidget):
                 error_message=f"Hết account khả dụng (đã thử {len(tried)} acc)",
             )
             self.failed_prompts.append(failed_task)
+            self._mark_job(qi, job_journal.FAILED, failed_task.error_message)
             
             # Update progress bar
             if qi >= 0 and qi < self.queue_table.rowCount():
-                pbar = self.queue_table.cellWidget(qi, 3)
-                if isinstance(pbar, QProgressBar):
-                    pbar.setValue(100)
-                    pbar.setFormat("❌ Hết acc")
-                    pbar.setStyleSheet("""
-                        QProgressBar {
-                            background: rgba(40, 50, 70, 180);
-                            border: 1px solid rgba(231, 76, 60, 100);
-                            border-radius: 4px;
-                            color: white;
-                            font-size: 10px;
-                            text-align: center;
-                        }
-                        QProgressBar::chunk {
-                            background: #e74c3c;
-                            border-radius: 3px;
-                        }
-                    """)
+                self._set_row_progress(qi, 100, "❌ Hết acc", FAILED)
             self._log(f"❌ #{qi+1} hết account — đã thử {len(tried)} acc: {', '.join(e[:15] for e in tried)}")
         
         self._retry_queue.clear()
@@ -2653,6 +2507,7 @@ class VideoGenTab(QWidget):
         self.run_table.setRowCount(0)
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
+        self.resume_btn.setEnabled(True)
         self._elapsed_timer.stop()
         
         # Clear retry queue khi stop
@@ -2727,6 +2582,20 @@ class VideoGenTab(QWidget):
         except Exception as e:
             print(f"Failed to save settings: {e}")
     
+    def _on_thumbnail_loaded(self, path: str, pixmap: QPixmap):
+        """Thumbnail ảnh nguồn decode xong → gắn vào các row đang chờ (nếu row chưa bị thay)"""
+        for idx in self._pending_thumbs.pop(path, ()):
+            label = self.queue_table.cellWidget(idx, 2)
+            if isinstance(label, QLabel) and label.property("thumb_path") == path:
+                label.setPixmap(pixmap)
+
+    def _on_thumbnail_failed(self, path: str):
+        """Ảnh nguồn không đọc được → bỏ các row đang chờ, hiện icon thay thumbnail"""
+        for idx in self._pending_thumbs.pop(path, ()):
+            label = self.queue_table.cellWidget(idx, 2)
+            if isinstance(label, QLabel) and label.property("thumb_path") == path:
+                label.setText("🖼️")
+    
     def _preview_video(self, video_path: str):
         """Mở dialog xem trước video."""
         if not os.path.exists(video_path):
@@ -2781,7 +2650,7 @@ class VideoGenTab(QWidget):
             if not prompt_text:
                 continue
             # Lấy metadata gốc
-            meta = prompt_item.data(Qt.UserRole)
+            meta = self._row_item(row, prompt_item)
             if meta and isinstance(meta, (tuple, list)):
                 # Dùng prompt text mới, giữ nguyên image_path/subfolder/stt
                 item = (prompt_text, meta[1], meta[2], meta[3])
@@ -2814,24 +2683,8 @@ class VideoGenTab(QWidget):
         
         # Reset progress cho các row được chọn
         for row in regen_rows:
-            pbar = self.queue_table.cellWidget(row, 3)
-            if isinstance(pbar, QProgressBar):
-                pbar.setValue(0)
-                pbar.setFormat("🔄 Tạo lại...")
-                pbar.setStyleSheet("""
-                    QProgressBar {
-                        background: rgba(40, 50, 70, 180);
-                        border: 1px solid rgba(100, 150, 255, 50);
-                        border-radius: 4px;
-                        color: white;
-                        font-size: 10px;
-                        text-align: center;
-                    }
-                    QProgressBar::chunk {
-                        background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #3498db, stop:1 #2ecc71);
-                        border-radius: 3px;
-                    }
-                """)
+            self._set_row_progress(row, 0, "🔄 Tạo lại...", ACTIVE)
+            self._mark_job(row, job_journal.PENDING)
             # Xóa nút preview cũ
             self.queue_table.setCellWidget(row, 2, None)
             self.queue_table.setItem(row, 2, QTableWidgetItem(""))
@@ -2841,14 +2694,6 @@ class VideoGenTab(QWidget):
                 new_meta = regen_items[regen_rows.index(row)]
                 prompt_item.setData(Qt.UserRole, new_meta)
         
-        # Xóa các row khỏi processed set để có thể match lại
-        if hasattr(self, '_processed_indices'):
-            for row in regen_rows:
-                self._processed_indices.discard(row)
-        if hasattr(self, '_mapped_queue_indices'):
-            for row in regen_rows:
-                self._mapped_queue_indices.discard(row)
-        
         # Dùng account đầu tiên, settings hiện tại
         account = accounts[0]
         aspect = self.aspect_combo.currentText()
@@ -2864,17 +2709,19 @@ class VideoGenTab(QWidget):
         
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
+        self.resume_btn.setEnabled(False)
         self.regen_btn.setEnabled(False)
         
         # Start worker
         worker = APIAccountWorker(
             account, regen_items, settings, self._output_dir,
             num_tabs=min(len(regen_items), 3),
-            headless=True
+            headless=True,
+            task_ids=[self._task_ids[row] for row in regen_rows]
         )
         worker.status_update.connect(self._on_account_status)
         worker.task_completed.connect(self._on_task_completed)
-        worker.step_progress.connect(self._on_step_progress)
+        worker.progress.connect(self._on_progress)
         worker.all_finished.connect(self._on_regen_finished)
         
         self.account_workers[account.email] = worker
@@ -2889,10 +2736,123 @@ class VideoGenTab(QWidget):
         
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
+        self.resume_btn.setEnabled(True)
         self.regen_btn.setEnabled(True)
         self._log(f"🏁 Tạo lại hoàn tất [{email[:20]}]")
-
-    def _log(self, msg):
-        ts = datetime.now().strftime("%H:%M:%S")
-        self.log.append(f"[{ts}] {msg}")
-        self.log.verticalScrollBar().setValue(self.log.verticalScrollBar().maximum())
+    
+    # ==================== Job Journal ====================
+    
+    def _journal_settings(self, items) -> dict:
+        """Settings lưu kèm batch để Tiếp tục chạy lại đúng như cũ"""
+        subfolders = sorted({it[2] for it in items if it[2]})
+        return {
+            "mode": self._gen_mode,
+            "aspect": self.aspect_combo.currentIndex(),
+            "length": self.length_combo.currentIndex(),
+            "resolution": self.resolution_combo.currentIndex(),
+            "name": ", ".join(subfolders)[:60] if subfolders else items[0][0][:40],
+        }
+    
+    def _mark_job(self, row: int, state: str, detail=None):
+        """Ghi chuyển trạng thái của row queue vào journal"""
+        if self._batch_id is None or not 0 <= row < len(self._job_idx):
+            return
+        idx = self._job_idx[row]
+        try:
+            if state == job_journal.RUNNING:
+                self.journal.mark_running(self._batch_id, idx)
+            elif state == job_journal.DONE:
+                self.journal.mark_done(self._batch_id, idx, detail)
+            elif state == job_journal.FAILED:
+                self.journal.mark_failed(self._batch_id, idx, detail)
+            else:
+                self.journal.mark_pending(self._batch_id, [idx])
+        except Exception as e:
+            print(f"[JobJournal] {e}")
+    
+    def _resume_batch(self):
+        """Dựng lại queue từ journal (chỉ item chưa xong) rồi chạy tiếp"""
+        if self.account_workers:
+            QMessageBox.warning(self, "Lỗi", "Đang tạo video, vui lòng đợi hoàn tất")
+            return
+        batches = self.journal.resumable_batches("video")
+        if not batches:
+            QMessageBox.information(self, "Tiếp tục batch", "Không có batch nào còn dang dở")
+            return
+        labels = [b.label() for b in batches]
+        label, ok = QInputDialog.getItem(self, "Tiếp tục batch", "Chọn batch:", labels, 0, False)
+        if not ok:
+            return
+        batch = batches[labels.index(label)]
+        jobs = self.journal.items(batch.id, exclude_done=True)
+        
+        s = batch.settings
+        if s.get("mode") in ("text", "image") and s["mode"] != self._gen_mode:
+            self._switch_mode(s["mode"])
+        self.aspect_combo.setCurrentIndex(s.get("aspect", self.aspect_combo.currentIndex()))
+        self.length_combo.setCurrentIndex(s.get("length", self.length_combo.currentIndex()))
+        self.resolution_combo.setCurrentIndex(s.get("resolution", self.resolution_combo.currentIndex()))
+        if batch.output_dir:
+            self._output_dir = batch.output_dir
+            self.output_input.setText(batch.output_dir)
+        
+        self._log(f"⏯️ Tiếp tục batch: {len(jobs)}/{batch.total} video chưa xong ({batch.done} đã xong)")
+        self._resume_plan = (batch, jobs)
+        self._start()
+
+    # ==================== Result reuse ====================
+    
+    def _reuse_settings(self) -> VideoSettings:
+        """Settings hiện tại (phần tham gia content_key)"""
+        aspect = self.aspect_combo.currentText()
+        length = int(self.length_combo.currentText().split()[0])
+        resolution = self.resolution_combo.currentText()
+        return VideoSettings(aspect_ratio=aspect, video_length=length, resolution=resolution)
+    
+    def _row_item(self, row: int, prompt_item):
+        """(prompt, image_path, subfolder, stt) của row: bản đã sửa khi Tạo Lại (UserRole) hoặc từ prompt_queue"""
+        meta = prompt_item.data(Qt.UserRole)
+        if meta:
+            return meta
+        return self.prompt_queue[row] if 0 <= row < len(self.prompt_queue) else None
+    
+    def _row_content_key(self, row: int, task):
+        """content_key đã tính lúc Start cho row (None nếu prompt/ảnh/settings đã đổi → history tự tính)"""
+        if not 0 <= row < len(self._content_keys):
+            return None
+        prompt, image_path = self.prompt_queue[row][:2]
+        if (task.prompt, task.image_path, task.settings) != (prompt, image_path, self._key_settings):
+            return None
+        return self._content_keys[row]
+    
+    def _offer_reuse(self, items, keys) -> dict:
+        """Row có video cũ trùng content_key → hardlink/copy sang tên file mới (nếu user đồng ý).
+        
+        keys: content_key từng item (ContentKeyWorker). Trả về {row: output_path} của các row đã dùng lại.
+        """
+        found = self.history_manager.find_reusable(keys, "video")
+        rows = [i for i, key in enumerate(keys) if key in found]
+        if not rows:
+            return {}
+        answer = QMessageBox.question(
+            self, "Dùng lại video",
+            f"{len(rows)}/{len(items)} prompt đã có video (cùng prompt, settings, ảnh nguồn).\n"
+            "Dùng lại video cũ thay vì tạo lại?")
+        if answer != QMessageBox.Yes:
+            return {}
+        
+        reused = {}
+        base = Path(self._output_dir)
+        for i in rows:
+            prompt, _, subfolder, stt = items[i]
+            src, post_id = found[keys[i]]
+            dest = (base / subfolder if subfolder else base) / video_output_name(stt, prompt, post_id or "reused")
+            try:
+                reused[i] = reuse_output(src, dest)
+            except OSError as e:
+                self._log(f"⚠️ #{i+1} không dùng lại được: {e}")
+        return reused
+    
+    def _log(self, msg, account="", level=None):
+        # Ghi file (nền) + ring buffer của view
+        self.log.append(run_log.write("video", msg, level, account))
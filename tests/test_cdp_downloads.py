@@ -0,0 +1,85 @@
+"""
+Test cdp_downloads — gắn guid → watch theo URL, biết download xong qua event (không quét file).
+"""
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.cdp_downloads import CANCELED, COMPLETED, DownloadTracker, move_download
+
+
+def _begin(guid, url):
+    return SimpleNamespace(guid=guid, url=url, suggested_filename=url.rsplit("/", 1)[-1].split("?")[0])
+
+
+def _progress(guid, received, total, state="inProgress"):
+    return SimpleNamespace(guid=guid, received_bytes=received, total_bytes=total, state=state)
+
+
+def test_events_route_each_download_to_its_watch(tmp_path):
+    tracker = DownloadTracker(tmp_path / "staging")
+    tracker.download_dir.mkdir()
+
+    async def scenario():
+        seen = []
+        a = tracker.expect("post-a", on_progress=lambda w: seen.append(w.percent))
+        b = tracker.expect("post-b")
+        waits = asyncio.gather(tracker.wait(a, timeout=2), tracker.wait(b, timeout=2))
+        await asyncio.sleep(0)
+
+        # Tab B bắt đầu trước; event lặp lại (nhận qua nhiều tab) bị bỏ qua
+        tracker.on_will_begin(_begin("g-b", "https://x/post-b.mp4?dl=1"))
+        tracker.on_will_begin(_begin("g-a", "https://x/post-a.mp4?dl=1"))
+        tracker.on_will_begin(_begin("g-a", "https://x/post-a.mp4?dl=1"))
+        tracker.on_will_begin(_begin("g-z", "https://x/unrelated.mp4"))
+        tracker.on_progress(_progress("g-a", 50, 100))
+        (tracker.download_dir / "g-a").write_bytes(b"x" * 100)
+        tracker.on_progress(_progress("g-a", 100, 100, COMPLETED))
+        tracker.on_progress(_progress("g-b", 10, 100, CANCELED))
+        return seen, await waits
+
+    seen, (a, b) = asyncio.run(scenario())
+    assert seen == [50, 100]
+    assert b is None
+    assert (a.guid, a.suggested_filename, a.path) == ("g-a", "post-a.mp4", tracker.download_dir / "g-a")
+    assert tracker._watches == [] and tracker._by_guid == {}
+
+    dest = tmp_path / "out" / "001_cat_post-a.mp4"
+    assert move_download(a, dest) == str(dest)
+    assert dest.stat().st_size == 100 and not a.path.exists()
+
+
+def test_wait_gives_up_when_download_never_begins(tmp_path):
+    tracker = DownloadTracker(tmp_path)
+
+    async def scenario():
+        watch = tracker.expect("post-a")
+        return await tracker.wait(watch, timeout=5, begin_timeout=0.05)
+
+    assert asyncio.run(scenario()) is None
+    assert tracker._watches == []
+
+
+def test_unfinished_and_stale_staging_files_are_removed(tmp_path):
+    tracker = DownloadTracker(tmp_path)
+
+    async def scenario():
+        watch = tracker.expect("post-a")
+        waiting = asyncio.create_task(tracker.wait(watch, timeout=0.1))
+        await asyncio.sleep(0)
+        tracker.on_will_begin(_begin("g-a", "https://x/post-a.mp4"))
+        (tmp_path / "g-a").write_bytes(b"x" * 10)  # Chrome đang ghi dở
+        return await waiting
+
+    assert asyncio.run(scenario()) is None
+    assert not (tmp_path / "g-a").exists()
+
+    old, fresh = tmp_path / "g-old", tmp_path / "g-new"
+    old.write_bytes(b"x")
+    fresh.write_bytes(b"x")
+    os.utime(old, (0, 0))
+    assert tracker.sweep() == 1
+    assert not old.exists() and fresh.exists()
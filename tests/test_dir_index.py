@@ -0,0 +1,42 @@
+"""
+Test dir_index — ghép subfolder ảnh + TXT bằng 1 lần scandir mỗi thư mục, cache theo mtime.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.dir_index import DirIndexer, find_image_pairs
+
+
+def _touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("x", encoding="utf-8")
+
+
+def test_find_pairs_and_reuse_cache(tmp_path):
+    _touch(tmp_path / "set10" / "1.png")
+    _touch(tmp_path / "Set10.TXT")                   # parent/<tên>.txt, khác hoa thường
+    _touch(tmp_path / "set2" / "10.jpg")
+    _touch(tmp_path / "set2" / "2.jpg")
+    _touch(tmp_path / "set2" / "prompts.txt")        # <tên>/prompts.txt
+    _touch(tmp_path / "no_txt" / "1.png")
+    _touch(tmp_path / "no_images" / "no_images.txt")
+    _touch(tmp_path / ".hidden" / "1.png")
+    _touch(tmp_path / ".hidden.txt")
+    for d in [tmp_path, *tmp_path.iterdir()]:
+        os.utime(d, (1_600_000_000, 1_600_000_000))  # cũ hơn RACY_SECONDS → được cache
+
+    indexer = DirIndexer()
+    pairs = find_image_pairs(tmp_path, indexer)
+    assert [p.folder.name for p in pairs] == ["set2", "set10"]
+    assert pairs[0].txt_path.name == "prompts.txt"
+    assert [p.name for p in pairs[0].images] == ["2.jpg", "10.jpg"]
+    assert pairs[1].txt_path.name == "Set10.TXT"
+    assert indexer.scanned == 5  # parent + 4 subfolder không ẩn
+
+    # Import lại: chỉ thư mục có thay đổi bị quét lại
+    _touch(tmp_path / "no_txt" / "prompt.txt")
+    pairs = find_image_pairs(tmp_path, indexer)
+    assert [p.folder.name for p in pairs] == ["no_txt", "set2", "set10"]
+    assert indexer.scanned == 6
@@ -0,0 +1,101 @@
+"""
+Test download_queue — tải lại video thiếu bằng HTTP, session dùng lại theo thread, hủy từng job.
+"""
+import os
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.download_queue import (
+    CANCELED, DONE, FAILED, DownloadJob, DownloadQueue, needs_download, redownload_target
+)
+from src.core.models import VideoTask
+
+DATA = b"v" * 600000  # > 1 chunk (256KB) để test hủy giữa chừng
+SHARE_URL = "https://share/{post_id}.mp4?cache=1"
+
+
+class FakeResponse:
+    def __init__(self, status_code, body, gate=None):
+        self.status_code = status_code
+        self.headers = {"content-length": str(len(body))}
+        self.body = body
+        self.gate = gate
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            if self.gate is not None and i:
+                self.gate.wait(2)
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    created = []
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.urls = []
+        FakeSession.created.append(self)
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        self.urls.append(url)
+        if "missing" in url:
+            return FakeResponse(404, b"")
+        return FakeResponse(200, DATA, self.gate)
+
+
+def test_needs_download_and_target(tmp_path):
+    gone = VideoTask(id="a", prompt="a cat", status="completed", post_id="p1",
+                     output_path=str(tmp_path / "old.mp4"), file_exists=False)
+    never = VideoTask(id="b", prompt="a dog", status="completed", post_id="p2")
+    ok = VideoTask(id="c", prompt="x", status="completed", post_id="p3", output_path="x.mp4", file_exists=True)
+    failed = VideoTask(id="d", prompt="x", status="failed", post_id="p4")
+    assert [needs_download(t) for t in (gone, never, ok, failed)] == [True, True, False, False]
+
+    assert redownload_target(gone, tmp_path, SHARE_URL) == ("https://share/p1.mp4?cache=1", tmp_path / "old.mp4")
+    url, dest = redownload_target(never, tmp_path / "out", SHARE_URL)
+    assert url == "https://share/p2.mp4?cache=1" and dest == tmp_path / "out" / "000_a_dog_p2.mp4"
+
+
+def test_queue_downloads_with_pooled_sessions(tmp_path):
+    FakeSession.created = []
+    updates = []
+    lock = threading.Lock()
+
+    def on_update(job):
+        with lock:
+            updates.append((job.task_id, job.state))
+
+    queue = DownloadQueue(concurrency=2, on_update=on_update, session_factory=FakeSession, validate=None)
+    jobs = [DownloadJob(f"t{i}", f"https://share/p{i}.mp4", tmp_path / f"{i}.mp4") for i in range(6)]
+    jobs.append(DownloadJob("bad", "https://share/missing.mp4", tmp_path / "bad.mp4"))
+    futures = [queue.submit(job) for job in jobs]
+    results = [f.result(timeout=10) for f in futures]
+    queue.shutdown()
+
+    assert [j.state for j in results] == [DONE] * 6 + [FAILED]
+    assert "404" in results[-1].error
+    assert all(Path(j.result.path).read_bytes() == DATA for j in results[:6])
+    assert len(FakeSession.created) <= 2  # 1 session mỗi thread, dùng lại giữa các job
+    assert ("t3", DONE) in updates and queue.active() == []
+
+
+def test_cancel_stops_running_and_queued_jobs(tmp_path):
+    gate = threading.Event()
+    queue = DownloadQueue(concurrency=1, session_factory=lambda: FakeSession(gate), validate=None)
+    running = DownloadJob("a", "https://share/a.mp4", tmp_path / "a.mp4")
+    waiting = DownloadJob("b", "https://share/b.mp4", tmp_path / "b.mp4")
+    fa, fb = queue.submit(running), queue.submit(waiting)
+    assert queue.submit(DownloadJob("a", "https://share/a.mp4", tmp_path / "dup.mp4")) is None
+
+    queue.cancel_all()
+    gate.set()
+    assert fa.result(timeout=10).state == CANCELED
+    assert fb.result(timeout=10).state == CANCELED
+    queue.shutdown()
+    assert not (tmp_path / "a.mp4").exists() and not (tmp_path / "b.mp4").exists()
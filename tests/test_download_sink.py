@@ -0,0 +1,88 @@
+"""
+Test download_sink — stream vào .part, resume bằng Range khi đứt, rename nguyên tử khi đủ byte.
+"""
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.download_sink import DownloadError, download_to_file
+
+DATA = bytes(range(256)) * 400  # 102400 bytes
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers, body, fail_after=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.fail_after = fail_after
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise ConnectionError("connection reset")
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeServer:
+    """Lần đầu đứt sau 40000 byte; hỗ trợ Range (206) nếu honor_range"""
+
+    def __init__(self, honor_range=True):
+        self.honor_range = honor_range
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        assert stream
+        self.requests.append(dict(headers or {}))
+        rng = (headers or {}).get("Range")
+        if rng and self.honor_range:
+            start = int(rng[len("bytes="):-1])
+            return FakeResponse(206, {"content-range": f"bytes {start}-{len(DATA) - 1}/{len(DATA)}",
+                                      "content-length": str(len(DATA) - start)}, DATA[start:])
+        fail = 40000 if len(self.requests) == 1 else None
+        return FakeResponse(200, {"content-length": str(len(DATA))}, DATA, fail_after=fail)
+
+
+@pytest.mark.parametrize("honor_range", [True, False])
+def test_interrupted_download_resumes_and_renames(tmp_path, honor_range):
+    server = FakeServer(honor_range)
+    dest = tmp_path / "out" / "001_video.mp4"
+    progress = []
+
+    result = download_to_file(server.get, "https://x/v.mp4", dest, {"Referer": "r"},
+                              chunk_size=8192, min_size=10000,
+                              on_progress=lambda done, total: progress.append((done, total)))
+
+    assert dest.read_bytes() == DATA
+    assert not dest.with_name(dest.name + ".part").exists()
+    assert (result.path, result.size) == (str(dest), len(DATA))
+    assert result.sha256 == hashlib.sha256(DATA).hexdigest()
+    assert server.requests[1].get("Range") == "bytes=40960-" and server.requests[1]["Referer"] == "r"
+    assert result.resumed_from == (40960 if honor_range else 0)  # server bỏ qua Range → tải lại từ 0
+    assert progress[-1] == (len(DATA), len(DATA))
+
+
+def test_failed_download_never_leaves_final_file(tmp_path):
+    dest = tmp_path / "v.mp4"
+
+    def broken(url, headers=None, stream=False):
+        return FakeResponse(200, {"content-length": str(len(DATA))}, DATA, fail_after=16384)
+
+    with pytest.raises(DownloadError):
+        download_to_file(broken, "https://x/v.mp4", dest, chunk_size=8192, max_attempts=2)
+    assert not dest.exists()
+    assert dest.with_name("v.mp4.part").stat().st_size == 16384  # giữ lại để lần sau resume
+
+    def not_found(url, headers=None, stream=False):
+        return FakeResponse(404, {}, b"")
+
+    with pytest.raises(DownloadError, match="404"):
+        download_to_file(not_found, "https://x/v.mp4", tmp_path / "w.mp4")
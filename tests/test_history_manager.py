@@ -0,0 +1,474 @@
+"""
+Test HistoryManager — query API trên SQLite tạm (không cần GUI / browser).
+"""
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.history_manager import HistoryManager
+from src.core.models import VideoTask
+
+
+def _make_manager(tmp_path, n=25):
+    """Tạo HistoryManager với n video task, created_at cách nhau 1 phút."""
+    hm = HistoryManager(db_path=tmp_path / "history.db")
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    for i in range(n):
+        hm.add_history(VideoTask(
+            id=f"task-{i:03d}",
+            account_email="a@x.com" if i % 2 else "b@x.com",
+            prompt=f"prompt number {i}",
+            status="completed" if i % 3 else "failed",
+            output_path=f"/out/{i}.mp4" if i % 5 == 0 else None,
+            created_at=base + timedelta(minutes=i),
+        ))
+    hm.flush()
+    return hm
+
+
+# ============================================================
+# Test 1: Keyset pagination trả đủ, không trùng, đúng thứ tự
+# ============================================================
+def test_query_history_pages_cover_all_rows(tmp_path):
+    hm = _make_manager(tmp_path)
+    seen, cursor = [], None
+    while True:
+        tasks, cursor = hm.query_history(limit=10, after=cursor)
+        seen.extend(t.id for t in tasks)
+        if cursor is None:
+            break
+    assert seen == [f"task-{i:03d}" for i in reversed(range(25))]
+    hm.close()
+
+
+def test_query_history_ascending(tmp_path):
+    hm = _make_manager(tmp_path, n=5)
+    tasks, cursor = hm.query_history(limit=10, descending=False)
+    assert [t.id for t in tasks] == [f"task-{i:03d}" for i in range(5)]
+    assert cursor is None
+    hm.close()
+
+
+# ============================================================
+# Test 2: Filter status / account / date / has_output / text
+# ============================================================
+def test_query_history_filters(tmp_path):
+    hm = _make_manager(tmp_path)
+    failed, _ = hm.query_history(status="failed")
+    assert {t.id for t in failed} == {f"task-{i:03d}" for i in range(25) if i % 3 == 0}
+
+    acc, _ = hm.query_history(account_email="a@x.com")
+    assert all(t.account_email == "a@x.com" for t in acc)
+    assert len(acc) == 12
+
+    recent, _ = hm.query_history(date_from=datetime(2026, 1, 1, 12, 20))
+    assert len(recent) == 5
+
+    with_output, _ = hm.query_history(has_output=True)
+    assert {t.id for t in with_output} == {f"task-{i:03d}" for i in range(0, 25, 5)}
+
+    text, _ = hm.query_history(text="number 1")
+    assert {t.id for t in text} == {"task-001"} | {f"task-{i:03d}" for i in range(10, 20)}
+    hm.close()
+
+
+def test_count_history_matches_query(tmp_path):
+    hm = _make_manager(tmp_path)
+    assert hm.count_history() == 25
+    assert hm.count_history(status="completed") == len(hm.query_history(status="completed")[0])
+    assert hm.count_history(has_output=False) == 20
+    hm.close()
+
+
+def test_get_history_and_iter(tmp_path):
+    hm = _make_manager(tmp_path)
+    assert hm.get_history("task-007").prompt == "prompt number 7"
+    assert hm.get_history("missing") is None
+    assert len(list(hm.iter_history(batch_size=4))) == 25
+    hm.close()
+
+
+# ============================================================
+# Test 3: FTS5 search — ranked, paged, đồng bộ qua trigger
+# ============================================================
+def test_search_ranked_and_paged(tmp_path):
+    hm = _make_manager(tmp_path, n=3)
+    hm.add_history(VideoTask(id="cat-1", prompt="a cat dancing", account_email="c@x.com"))
+    hm.add_history(VideoTask(id="cat-2", prompt="cat cat cat on the roof", account_email="c@x.com"))
+    hm.flush()
+    results, next_offset = hm.search("cat", limit=1)
+    assert [t.id for t in results] == ["cat-2"]
+    assert next_offset == 1
+    results, next_offset = hm.search("cat", limit=1, offset=next_offset)
+    assert [t.id for t in results] == ["cat-1"]
+    assert next_offset is None
+    # Prefix + email + filter
+    assert {t.id for t in hm.search("danc")[0]} == {"cat-1"}
+    assert len(hm.search("c@x.com")[0]) == 2
+    assert hm.search("cat", status="failed")[0] == []
+    hm.close()
+
+
+def test_search_follows_replace_and_delete(tmp_path):
+    hm = _make_manager(tmp_path, n=0)
+    task = VideoTask(id="t1", prompt="sunset over ocean")
+    hm.add_history(task)
+    task.prompt = "mountain lake"
+    hm.add_history(task)  # INSERT OR REPLACE
+    hm.flush()
+    assert hm.search("sunset")[0] == []
+    assert [t.id for t in hm.search("mountain")[0]] == ["t1"]
+    hm.delete_history("t1")
+    hm.flush()
+    assert hm.search("mountain")[0] == []
+    assert hm.count_history(text="mountain") == 0
+    hm.close()
+
+
+def test_search_image_history(tmp_path):
+    from src.core.models import ImageTask
+    hm = _make_manager(tmp_path, n=0)
+    hm.add_image_history(ImageTask(id="img-1", prompt="Phố cổ Hà Nội"))
+    hm.flush()
+    # remove_diacritics: gõ không dấu vẫn tìm được
+    assert [t.id for t in hm.search("pho co", kind="image")[0]] == ["img-1"]
+    hm.close()
+
+
+# ============================================================
+# Test 4: Write-behind — batch commit, flush, close
+# ============================================================
+def test_writes_are_batched_and_flushed(tmp_path):
+    hm = HistoryManager(db_path=tmp_path / "history.db", flush_interval=5)
+    flushed = []
+    hm.add_flush_listener(lambda: flushed.append(True))
+    for i in range(50):
+        hm.add_history(VideoTask(id=f"t{i}", prompt=f"p{i}"))
+    hm.update_output_path("t0", "/out/t0.mp4")
+    hm.delete_history("t1")
+    assert hm.flush(timeout=5)
+    # Cả burst nằm trong 1 transaction → listener chỉ chạy 1 lần
+    assert flushed == [True]
+    assert hm.count_history() == 49
+    assert hm.get_history("t0").output_path == "/out/t0.mp4"
+    assert hm.get_history("t1") is None
+    assert hm.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    hm.close()
+
+
+def test_close_flushes_pending_writes(tmp_path):
+    hm = HistoryManager(db_path=tmp_path / "history.db", flush_interval=5)
+    hm.add_history(VideoTask(id="last", prompt="written on shutdown"))
+    hm.close()
+    hm = HistoryManager(db_path=tmp_path / "history.db")
+    assert hm.get_history("last").prompt == "written on shutdown"
+    hm.close()
+
+
+# ============================================================
+# Test 5: Connection manager — reader riêng từng thread, query_only
+# ============================================================
+def test_reads_from_worker_threads(tmp_path):
+    hm = _make_manager(tmp_path, n=10)
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(hm.count_history())
+            results.append(len(hm.search("prompt")[0]))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert results == [10] * 8
+    # Cùng thread → dùng lại connection thread-local
+    assert hm.conn is hm.conn
+    hm.close()
+
+
+def test_foreign_thread_readers_are_released(tmp_path):
+    import _thread
+    hm = _make_manager(tmp_path, n=3)
+    done = threading.Semaphore(0)
+    counts = []
+
+    def worker():
+        # Thread không tạo qua threading (như QThread) → _DummyThread, is_alive() luôn True
+        try:
+            counts.append(hm.count_history())
+        finally:
+            hm.release_reader()
+            done.release()
+
+    for _ in range(5):
+        _thread.start_new_thread(worker, ())
+    for _ in range(5):
+        done.acquire(timeout=10)
+    assert counts == [3] * 5
+    assert hm.db._readers == []
+
+    hm.count_history()  # reader của thread chính vẫn tạo lại được sau release
+    hm.release_reader()
+    assert hm.db._readers == [] and hm.count_history() == 3
+    hm.close()
+
+
+def test_reader_connections_are_query_only(tmp_path):
+    hm = _make_manager(tmp_path, n=1)
+    with pytest.raises(sqlite3.OperationalError):
+        hm.conn.execute("DELETE FROM video_history")
+    hm.close()
+
+
+# ============================================================
+# Test 6: Stats từ bảng counter — khớp với dữ liệu sau insert/replace/delete
+# ============================================================
+def test_stats_counters_follow_writes(tmp_path):
+    hm = _make_manager(tmp_path, n=0)
+    now = datetime.now()
+    hm.add_history(VideoTask(id="a", account_email="a@x.com", status="completed",
+                             created_at=now, completed_at=now + timedelta(seconds=60)))
+    hm.add_history(VideoTask(id="b", account_email="a@x.com", status="completed",
+                             created_at=now, completed_at=now + timedelta(seconds=120)))
+    hm.add_history(VideoTask(id="c", account_email="b@x.com", status="failed",
+                             created_at=datetime(2026, 1, 1)))
+    hm.flush()
+
+    stats = hm.get_stats()
+    assert (stats.overall.total, stats.overall.completed, stats.overall.failed) == (3, 2, 1)
+    assert stats.today.total == 2
+    assert stats.by_account["a@x.com"].avg_duration == pytest.approx(90, abs=0.01)
+    assert stats.by_account["b@x.com"].avg_duration is None
+    assert stats.by_day["2026-01-01"].failed == 1
+
+    # REPLACE đổi status, delete giảm counter
+    hm.add_history(VideoTask(id="c", account_email="b@x.com", status="completed",
+                             created_at=datetime(2026, 1, 1)))
+    hm.delete_history("a")
+    hm.flush()
+    stats = hm.get_stats()
+    assert (stats.overall.total, stats.overall.completed, stats.overall.failed) == (2, 2, 0)
+    assert stats.by_account["a@x.com"].avg_duration == pytest.approx(120, abs=0.01)
+    assert hm.conn.execute("SELECT COUNT(*) FROM history_stats WHERE count <= 0").fetchone()[0] == 0
+    hm.close()
+
+
+def test_stats_backfilled_on_migration(tmp_path):
+    hm = _make_manager(tmp_path, n=25)
+    hm.close()
+    # Giả lập DB cũ chưa có bảng counter
+    conn = sqlite3.connect(str(tmp_path / "history.db"))
+    for table in ("video_history", "image_history"):
+        for suffix in ("ai", "ad", "au"):
+            conn.execute(f"DROP TRIGGER {table}_stats_{suffix}")
+    conn.execute("DROP TABLE history_stats")
+    conn.commit()
+    conn.close()
+    hm = HistoryManager(db_path=tmp_path / "history.db")
+    stats = hm.get_stats()
+    assert stats.overall.total == 25
+    assert stats.overall.failed == hm.count_history(status="failed")
+    assert len(stats.by_account) == 2
+    assert hm.get_stats(kind="image").overall.total == 0
+    hm.close()
+
+
+# ============================================================
+# Test 7: Cookies tách bảng riêng, load lazy, migrate từ cột JSON cũ
+# ============================================================
+def test_cookies_deduplicated_and_lazy(tmp_path):
+    hm = _make_manager(tmp_path, n=0)
+    cookies = {"sso": "abc", "x-userid": "u1"}
+    for i in range(5):
+        hm.add_history(VideoTask(id=f"t{i}", account_email="a@x.com", account_cookies=dict(cookies)))
+    hm.add_history(VideoTask(id="none", account_email="a@x.com"))
+    hm.flush()
+    assert hm.conn.execute("SELECT COUNT(*) FROM account_cookies").fetchone()[0] == 1
+    assert hm.get_history("t3").account_cookies is None
+    assert hm.get_task_cookies("t3") == cookies
+    assert hm.get_task_cookies("none") is None
+    hm.close()
+
+
+def test_legacy_cookie_column_migrated(tmp_path):
+    hm = _make_manager(tmp_path, n=0)
+    hm.close()
+    conn = sqlite3.connect(str(tmp_path / "history.db"))
+    for i in range(3):
+        conn.execute(
+            "INSERT INTO video_history (id, account_email, created_at, account_cookies) VALUES (?, ?, ?, ?)",
+            (f"old{i}", "a@x.com", "2026-01-01T00:00:00", '{"x-userid": "u1", "sso": "abc"}')
+        )
+    conn.commit()
+    conn.close()
+    hm = HistoryManager(db_path=tmp_path / "history.db")
+    assert hm.get_task_cookies("old1") == {"sso": "abc", "x-userid": "u1"}
+    assert hm.conn.execute(
+        "SELECT COUNT(*) FROM video_history WHERE account_cookies IS NOT NULL"
+    ).fetchone()[0] == 0
+    assert hm.conn.execute("SELECT COUNT(*) FROM account_cookies").fetchone()[0] == 1
+    hm.close()
+
+
+# ============================================================
+# Test 8: Export stream CSV / JSONL, progress, cancel
+# ============================================================
+def test_export_csv_and_jsonl(tmp_path):
+    import csv
+    import json
+    hm = _make_manager(tmp_path, n=25)
+    progress = []
+    n = hm.export(str(tmp_path / "out.csv"), "csv", chunk_size=10,
+                  progress=lambda done, total: progress.append((done, total)))
+    assert n == 25
+    assert progress == [(10, 25), (20, 25), (25, 25)]
+    with open(tmp_path / "out.csv", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 25 and rows[0]["id"] == "task-024"
+
+    n = hm.export(str(tmp_path / "out.jsonl"), "jsonl", status="failed")
+    lines = (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()
+    assert n == len(lines) == hm.count_history(status="failed")
+    assert json.loads(lines[0])["status"] == "failed"
+    hm.close()
+
+
+def test_export_cancel_removes_partial_file(tmp_path):
+    from src.core.history_export import ExportCancelled
+    hm = _make_manager(tmp_path, n=25)
+    with pytest.raises(ExportCancelled):
+        hm.export(str(tmp_path / "out.csv"), "csv", chunk_size=5, is_cancelled=lambda: True)
+    assert list(tmp_path.glob("out.csv*")) == []
+    hm.close()
+
+
+# ============================================================
+# Test 9: Archive theo tháng + incremental vacuum
+# ============================================================
+def test_archive_moves_old_rows_to_monthly_files(tmp_path):
+    hm = _make_manager(tmp_path, n=0)
+    now = datetime.now()
+    old = [datetime(2025, 11, 5), datetime(2025, 11, 20), datetime(2025, 12, 1)]
+    for i, created in enumerate(old):
+        hm.add_history(VideoTask(id=f"old{i}", prompt=f"old sunset {i}", account_email="a@x.com",
+                                 account_cookies={"sso": "abc"}, created_at=created))
+    hm.add_history(VideoTask(id="new", prompt="new sunset", created_at=now))
+    hm.flush()
+
+    result = hm.run_maintenance(archive_after_days=30).result(timeout=10)
+    assert result["archived"] == {"2025-11": 2, "2025-12": 1}
+    assert [m for m, _ in hm.list_archives()] == ["2025-12", "2025-11"]
+    assert hm.count_history() == 1
+    assert hm.get_stats().overall.total == 1
+    assert [t.id for t in hm.search("sunset")[0]] == ["new"]
+
+    archived, next_offset = hm.search_archives("sunset")
+    assert {t.id for t in archived} == {"old0", "old1", "old2"}
+    assert next_offset is None
+    page, next_offset = hm.search_archives("sunset", limit=2)
+    assert len(page) == 2 and next_offset == 2
+
+    archive = sqlite3.connect(str(hm.list_archives()[1][1]))
+    assert archive.execute("SELECT COUNT(*) FROM account_cookies").fetchone()[0] == 1
+    archive.close()
+    hm.close()
+
+
+def test_auto_vacuum_enabled_and_setting_used(tmp_path):
+    hm = _make_manager(tmp_path, n=25)
+    assert hm.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    hm.set_setting("archive_after_days", 0)
+    hm.flush()
+    assert hm.get_setting("archive_after_days") == "0"
+    result = hm.run_maintenance().result(timeout=10)
+    assert result["archived"] == {}
+    assert hm.count_history() == 25
+    hm.close()
+
+
+def test_legacy_db_converted_to_incremental_vacuum(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "history.db"))
+    conn.execute("CREATE TABLE video_history (id TEXT PRIMARY KEY, account_email TEXT, prompt TEXT, "
+                 "aspect_ratio TEXT, video_length INTEGER, resolution TEXT, status TEXT, post_id TEXT, "
+                 "media_url TEXT, output_path TEXT, created_at TEXT, completed_at TEXT, error_message TEXT)")
+    conn.execute("INSERT INTO video_history (id, prompt, created_at) VALUES ('x', 'legacy row', '2026-01-01')")
+    conn.commit()
+    conn.close()
+    hm = HistoryManager(db_path=tmp_path / "history.db")
+    assert hm.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert [t.id for t in hm.search("legacy")[0]] == ["x"]
+    hm.close()
+
+
+# ============================================================
+# Test 10: Cache trạng thái file output + reconcile scan
+# ============================================================
+def test_file_status_cached_and_reconciled(tmp_path):
+    from src.core.file_status import reconcile_file_status
+    out_a, out_b = tmp_path / "out" / "a", tmp_path / "out" / "b"
+    out_a.mkdir(parents=True)
+    out_b.mkdir(parents=True)
+    video = out_a / "1.mp4"
+    video.write_bytes(b"x" * 100)
+
+    hm = _make_manager(tmp_path, n=0)
+    hm.add_history(VideoTask(id="has-file", output_path=str(video)))
+    hm.add_history(VideoTask(id="missing", output_path=str(out_b / "2.mp4")))
+    hm.add_history(VideoTask(id="no-output"))
+    hm.flush()
+    assert hm.get_history("has-file").file_exists is True
+    assert hm.get_history("has-file").file_size == 100
+    assert hm.get_history("missing").file_exists is False
+    assert hm.get_history("no-output").file_exists is None
+
+    # Không đổi gì → không ghi
+    changed, dirs = reconcile_file_status(hm)
+    assert changed == 0
+    assert dirs == {str(out_a), str(out_b)}
+
+    video.unlink()
+    (out_b / "2.mp4").write_bytes(b"y" * 50)
+    # Chỉ quét thư mục a
+    changed, _ = reconcile_file_status(hm, prefix=str(out_a))
+    hm.flush()
+    assert changed == 1
+    assert hm.get_history("has-file").file_exists is False
+    assert hm.get_history("missing").file_exists is False
+
+    changed, _ = reconcile_file_status(hm)
+    hm.flush()
+    assert changed == 1
+    assert hm.get_history("missing").file_size == 50
+    hm.close()
+
+
+def test_iter_missing_downloads_filters_in_sql(tmp_path):
+    hm = _make_manager(tmp_path, n=0)
+    video = tmp_path / "ok.mp4"
+    video.write_bytes(b"x")
+    base = datetime(2026, 1, 1)
+    for i in range(5):
+        hm.add_history(VideoTask(id=f"never{i}", status="completed", post_id=f"p{i}",
+                                 created_at=base + timedelta(minutes=i)))
+    hm.add_history(VideoTask(id="gone", status="completed", media_url="https://x/v.mp4",
+                             output_path=str(tmp_path / "gone.mp4"), created_at=base + timedelta(hours=1)))
+    hm.add_history(VideoTask(id="ok", status="completed", post_id="p", output_path=str(video)))
+    hm.add_history(VideoTask(id="failed", status="failed", post_id="p"))
+    hm.add_history(VideoTask(id="no-url", status="completed"))
+    hm.flush()
+
+    pages = [[t.id for t in page] for page in hm.iter_missing_downloads(batch_size=2)]
+    assert pages == [["gone", "never4"], ["never3", "never2"], ["never1", "never0"]]
+    hm.close()
@@ -0,0 +1,92 @@
+"""
+Test image_io — kích thước ảnh từ header, loại placeholder trước khi decode cả ảnh, ghi trên thread pool.
+"""
+import asyncio
+import base64
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.image_io import ImageSaver, PlaceholderImage, image_info
+
+
+def png(width, height, body=2000):
+    ihdr = struct.pack(">II5B", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + ihdr + b"\0" * (4 + body)
+
+
+def jpeg(width, height, body=2000):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0" + b"\0" * 9
+    exif = b"\xff\xe1" + struct.pack(">H", 3000) + b"x" * 2998  # segment dài trước SOF
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x11\0"
+    return b"\xff\xd8" + app0 + exif + sof + b"\0" * body
+
+
+def test_image_info_from_header_bytes():
+    assert image_info(png(1024, 768)[:32]) is not None
+    assert (image_info(png(1024, 768)).format, image_info(png(1024, 768)).width) == ("png", 1024)
+    info = image_info(jpeg(800, 600))
+    assert (info.format, info.width, info.height, info.extension) == ("jpeg", 800, 600, ".jpg")
+
+    vp8x = b"RIFF\0\0\0\0WEBPVP8X" + b"\0" * 8 + (1279).to_bytes(3, "little") + (719).to_bytes(3, "little")
+    assert (image_info(vp8x).width, image_info(vp8x).height) == (1280, 720)
+    bits = (511) | (255 << 14)
+    vp8l = b"RIFF\0\0\0\0WEBPVP8L" + b"\0" * 4 + b"\x2f" + struct.pack("<I", bits)
+    assert (image_info(vp8l).width, image_info(vp8l).height) == (512, 256)
+    assert image_info(b"GIF89a" + struct.pack("<HH", 64, 64)).width == 64
+
+    assert image_info(jpeg(800, 600)[:100]) is None  # chưa tới SOF
+    assert image_info(b"<html>") is None
+
+
+def test_saver_writes_real_images_and_rejects_placeholders(tmp_path):
+    saver = ImageSaver(max_workers=2)
+
+    def data_url(data, mime="jpeg"):
+        return f"data:image/{mime};base64," + base64.b64encode(data).decode()
+
+    async def scenario():
+        saved = await asyncio.gather(
+            saver.save_data_url(data_url(png(1024, 1024), "jpeg"), tmp_path / "1_cat.jpg"),
+            saver.save_data_url(data_url(jpeg(800, 600)), tmp_path / "2_dog.jpg"),
+        )
+        with pytest.raises(PlaceholderImage, match="64x64"):
+            await saver.save_data_url(data_url(png(64, 64, body=10 ** 6)), tmp_path / "3_ph.jpg")
+        return saved
+
+    a, b = asyncio.run(scenario())
+    saver.shutdown()
+
+    assert a.path == str(tmp_path / "1_cat.png")  # đuôi theo định dạng thật
+    assert b.path == str(tmp_path / "2_dog.jpg") and b.size == len(jpeg(800, 600))
+    assert sorted(os.listdir(tmp_path)) == ["1_cat.png", "2_dog.jpg"]
+
+
+class Response:
+    status_code = 200
+
+    def __init__(self, body):
+        self.headers = {"content-length": str(len(body))}
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+
+def test_fetch_fixes_extension_and_drops_placeholder(tmp_path):
+    saver = ImageSaver(max_workers=1)
+    bodies = {"big": png(2048, 1152), "tiny": png(100, 100)}
+
+    def get(url, **kwargs):
+        return Response(bodies[url])
+
+    result = asyncio.run(saver.fetch(get, "big", tmp_path / "x.jpg"))
+    assert result.path == str(tmp_path / "x.png")
+    with pytest.raises(PlaceholderImage):
+        asyncio.run(saver.fetch(get, "tiny", tmp_path / "y.jpg"))
+    saver.shutdown()
+    assert sorted(os.listdir(tmp_path)) == ["x.png"]
@@ -0,0 +1,41 @@
+"""
+Test job_journal — trạng thái item batch lưu trong SQLite, tiếp tục bỏ qua item đã xong.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.job_journal import DONE, FAILED, PENDING, RUNNING, JobJournal
+
+
+def test_resume_skips_done_items_after_reopen(tmp_path):
+    db = tmp_path / "jobs.db"
+    journal = JobJournal(db)
+    items = [(f"prompt {i}", None, "set1", i + 1) for i in range(4)]
+    batch_id = journal.create_batch("video", items, str(tmp_path), {"aspect": 2, "name": "set1"})
+
+    journal.mark_running(batch_id, 0)
+    journal.mark_done(batch_id, 0, str(tmp_path / "001_a.mp4"))
+    journal.mark_running(batch_id, 1)
+    journal.mark_failed(batch_id, 1, "403")
+    journal.mark_running(batch_id, 2)  # app tắt giữa chừng
+    journal.close()
+
+    journal = JobJournal(db)
+    [batch] = journal.resumable_batches("video")
+    assert (batch.id, batch.total, batch.done, batch.failed) == (batch_id, 4, 1, 1)
+    assert batch.settings == {"aspect": 2, "name": "set1"}
+    assert journal.resumable_batches("image") == []
+
+    left = journal.items(batch_id, exclude_done=True)
+    assert [(j.idx, j.state) for j in left] == [(1, FAILED), (2, RUNNING), (3, PENDING)]
+    assert left[0].error == "403" and left[1].attempts == 1
+    assert (left[2].prompt, left[2].subfolder, left[2].stt) == ("prompt 3", "set1", 4)
+
+    journal.mark_pending(batch_id, [j.idx for j in left])
+    for j in left:
+        journal.mark_done(batch_id, j.idx)
+    assert all(j.state == DONE for j in journal.items(batch_id))
+    assert journal.resumable_batches("video") == []
+    journal.close()
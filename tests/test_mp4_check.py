@@ -0,0 +1,127 @@
+"""
+Test mp4_check — đi qua box top-level (ftyp/moov/mdat), phát hiện file bị cắt thay cho size > 10KB.
+"""
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.download_sink import DownloadError, download_to_file
+from src.core.file_status import reconcile_file_status
+from src.core.history_manager import HistoryManager
+from src.core.models import VideoTask
+from src.core.mp4_check import is_complete_mp4, mp4_problem
+
+
+def box(kind: bytes, payload: bytes = b"", large=False) -> bytes:
+    if large:
+        return struct.pack(">I4sQ", 1, kind, 16 + len(payload)) + payload
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+MP4 = box(b"ftyp", b"isom\0\0\2\0isomiso2mp41") + box(b"moov", b"m" * 300) + box(b"mdat", b"d" * 5000)
+
+
+def test_valid_and_broken_layouts(tmp_path):
+    def check(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return mp4_problem(path)
+
+    assert check("ok.mp4", MP4) is None
+    assert check("large.mp4", MP4[:-5008] + box(b"mdat", b"d" * 5000, large=True)) is None
+    assert check("to_eof.mp4", MP4[:-5008] + struct.pack(">I4s", 0, b"mdat") + b"d" * 10) is None
+    assert check("faststart.mp4", box(b"ftyp", b"isom") + box(b"mdat", b"d" * 10) + box(b"moov")) is None
+
+    assert "bị cắt" in check("cut.mp4", MP4[:-1])
+    assert "thừa" in check("tail.mp4", MP4 + b"\0\0")
+    assert "moov" in check("no_moov.mp4", box(b"ftyp", b"isom") + box(b"mdat", b"d" * 10))
+    assert "ftyp" in check("html.mp4", b"<html><body>403 Forbidden</body></html>")
+    assert "nhỏ" in check("empty.mp4", b"")
+    assert not is_complete_mp4(tmp_path / "missing.mp4")
+
+
+class Response:
+    status_code = 200
+
+    def __init__(self, body):
+        self.headers = {"content-length": str(len(body))}
+        self.body = body
+
+    def iter_content(self, chunk_size):
+        yield self.body
+
+
+def test_download_rejects_truncated_mp4(tmp_path):
+    dest = tmp_path / "v.mp4"
+    result = download_to_file(lambda url, **kw: Response(MP4), "u", dest, validate=mp4_problem)
+    assert result.size == len(MP4) and is_complete_mp4(dest)
+
+    # Server gửi đủ content-length nhưng bản thân file đã hỏng → không retry, không để lại file
+    bad = tmp_path / "bad.mp4"
+    with pytest.raises(DownloadError, match="hỏng"):
+        download_to_file(lambda url, **kw: Response(MP4[:-100]), "u", bad, validate=mp4_problem)
+    assert not bad.exists() and not (tmp_path / "bad.mp4.part").exists()
+
+
+class ChunkedResponse:
+    """Không có content-length; fail_after → đứt kết nối sau ngần ấy byte"""
+
+    def __init__(self, status_code, body, fail_after=None, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+        self.fail_after = fail_after
+
+    def iter_content(self, chunk_size):
+        if self.fail_after is None:
+            yield self.body
+            return
+        yield self.body[:self.fail_after]
+        raise ConnectionError("connection reset")
+
+
+def test_unknown_length_resumes_only_after_cut_stream(tmp_path):
+    # Response kết thúc bình thường nhưng file hỏng → không resume, xóa .part
+    calls = []
+    bad = tmp_path / "bad.mp4"
+    with pytest.raises(DownloadError, match="hỏng"):
+        download_to_file(lambda url, **kw: calls.append(kw) or ChunkedResponse(200, MP4[:-100]),
+                         "u", bad, validate=mp4_problem)
+    assert len(calls) == 1 and not (tmp_path / "bad.mp4.part").exists()
+
+    # Đứt giữa chừng → lần sau gửi Range và ghi tiếp
+    def get(url, headers=None, **kw):
+        rng = (headers or {}).get("Range")
+        if rng:
+            start = int(rng[len("bytes="):-1])
+            return ChunkedResponse(206, MP4[start:], headers={"content-range": f"bytes {start}-{len(MP4) - 1}/*"})
+        return ChunkedResponse(200, MP4, fail_after=1000)
+
+    dest = tmp_path / "v.mp4"
+    result = download_to_file(get, "u", dest, validate=mp4_problem)
+    assert result.resumed_from == 1000 and is_complete_mp4(dest)
+
+
+def test_reconcile_flags_truncated_video_for_redownload(tmp_path):
+    good, cut = tmp_path / "good.mp4", tmp_path / "cut.mp4"
+    good.write_bytes(MP4)
+    cut.write_bytes(MP4)
+    hm = HistoryManager(db_path=tmp_path / "history.db")
+    hm.add_history(VideoTask(id="good", status="completed", output_path=str(good)))
+    hm.add_history(VideoTask(id="cut", status="completed", output_path=str(cut)))
+    hm.flush()
+
+    cut.write_bytes(MP4[:2000])
+    changed, _ = reconcile_file_status(hm)
+    hm.flush()
+    assert changed == 1
+    assert hm.get_history("good").file_exists is True
+    assert hm.get_history("cut").file_exists is False and hm.get_history("cut").file_size == 2000
+
+    # Không đổi size/mtime → không kiểm tra/ghi lại
+    assert reconcile_file_status(hm)[0] == 0
+    hm.close()
@@ -0,0 +1,33 @@
+"""
+Test ProgressReporter — event gắn task_id/email, % mặc định theo stage, elapsed.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.progress import ProgressEvent, ProgressReporter, Stage, STAGE_PERCENT
+
+
+def test_reporter_emits_typed_events():
+    events = []
+    report = ProgressReporter(events.append, "task-1", "a@x.com")
+    report(Stage.STARTED)
+    report(Stage.RENDERING, percent=63)
+    report(Stage.COMPLETED, result="done")
+
+    assert [e.stage for e in events] == [Stage.STARTED, Stage.RENDERING, Stage.COMPLETED]
+    assert all(isinstance(e, ProgressEvent) and e.task_id == "task-1" for e in events)
+    assert events[0].percent == STAGE_PERCENT[Stage.STARTED]
+    assert events[1].percent == 63
+    assert events[2].result == "done" and events[2].stage.is_final
+    assert not events[1].stage.is_final
+    assert events[0].elapsed <= events[2].elapsed
+    assert events[0].account_email == "a@x.com"
+
+
+def test_reporter_without_callback_or_task_id_is_noop():
+    events = []
+    ProgressReporter(None, "task-1")(Stage.STARTED)
+    ProgressReporter(events.append, None)(Stage.STARTED)
+    assert events == []
@@ -0,0 +1,56 @@
+"""
+Test prompt_import — đọc TXT từng dòng vào PromptStore, batch theo file, hủy giữa chừng.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core import prompt_import
+from src.core.prompt_import import PromptItems, import_prompt_files, take_items
+
+
+def test_import_files_into_batches(tmp_path):
+    a = tmp_path / "a.txt"
+    a.write_bytes("\ufeffmèo con\n\n  chó  \r\n".encode("utf-8"))
+    empty = tmp_path / "empty.txt"
+    empty.write_text("\n   \n", encoding="utf-8")
+    b = tmp_path / "b.txt"
+    b.write_text("x\ny\nz", encoding="utf-8")
+
+    progress = []
+    store = import_prompt_files([a, empty, b], on_progress=lambda *args: progress.append(args))
+    assert list(store) == ["mèo con", "chó", "x", "y", "z"]
+    assert store.batches == [("a", 0, 2), ("b", 2, 5)]
+    assert list(store.items())[2] == ("x", "b", 1)
+    assert store[-1] == "z" and store.preview(2) == ["mèo con", "chó"]
+    total = sum(p.stat().st_size for p in (a, empty, b))
+    assert progress[-1] == (total, total, 5)
+
+
+def test_import_can_be_cancelled(tmp_path, monkeypatch):
+    monkeypatch.setattr(prompt_import, "PROGRESS_EVERY_LINES", 10)
+    big = tmp_path / "big.txt"
+    big.write_text("\n".join(f"prompt {i}" for i in range(100)), encoding="utf-8")
+    assert import_prompt_files([big], is_cancelled=lambda: True) is None
+
+    # Hủy sau dòng cuối (file ngắn hơn PROGRESS_EVERY_LINES) vẫn không trả store
+    small = tmp_path / "small.txt"
+    small.write_text("a\nb\n", encoding="utf-8")
+    assert import_prompt_files([small], is_cancelled=lambda: True) is None
+
+
+def test_prompt_items_index_store_without_copying(tmp_path):
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_text("x\ny\n", encoding="utf-8")
+    b.write_text("z\nw\nv\n", encoding="utf-8")
+    store = import_prompt_files([a, b])
+
+    items = PromptItems(store, with_image=True)
+    assert list(items) == [(p, None, name, stt) for p, name, stt in store.items()]
+    assert items[3] == ("w", None, "b", 2)
+    head = items[:4]
+    assert isinstance(head, PromptItems) and len(head) == 4
+    assert list(head.take([1, 3])) == [("y", None, "a", 2), ("w", None, "b", 2)]
+    assert take_items([10, 11, 12], [2, 0]) == [12, 10]
+    assert PromptItems(store)[2] == ("z", "b", 1)
@@ -0,0 +1,80 @@
+"""
+Test result_cache — content_key theo prompt + settings + ảnh nguồn, dùng lại output từ history.
+"""
+import os
+import sys
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.history_manager import HistoryManager
+from src.core.models import ImageSettings, ImageTask, VideoSettings, VideoTask
+from src.core import result_cache
+from src.core.result_cache import compute_keys, content_key, file_digest, reuse_output
+
+
+def test_content_key_covers_prompt_settings_and_image_bytes(tmp_path):
+    img = tmp_path / "a.png"
+    img.write_bytes(b"image-1")
+    key = content_key("a cat", VideoSettings(), str(img))
+
+    assert content_key(" a cat ", VideoSettings(), str(img)) == key
+    assert content_key("a cat", VideoSettings(resolution="720p"), str(img)) != key
+    assert content_key("a cat", VideoSettings()) != key
+    assert content_key("a cat", ImageSettings()) != content_key("a cat", VideoSettings())
+    assert content_key("a cat", VideoSettings(), str(tmp_path / "missing.png")) is None
+
+    img.write_bytes(b"image-2")
+    os.utime(img, ns=(0, 0))  # mtime khác → không dùng digest đã nhớ
+    assert content_key("a cat", VideoSettings(), str(img)) != key
+
+
+def test_find_reusable_and_link_into_new_name(tmp_path):
+    hm = HistoryManager(db_path=tmp_path / "history.db")
+    out = tmp_path / "old" / "001_a_cat_abcdef12.mp4"
+    out.parent.mkdir()
+    out.write_bytes(b"video")
+    hm.add_history(VideoTask(id="v1", prompt="a cat", status="completed",
+                             post_id="abcdef123456", output_path=str(out)))
+    hm.add_history(VideoTask(id="v2", prompt="a dog", status="completed",
+                             output_path=str(tmp_path / "deleted.mp4")))
+    hm.add_history(VideoTask(id="v3", prompt="a cow", status="failed"))
+    img_out = tmp_path / "old" / "1_a_cat.jpg"
+    img_out.write_bytes(b"jpg")
+    hm.add_image_history(ImageTask(id="i1", prompt="a cat", status="completed",
+                                   output_paths=[str(img_out)]))
+    hm.flush()
+
+    keys = [content_key(p, VideoSettings()) for p in ("a cat", "a dog", "a cow", "a fox")]
+    found = hm.find_reusable(keys, "video")
+    assert found == {keys[0]: (str(out), "abcdef123456")}  # file mất / failed → không dùng lại
+    assert hm.find_reusable([content_key("a cat", ImageSettings())], "image") == {
+        content_key("a cat", ImageSettings()): (str(img_out), None)}
+
+    dest = tmp_path / "new" / "set1" / "005_a_cat_abcdef12.mp4"
+    assert reuse_output(str(out), dest) == str(dest)
+    assert dest.read_bytes() == b"video"
+    assert reuse_output(str(out), dest) == str(dest)  # đã là cùng file → giữ nguyên
+    hm.close()
+
+
+def test_digest_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "MAX_DIGESTS", 2)
+    monkeypatch.setattr(result_cache, "_digests", OrderedDict())
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.png"
+        path.write_bytes(b"image-%d" % i)
+        paths.append(path)
+        file_digest(path)
+    file_digest(paths[1])  # dùng lại → thành mới nhất
+    file_digest(paths[0])  # hash lại → đẩy 2 ra
+    assert [os.path.basename(k[0]) for k in result_cache._digests] == ["1.png", "0.png"]
+
+
+def test_compute_keys_reads_items_lazily(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_cache, "KEY_BATCH", 2)
+    img = tmp_path / "a.png"
+    img.write_bytes(b"image")
+    items = [("p%d" % i, VideoSettings(), str(img) if i % 2 else None) for i in range(5)]
+    assert compute_keys(iter(items)) == [content_key(*item) for item in items]
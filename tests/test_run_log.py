@@ -0,0 +1,40 @@
+"""
+Test run_log — ghi qua QueueHandler ra file xoay vòng, parse/tìm lại từ file.
+"""
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core import run_log
+
+
+def test_write_rotate_and_search(tmp_path):
+    run_log.start(tmp_path, max_bytes=2000, backup_count=3)
+    try:
+        for i in range(300):
+            run_log.write("video", f"▶️ prompt {i}", account="a@x.com" if i % 2 else "b@x.com")
+        run_log.write("video", "❌ Error: line1\nline2\\n", account="a@x.com")
+        run_log.write("image", "⚠️ image warning")
+    finally:
+        run_log.stop()
+
+    files = run_log.log_files(tmp_path)
+    assert len(files) == 4 and files[-1].name == run_log.LOG_FILENAME  # 3 backup + file hiện tại
+    assert run_log.search(tmp_path)[0].message != "▶️ prompt 0"  # dòng cũ nhất đã bị xoay vòng bỏ
+
+    errors = run_log.search(tmp_path, min_level=logging.ERROR)
+    assert [e.message for e in errors] == ["❌ Error: line1\nline2\\n"]
+    assert errors[0].account == "a@x.com" and errors[0].source == "video"
+
+    assert [e.message for e in run_log.search(tmp_path, source="image")] == ["⚠️ image warning"]
+    latest = run_log.search(tmp_path, text="PROMPT", account="b@x.com", limit=2)
+    assert [e.message for e in latest] == ["▶️ prompt 296", "▶️ prompt 298"]
+
+
+def test_parse_line_rejects_garbage():
+    assert run_log.parse_line("not a log line") is None
+    entry = run_log.parse_line("2026-01-02 03:04:05\tWARNING\tvideo\t\tslow\ttab")
+    assert entry.level == logging.WARNING and entry.message == "slow\ttab"
+    assert run_log.guess_level("❌ fail") == logging.ERROR
@@ -0,0 +1,65 @@
+"""
+Test ThumbnailCache — key theo path/size/mtime, extract qua process pool, LRU eviction.
+Dùng extractor giả (ghi bytes) → không cần ffmpeg / OpenCV.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.thumbnails import ThumbnailCache, thumbnail_key
+
+
+def _fake_extractor(video_path, dest, width):
+    """Chạy trong process con — thumbnail = 1000 byte"""
+    if video_path.endswith("broken.mp4"):
+        return False
+    with open(dest, "wb") as f:
+        f.write(b"x" * 1000)
+    return True
+
+
+def test_request_extracts_once_and_get_hits(tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbs", extractor=_fake_extractor)
+    try:
+        assert cache.get("/v/a.mp4", 10, 1.0) is None
+        seen = []
+        future = cache.request("/v/a.mp4", 10, 1.0, callback=lambda v, p: seen.append((v, p)))
+        assert future.result(timeout=30) == cache.get("/v/a.mp4", 10, 1.0)
+        path = cache.get("/v/a.mp4", 10, 1.0)
+        assert path is not None and path.read_bytes() == b"x" * 1000
+        assert seen == [("/v/a.mp4", path)]
+        # Đã có → không extract lại; size/mtime khác → key khác
+        assert cache.request("/v/a.mp4", 10, 1.0) is None
+        assert thumbnail_key("/v/a.mp4", 10, 1.0) != thumbnail_key("/v/a.mp4", 10, 2.0)
+        assert cache.get("/v/a.mp4", 11, 1.0) is None
+
+        # Extract lỗi → callback nhận None, không retry
+        failed = cache.request("/v/broken.mp4", 1, 1.0, callback=lambda v, p: seen.append((v, p)))
+        assert failed.result(timeout=30) is None
+        assert seen[-1] == ("/v/broken.mp4", None)
+        assert cache.request("/v/broken.mp4", 1, 1.0) is None
+    finally:
+        cache.shutdown()
+
+
+def test_lru_eviction_and_index_reload(tmp_path):
+    cache = ThumbnailCache(tmp_path / "thumbs", max_bytes=2500, extractor=_fake_extractor)
+    try:
+        for name in ("a", "b"):
+            cache.request(f"/v/{name}.mp4", 1, 1.0).result(timeout=30)
+        cache.get("/v/a.mp4", 1, 1.0)  # a vừa dùng → b cũ nhất
+        cache.request("/v/c.mp4", 1, 1.0).result(timeout=30)
+        assert cache.total_bytes <= 2500
+        assert cache.get("/v/b.mp4", 1, 1.0) is None
+        assert cache.get("/v/a.mp4", 1, 1.0) is not None
+        assert cache.get("/v/c.mp4", 1, 1.0) is not None
+    finally:
+        cache.shutdown()
+
+    # Mở lại: index dựng từ file trên đĩa, file .part dở dang bị dọn
+    (tmp_path / "thumbs" / "junk.jpg.part").write_bytes(b"y")
+    reopened = ThumbnailCache(tmp_path / "thumbs", max_bytes=2500, extractor=_fake_extractor)
+    assert reopened.total_bytes == 2000
+    assert reopened.get("/v/c.mp4", 1, 1.0) is not None
+    assert not (tmp_path / "thumbs" / "junk.jpg.part").exists()